@@ -1,3 +1,4 @@
+import hashlib
 import logging
 from typing import Optional, Union
 
@@ -6,12 +7,15 @@ import requests
 from django.middleware.csrf import get_token
 from django.http.response import JsonResponse
 
+from ..dependencies.storage.storage import CHUNK_SIZE
 from ..models import vocaUser
+from ..storage import get_storage, hash_key, input_key
 
 logger = logging.getLogger("api")
 
 
-VIDEO_ROOT = "data/video_input/"
+# seconds to wait for the video host to connect or send the next chunk
+DOWNLOAD_TIMEOUT = 30
 
 # helper functions
 def check_user(verification_hash: str) -> Optional[vocaUser]:
@@ -39,26 +43,32 @@ def check_user(verification_hash: str) -> Optional[vocaUser]:
         return None
 
 
-def download_file(
-    link: str, video_id: str, location: str = VIDEO_ROOT
-) -> Union[str, bool]:
+def download_file(link: str, video_id: str) -> Union[str, bool]:
     """
-    A simple function to download a file and save it to local storage
+    Streams a file from a link into the shared storage, so any worker node can fetch it, and
+    stores its SHA-256, hashed while it streams, next to it for the feature cache
 
     Args:
         link <str>: The url of the file you want to download
         video_id <str>: The unique id of the file to recognize it
-        location <str>: The location where the file will be located. Default is api/dependencies/infile
 
     Returns:
-        bool: True if the file was saved successfully else False
+        str: The storage key of the file if it was saved successfully
+        bool: False if the file could not be downloaded
     """
-    file_loc = f"{location}/{video_id}.mp4"
-    response = requests.get(link)
-    if response.status_code == 200:
-        with open(file_loc, "wb") as file:
-            file.write(response.content)
-        return file_loc
+    key = input_key(video_id)
+    with requests.get(link, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code == 200:
+            digest = hashlib.sha256()
+
+            def hashed(chunks):
+                for chunk in chunks:
+                    digest.update(chunk)
+                    yield chunk
+
+            get_storage().upload_chunks(hashed(response.iter_content(chunk_size=CHUNK_SIZE)), key)
+            get_storage().upload_chunks([digest.hexdigest().encode("ascii")], hash_key(key))
+            return key
     logger.error(f"Error downloading file: {link}")
     return False
 
@@ -0,0 +1,39 @@
+# dependency imports
+import logging
+
+# django imports
+from django.http import JsonResponse
+from django.views.generic import View
+
+# local imports
+from ..dependencies.redis import Redis as redisDBRaw
+from ..dependencies.redis import job_status
+
+redisDB = redisDBRaw.connect_to_redis()
+
+
+class JobStatus(View):
+    def get(self, request, video_id: str) -> JsonResponse:
+        """
+        Handles GET requests for the progress of a video analysis job.
+
+        The status is read from a single Redis hash written by the worker, so polling
+        needs no decryption or database queries. The videoID returned by the
+        videoanalysis endpoint acts as the lookup key.
+
+        Returns:
+            JsonResponse: {"videoID", "stage", "progress", "task_id"[, "error"]} if the job is known.
+
+        Possible JSON error responses:
+            - {"error": "Unknown job"}: If no job has been queued for the videoID or it has expired.
+            - {"error": "Could not process request"}: If Redis can not be reached.
+        """
+        try:
+            status = job_status.get_status(redisDB, video_id)
+            if status is None:
+                return JsonResponse({"error": "Unknown job"}, status=404)
+            return JsonResponse({"videoID": video_id, **status}, status=200)
+
+        except Exception as e:
+            logging.error(f"Error reading job status: {str(e)}", exc_info=True)
+            return JsonResponse(data={"error": "Could not process request"}, status=500)
@@ -1,7 +1,6 @@
 # dependency imports
 import json
 import logging
-import os
 from typing import Union
 
 # django imports
@@ -47,11 +46,9 @@ class ReturnReport(View):
 
             if check_user(verification_hash):
                 if report := self.check_report(reportID):
-                    filePath = report.reportFile.path
-                    if os.path.exists(filePath):
-                        file = open(filePath, "rb")
-                        response = FileResponse(file)
-                        return response
+                    # the report is streamed from the shared storage, local disk or S3
+                    if report.reportFile and report.reportFile.storage.exists(report.reportFile.name):
+                        return FileResponse(report.reportFile.open("rb"))
                 logging.error(f"Invalid reportID: {reportID}")
                 return JsonResponse({"error": "Invalid reportID"})
             logging.error(f"Unable to verify user with hash: {verification_hash}")
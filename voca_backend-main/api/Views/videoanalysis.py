@@ -1,22 +1,30 @@
 # dependency imports
 import json
 import logging
+import uuid
+from datetime import timedelta
+from typing import Optional
 
+from django.conf import settings
 from django.http import JsonResponse
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import View
 
 from ..dependencies.redis import Redis as redisDBRaw
+from ..dependencies.redis import job_status
+from ..models import AnalysisJob
 from ..rsa import decrypt_message, load_private_key
-from ..tasks import main as report_main
+from ..signatures import report_main
 
 # local imports
 from .helper import check_user, download_file
 
 redisDB = redisDBRaw.connect_to_redis()
 
-VIDEO_ROOT = "data/video_input/"
+# tries at claiming the lease of a video whose holder keeps expiring before it is read
+LEASE_ATTEMPTS = 3
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -40,8 +48,15 @@ class VideoAnalysis(View):
         Args:
             request: The HTTP request object containing the request data.
 
+        Submissions are idempotent on videoID: a retry while the job is queued or running,
+        or after it succeeded, attaches to that job instead of downloading and queueing
+        the video again. A failed job, or an unfinished one older than JOB_LEASE_TTL whose
+        worker was lost, can be resubmitted.
+
         Returns:
-            A JSON response indicating success or failure.
+            A JSON response indicating success or failure. On success the response carries
+            the videoID and the Celery taskID, the progress can be polled at jobstatus/<videoID>.
+            Duplicate submissions additionally carry "duplicate": true.
         """
         try:
             json_data: dict = json.loads(request.body)
@@ -65,11 +80,34 @@ class VideoAnalysis(View):
                     logging.error("Incomplete data provided")
                     return JsonResponse(data={"error": "incomplete data"}, status=400)
 
-                if download_file(video_link, video_id):
-                    report_main.delay(video_id, activity_name)
-                    return JsonResponse({"success": "received"})
+                task_id = str(uuid.uuid4())
+                if holder := self._claim(video_id, task_id):
+                    # another request holds the lease, attach to the job it queued
+                    return self._attach(video_id, holder)
+
+                if job := self._live_job(video_id):
+                    # a finished job outlives its lease, return it instead of recomputing
+                    job_status.release_lease(redisDB, video_id, task_id)
+                    return self._attach(video_id, job.taskID)
+
+                try:
+                    if download_file(video_link, video_id):
+                        # record the job before queueing it so the worker's progress is never overwritten
+                        AnalysisJob.objects.update_or_create(
+                            videoID=video_id,
+                            defaults={"reportID": report_id, "taskID": task_id, "status": "QUEUED"},
+                        )
+                        job_status.set_status(redisDB, video_id, "QUEUED", task_id=task_id)
+                        report_main.apply_async(args=(video_id, activity_name, report_id), task_id=task_id)
+                        return JsonResponse(
+                            {"success": "received", "videoID": video_id, "taskID": task_id}
+                        )
+                except Exception:
+                    job_status.release_lease(redisDB, video_id, task_id)
+                    raise
 
                 # If the video can not be downloaded
+                job_status.release_lease(redisDB, video_id, task_id)
                 logging.error(f"Unable to download video: {video_link}")
                 return JsonResponse(
                     data={"error": "unable to download video"}, status=400
@@ -88,3 +126,33 @@ class VideoAnalysis(View):
             # If any other exception occurs, log it
             logging.error(f"Error processing request: {str(e)}", exc_info=True)
             return JsonResponse(data={"error": "Could not process request"}, status=500)
+
+    def _claim(self, video_id: str, task_id: str) -> Optional[str]:
+        """
+        Claims the lease of a video for task_id. Returns None once it is claimed, or the task id
+        of the job holding it. A lease that expires between the SETNX and the read of its holder
+        is claimed again.
+        """
+        for _ in range(LEASE_ATTEMPTS):
+            if job_status.acquire_lease(redisDB, video_id, task_id, settings.JOB_LEASE_TTL):
+                return None
+            if holder := job_status.lease_holder(redisDB, video_id):
+                return holder
+        raise RuntimeError(f"Unable to claim the lease of video {video_id}")
+
+    def _live_job(self, video_id: str) -> Optional[AnalysisJob]:
+        job = AnalysisJob.objects.filter(videoID=video_id).exclude(status="FAILURE").first()
+        if job is None or job.status == "SUCCESS":
+            return job
+        # an unfinished job releases its lease when it ends, once the lease expired as well the
+        # worker was lost without running the errback and the job is queued again
+        if timezone.now() - job.updated_at < timedelta(seconds=settings.JOB_LEASE_TTL):
+            return job
+        logging.warning(f"Job {job.taskID} for video {video_id} is stale, queueing it again")
+        return None
+
+    def _attach(self, video_id: str, task_id: str) -> JsonResponse:
+        logging.info(f"Duplicate submission for video {video_id}, attaching to task {task_id}")
+        return JsonResponse(
+            {"success": "received", "videoID": video_id, "taskID": task_id, "duplicate": True}
+        )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Report, vocaUser, Key
+from .models import AnalysisJob, Report, vocaUser, Key
 
 # Register your models here.
 class vocaUser_admin(admin.ModelAdmin):
@@ -9,7 +9,11 @@ class vocaUser_admin(admin.ModelAdmin):
 class report_admin(admin.ModelAdmin):
     readonly_fields = ["reportID", "owner"]
 
+class analysis_job_admin(admin.ModelAdmin):
+    readonly_fields = ["videoID", "reportID", "taskID"]
+
 
 admin.site.register(vocaUser, vocaUser_admin)
 admin.site.register(Report, report_admin)
+admin.site.register(AnalysisJob, analysis_job_admin)
 admin.site.register(Key)
@@ -1,19 +1,151 @@
 import moviepy.editor as mp
-from pydub import AudioSegment
 import speech_recognition as sr
 import parselmouth
 import numpy as np
 from nltk.sentiment import SentimentIntensityAnalyzer
-import plotly.graph_objects as go
-import librosa
-from python_speech_features import mfcc, delta
-from speech_recognition import AudioData
-import io
+import time
 import wave
+from functools import cached_property, lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+from concurrent.futures import ThreadPoolExecutor
+
+from api.dependencies.audio_analysis.timeline import Segment, Timeline, summarise
 
-#added librosa, wave, python_speech_features, io, wave 
 # nltk.download('vader_lexicon')
 
+SERIES_FILE = "audio_series.npz"  # pitch and volume series charted by the report
+RMS_WINDOW = 0.1  # seconds per volume window
+SILENCE_DBFS = -96.0  # floor of the volume envelope, the noise floor of 16 bit PCM
+VOICE_GATE_DBFS = -40.0  # quieter volume windows are pauses, the threshold of detect_silences
+PAUSE_WINDOW = 0.03  # seconds per voice activity window
+PAUSE_BLOCK = 10.0  # seconds of audio held in memory at a time by detect_silences and frame_energies
+MAX_SEGMENT = 30.0  # longest span of speech sent to the recogniser at once, in seconds
+RECOGNITION_WORKERS = 4  # segments recognised concurrently
+RECOGNITION_RETRIES = 2  # further requests for a segment the recogniser could not be reached for
+RECOGNITION_RETRY_DELAY = 1.0  # seconds before the first retry, doubled for every further one
+PITCH_TIME_STEP = 0.01  # seconds between pitch frames
+PITCH_SAMPLE_RATE = 16000  # the pitch tracker runs on a signal resampled to this rate, 0 to keep the original
+CLARITY_HIGH_DB = 30.0  # margin of the speech over the noise floor of a clear recording
+CLARITY_MODERATE_DB = 15.0
+
+
+class TranscriptionError(Exception):
+    """Raised when no span of the speech could be sent to the recogniser."""
+
+
+def load_pcm(audio_path):
+    """
+    Reads a PCM WAV file as a mono float array scaled to [-1, 1].
+
+    Args:
+        audio_path (str): The path to the WAV file written by extract_audio_from_video.
+
+    Returns:
+        tuple: (samples, sample_rate)
+    """
+    with wave.open(audio_path, 'rb') as wf:
+        n_channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        sample_rate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width in (2, 4):
+        dtype = np.int16 if sample_width == 2 else np.int32
+        samples = np.frombuffer(frames, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    if n_channels > 1:
+        samples = samples.reshape(-1, n_channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def rms_envelope(samples, sample_rate, window=RMS_WINDOW):
+    """
+    Computes the RMS volume over consecutive windows of the signal, in dBFS.
+
+    The windows are strided views of the sample array, so no per window objects or copies are made.
+
+    Args:
+        samples (np.ndarray): Mono samples scaled to [-1, 1].
+        sample_rate (int): Samples per second.
+        window (float): Window length in seconds.
+
+    Returns:
+        tuple: (times, dbfs) arrays, times are the window starts in seconds.
+    """
+    size = max(int(sample_rate * window), 1)
+    if len(samples) < size:
+        return np.zeros(0), np.zeros(0)
+    windows = sliding_window_view(samples, size)[::size]
+    rms = np.sqrt(np.einsum('ij,ij->i', windows, windows) / size)
+    dbfs = np.maximum(20 * np.log10(np.maximum(rms, 1e-12)), SILENCE_DBFS)
+    times = np.arange(len(dbfs)) * size / sample_rate
+    return times, dbfs
+
+
+class AudioContext:
+    """
+    The decoded audio of one job and the series derived from it, computed once on first use and
+    shared by every analyzer and the report charts.
+    """
+
+    def __init__(self, audio_path, pitch_time_step=PITCH_TIME_STEP, pitch_sample_rate=PITCH_SAMPLE_RATE):
+        self.audio_path = audio_path
+        self.pitch_time_step = pitch_time_step
+        self.pitch_sample_rate = pitch_sample_rate
+
+    @cached_property
+    def pcm(self):
+        return load_pcm(self.audio_path)
+
+    @property
+    def samples(self):
+        return self.pcm[0]
+
+    @property
+    def sample_rate(self):
+        return self.pcm[1]
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+
+    @cached_property
+    def volume(self):
+        """(times, dbfs) of the RMS volume envelope."""
+        return rms_envelope(self.samples, self.sample_rate)
+
+    @cached_property
+    def pitch(self):
+        """(times, frequency) of the Praat pitch track, unvoiced frames have a frequency of 0."""
+        return extract_pitch(self.samples, self.sample_rate, self.pitch_time_step, self.pitch_sample_rate)
+
+
+def extract_pitch(samples, sample_rate, time_step=PITCH_TIME_STEP, target_rate=PITCH_SAMPLE_RATE):
+    """
+    Tracks the pitch of the signal once with Praat.
+
+    Speech pitch stays well below the 600 Hz ceiling of the tracker, so resampling to a lower
+    rate first keeps the track while shortening the autocorrelation.
+
+    Args:
+        samples (np.ndarray): Mono samples scaled to [-1, 1].
+        sample_rate (int): Samples per second.
+        time_step (float): Seconds between pitch frames.
+        target_rate (int): Rate to resample to before tracking, 0 to keep sample_rate.
+
+    Returns:
+        tuple: (times, frequency) arrays, unvoiced frames have a frequency of 0.
+    """
+    sound = parselmouth.Sound(samples.astype(np.float64), sampling_frequency=sample_rate)
+    if target_rate and target_rate < sample_rate:
+        sound = sound.resample(target_rate)
+    pitch = sound.to_pitch(time_step=time_step)
+    return pitch.xs(), pitch.selected_array['frequency']
+
 
 def extract_audio_from_video(video_path, output_audio_path) -> str:
     """
@@ -33,83 +165,172 @@ def extract_audio_from_video(video_path, output_audio_path) -> str:
     video_clip.close()
     return output_audio_path
 
-def speech_to_text(audio_path) -> str:
+def recognize_segment(audio_data, retries=RECOGNITION_RETRIES, retry_delay=RECOGNITION_RETRY_DELAY):
     """
-    Converts speech in an audio file to text using Google Speech Recognition.
-
-    Args:
-        audio_path (str): The path to the audio file.
+    Converts one segment of speech to text using Google Speech Recognition, retrying requests
+    that fail with backoff.
 
     Returns:
-        str: The text transcribed from the audio file.
+        str: The text, empty if the segment holds no recognisable speech, None if the service
+             could not be reached.
     """
     recognizer = sr.Recognizer()
-    with sr.AudioFile(audio_path) as source:
-        audio_data = recognizer.record(source)
+    for attempt in range(retries + 1):
         try:
-            text = recognizer.recognize_google(audio_data)
-            return text
+            return recognizer.recognize_google(audio_data)
         except sr.UnknownValueError:
-            print("Speech recognition could not understand audio")
+            return ""
         except sr.RequestError as e:
             print(f"Could not request results from Google Speech Recognition service; {e}")
+            if attempt < retries:
+                time.sleep(retry_delay * 2 ** attempt)
+    return None
 
-def calculate_speech_rate(text, audio_path) -> int:
+def speech_spans(pauses, duration, max_segment=MAX_SEGMENT) -> list:
     """
-    Calculates the speech rate (words per minute) based on the text and audio duration.
+    Splits the audio at its pauses into spans of speech no longer than max_segment seconds.
+
+    Neighbouring stretches of speech are merged while the span stays within max_segment, so a
+    talk with frequent short pauses is recognised in few long requests instead of many short
+    clips. Spans only ever end at a pause, or inside a stretch longer than max_segment.
+
+    Args:
+        pauses (list): The (start, end) seconds of every pause, from detect_silences.
+        duration (float): The length of the audio in seconds.
+        max_segment (float): The longest span returned.
+
+    Returns:
+        list: The (start, end) seconds of every span.
+    """
+    bounds = [0.0] + [t for pause in pauses for t in pause] + [duration]
+    spans = []
+    for start, end in zip(bounds[0::2], bounds[1::2]):
+        if end <= start:
+            continue
+        parts = max(int(np.ceil((end - start) / max_segment)), 1)
+        step = (end - start) / parts
+        for i in range(parts):
+            part = (round(start + i * step, 3), round(start + (i + 1) * step, 3))
+            if spans and part[1] - spans[-1][0] <= max_segment:
+                spans[-1] = (spans[-1][0], part[1])
+            else:
+                spans.append(part)
+    return spans
+
+def read_clips(audio_path, spans) -> list:
+    """
+    Reads the spans of a 16 bit PCM WAV file as mono AudioData for the recogniser.
+
+    sr.Recognizer.record reads whole 4096 frame chunks, which shortens clips and lets offsets
+    drift, so the frames are read exactly here.
+    """
+    clips = []
+    with wave.open(audio_path, 'rb') as wf:
+        n_channels = wf.getnchannels()
+        sample_rate = wf.getframerate()
+        for start, end in spans:
+            wf.setpos(int(start * sample_rate))
+            frames = np.frombuffer(wf.readframes(int((end - start) * sample_rate)), dtype=np.int16)
+            if n_channels > 1:
+                frames = frames.reshape(-1, n_channels).mean(axis=1).astype(np.int16)
+            clips.append(sr.AudioData(frames.tobytes(), sample_rate, 2))
+    return clips
+
+def transcribe_timeline(audio_path, max_segment=MAX_SEGMENT, workers=RECOGNITION_WORKERS) -> Timeline:
+    """
+    Transcribes an audio file span by span between its pauses, so every piece of text carries
+    the time it was spoken at.
+
+    Args:
+        audio_path (str): The path to the audio file.
+        max_segment (float): The longest span of speech recognised at once, in seconds.
+        workers (int): Spans recognised concurrently.
+
+    Returns:
+        Timeline: The timed segments, the pauses between them and the spans that failed.
+
+    Raises:
+        TranscriptionError: If every span failed.
+    """
+    pauses, duration = detect_silences(audio_path)
+    spans = speech_spans(pauses, duration, max_segment)
+
+    clips = read_clips(audio_path, spans)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        texts = list(executor.map(recognize_segment, clips))
+
+    failed = [span for span, text in zip(spans, texts) if text is None]
+    if spans and len(failed) == len(spans):
+        raise TranscriptionError(f"Google Speech Recognition failed for all {len(spans)} spans of {audio_path}")
+    segments = [Segment(start, end, text) for (start, end), text in zip(spans, texts) if text]
+    return Timeline(duration=duration, segments=segments, pauses=pauses, failed=failed)
+
+def speech_to_text(audio_path) -> str:
+    """
+    Converts speech in an audio file to text using Google Speech Recognition.
 
     Args:
-        text (str): The text transcribed from the audio.
         audio_path (str): The path to the audio file.
 
     Returns:
-        int: The speech rate in words per minute.
+        str: The text transcribed from the audio file.
     """
-    audio = AudioSegment.from_file(audio_path)
-    duration_in_seconds = audio.duration_seconds
-    words = len(text.split())
-    words_per_minute = words / (duration_in_seconds / 60)
-    return words_per_minute
+    return transcribe_timeline(audio_path).text
 
-def analyse(audio_path, text, save_dir) -> dict:
+def analyse(audio_path, timeline, save_dir, pitch_time_step=PITCH_TIME_STEP, pitch_sample_rate=PITCH_SAMPLE_RATE) -> dict:
     """
     Analyzes various aspects of the audio, including speech rate, fluency, pauses, pitch and tone variations,
-    word emphasis, tone, pace, clarity, and volume and energy. Also, plots the pitch and tone variations,
-    as well as the volume and energy variations.
+    word emphasis, tone, pace, clarity, and volume and energy. Also, saves the pitch and volume series
+    the report charts to save_dir.
 
     Args:
         audio_path (str): The path to the audio file.
-        text (str): The text transcribed from the audio.
+        timeline (Timeline): The timed transcript from transcribe_timeline.
+        save_dir (str): The directory the series are saved to.
+        pitch_time_step (float): Seconds between pitch frames.
+        pitch_sample_rate (int): Rate the pitch tracker resamples to, 0 to keep the original.
     Returns:
         dict: A dict containing all the results
     """
 
     print("Starting audio analysis")
+    text = timeline.text
     if text:
-        recognizer = sr.Recognizer()
-            
-        speech_rate = calculate_speech_rate(text, audio_path)
+        context = AudioContext(audio_path, pitch_time_step, pitch_sample_rate)
+        speech = summarise(timeline)
+        speech_rate = speech["speech_rate"]
         fluency = analyze_fluency(text)
-        pauses = detect_pauses(audio_path, threshold=20, duration_threshold=0.5)
-        clarity = analyze_clarity(audio_path) #added clarity
-        pitch_tone_variations = analyze_pitch_and_tone(audio_path)
+        pauses = pause_statistics(timeline.pauses, timeline.duration)
+        clarity = analyze_clarity(context.samples, context.sample_rate)
+        pitch_tone_variations = analyze_pitch_and_tone(context.pitch[1])
         word_emphasis = analyze_word_emphasis(text)
         tone_analysis = analyze_tone(text)
-        pace_analysis = analyze_pace(audio_path, text)
-        volume_energy_analysis = analyze_volume_energy(audio_path)
-        # pitch_and_tone = pitch_and_tone_graph(audio_path, save_dir)
-        # volume_energy =   volume_energy_graph(audio_path, save_dir)
+        pace_analysis = analyze_pace(speech_rate)
+        volume_energy_analysis = analyze_volume_energy(context.volume[1])
+        save_series(context, speech, save_dir)
+        # minutes the recogniser failed for entirely have no pace
+        pace = [
+            rate for rate, seconds in zip(speech["words_per_minute"], speech["transcribed_per_bucket"]) if seconds > 0
+        ] or [0.0]
         audio_results = {
             "Speech Rate (words per minute)": "{:.2f}".format(speech_rate),
             "Fluency": fluency,
-            "Pauses": pauses,
+            "Pauses": pauses["count"],
+            "Mean Pause (s)": pauses["mean"],
+            "Longest Pause (s)": pauses["longest"],
+            "Pause Ratio": pauses["ratio"],
             "Pitch and Tone Variations": pitch_tone_variations,
             "Word Emphasis": word_emphasis,
             "Tone Analysis": tone_analysis,
             "Pace Analysis": pace_analysis,
+            "Pace Range (words per minute)": "{:.0f} - {:.0f}".format(min(pace), max(pace)),
+            "Filler Words (per 100 words)": "{:.2f}".format(speech["filler_density"]),
             "Clarity Analysis": clarity, #added clarity
             "Volume and Energy Analysis": volume_energy_analysis,
         }
+        if timeline.partial:
+            # the speech metrics leave these spans out, and the transcript has gaps there
+            audio_results["Untranscribed Speech (s)"] = round(timeline.untranscribed, 1)
         print("Finishing video analysis")
         return audio_results
 
@@ -126,124 +347,200 @@ def analyze_fluency(text) -> str:
     stutter_keywords = ["stutter", "stammer", "hesitate"]
     return "Fluent" if not any(keyword in text.lower() for keyword in stutter_keywords) else "Not Fluent"
 
-#modified pause detection
-def detect_pauses(audio_path, threshold=20, duration_threshold=0.5):
+def iter_pcm_blocks(audio_path, block_seconds=PAUSE_BLOCK, multiple_of=1):
     """
-    Detect the duration of the longest silence interval in an audio file.
+    Reads a PCM WAV file block by block as mono float arrays scaled to [-1, 1].
 
     Args:
-    - audio_path (str): Path to the audio file.
-    - threshold (float): Threshold in decibels below which amplitudes are considered as silence. Default is 20 dB.
-    - duration_threshold (float): Minimum duration (in seconds) of a silence interval to be considered. Default is 0.5.
+        audio_path (str): The path to the WAV file.
+        block_seconds (float): Seconds of audio per block.
+        multiple_of (int): Every block but the last holds a multiple of this many samples.
+
+    Yields:
+        tuple: (block, sample_rate)
+    """
+    with wave.open(audio_path, 'rb') as wf:
+        n_channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        sample_rate = wf.getframerate()
+        if sample_width != 2:
+            raise ValueError(f"Unsupported sample width: {sample_width}")
+        block_frames = max(int(sample_rate * block_seconds) // multiple_of, 1) * multiple_of
+        while True:
+            frames = wf.readframes(block_frames)
+            if not frames:
+                return
+            block = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32767
+            if n_channels > 1:
+                block = block.reshape(-1, n_channels).mean(axis=1)
+            yield block, sample_rate
+
+
+def _true_runs(mask):
+    # start and end (exclusive) indices of every run of True in mask
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return edges[0::2], edges[1::2]
+
+
+def detect_silences(audio_path, threshold_dbfs=-40.0, duration_threshold=0.5, window=PAUSE_WINDOW, block_seconds=PAUSE_BLOCK):
+    """
+    Finds the pauses in a WAV file, streaming it block by block so memory stays bounded.
+
+    A window is silent when its RMS volume is below threshold_dbfs. Silence before the first
+    and after the last speech is not a pause.
+
+    Args:
+        audio_path (str): Path to the WAV file.
+        threshold_dbfs (float): Volume in dBFS below which a window is silent.
+        duration_threshold (float): Minimum duration in seconds of a pause.
+        window (float): Seconds per analysis window.
+        block_seconds (float): Seconds of audio read at a time.
 
     Returns:
-    - Float: Duration of the longest silence interval in seconds.
+        tuple: (intervals, duration), the (start, end) seconds of every pause and the length of the audio.
     """
-    audio_array, sr = librosa.load(audio_path, sr=None, mono=True)
+    with wave.open(audio_path, 'rb') as wf:
+        sample_rate = wf.getframerate()
+    size = max(int(sample_rate * window), 1)
+    threshold = 10 ** (threshold_dbfs / 20)
+
+    intervals = []
+    open_start = None  # window index where a silent run still open at the block edge started
+    offset = 0  # index of the first window of the block
+    for block, _ in iter_pcm_blocks(audio_path, block_seconds, multiple_of=size):
+        usable = len(block) // size * size
+        if usable == 0:
+            break
+        windows = block[:usable].reshape(-1, size)
+        rms = np.sqrt(np.einsum('ij,ij->i', windows, windows) / size)
+        silent = rms < threshold
+
+        starts, ends = _true_runs(silent)
+        if open_start is not None and (len(starts) == 0 or starts[0] != 0):
+            intervals.append((open_start, offset))
+            open_start = None
+        for start, end in zip(starts + offset, ends + offset):
+            if start == offset and open_start is not None:
+                start = open_start
+            if end == offset + len(silent):
+                open_start = start
+            else:
+                intervals.append((start, end))
+                open_start = None
+        offset += len(silent)
 
-    # Detect silent intervals
-    silent_intervals = librosa.effects.split(y=audio_array, top_db=threshold, frame_length=2048, hop_length=512)
-    longest_silence_duration = 0
-    for interval in silent_intervals:
-        silence_start, silence_end = interval
-        silence_duration = silence_end - silence_start
-        if silence_duration > longest_silence_duration:
-            longest_silence_duration = silence_duration
-    # Convert duration to seconds
-    longest_silence_duration_sec = round(longest_silence_duration / sr, 3)+1
+    step = size / sample_rate
+    # a run starting at window 0 is leading silence, a run still open at the end is trailing silence
+    pauses = [
+        (round(float(start * step), 3), round(float(end * step), 3))
+        for start, end in intervals
+        if start > 0 and (end - start) * step >= duration_threshold
+    ]
+    return pauses, offset * step
 
-    return longest_silence_duration_sec
 
-#added clarity analysis
-def audio_data(audio_path):
-    recognizer = sr.Recognizer()
-    with sr.AudioFile(audio_path) as source:
-        audio_data = recognizer.record(source)
+def pause_statistics(pauses, duration) -> dict:
+    """
+    Summarises the pauses found by detect_silences.
 
-def analyze_clarity(audio_data) -> str:
+    Returns:
+        dict: The pause count, the mean and longest pause in seconds and the share of the audio spent pausing.
     """
-    Analyzes the clarity of speech using audio features.
+    lengths = np.array([end - start for start, end in pauses])
+    return {
+        "count": len(pauses),
+        "mean": round(float(lengths.mean()), 3) if len(lengths) else 0.0,
+        "longest": round(float(lengths.max()), 3) if len(lengths) else 0.0,
+        "ratio": round(float(lengths.sum()) / duration, 3) if duration else 0.0,
+    }
+
+
+def detect_pauses(audio_path, threshold_dbfs=-40.0, duration_threshold=0.5) -> dict:
+    """
+    Detects the pauses in an audio file.
 
     Args:
-        audio_data: Audio data as a numpy array or AudioData object.
+        audio_path (str): Path to the audio file.
+        threshold_dbfs (float): Volume in dBFS below which audio is considered silence. Default is -40 dBFS.
+        duration_threshold (float): Minimum duration (in seconds) of a silence interval to be considered. Default is 0.5.
 
     Returns:
-        str: "High clarity" if the clarity is high,
-             "Moderate clarity" if the clarity is moderate,
-             "Low clarity" if the clarity is low,
-             "Unable to analyze clarity" if an error occurs during analysis.
+        dict: The (start, end) seconds of every pause under "intervals" and the pause_statistics.
     """
+    pauses, duration = detect_silences(audio_path, threshold_dbfs, duration_threshold)
+    return {"intervals": pauses, **pause_statistics(pauses, duration)}
 
+def frame_energies(samples, sample_rate, winlen=0.025, winstep=0.01, block_seconds=PAUSE_BLOCK):
+    """
+    The energy (sum of squares) of every winlen frame, winstep apart.
+
+    The frames are strided views into one block of about block_seconds at a time, only the
+    block is converted to float64, so the memory does not grow with the length of the audio.
+    """
+    frame_length = max(int(round(winlen * sample_rate)), 1)
+    step = max(int(round(winstep * sample_rate)), 1)
+    if len(samples) < frame_length:
+        return np.zeros(0)
+    count = 1 + (len(samples) - frame_length) // step
+    per_block = max(int(block_seconds / winstep), 1)
+    energies = np.empty(count)
+    for first in range(0, count, per_block):
+        last = min(first + per_block, count)
+        block = np.asarray(samples[first * step:(last - 1) * step + frame_length], dtype=np.float64)
+        frames = sliding_window_view(block, frame_length)[::step]
+        energies[first:last] = np.einsum("ij,ij->i", frames, frames)
+    return energies
+
+def analyze_clarity(samples, sample_rate) -> str:
+    """
+    Analyzes the clarity of speech from the energy of every 25 ms frame (see frame_energies).
+
+    The loud frames (95th percentile) are compared with the noise floor (10th percentile), which
+    the pauses between words reach in a clean recording. Background noise fills the pauses and
+    narrows the margin.
+
+    Args:
+        samples (np.ndarray): Mono samples scaled to [-1, 1].
+        sample_rate (int): Samples per second.
+
+    Returns:
+        str: "High clarity" if the speech is more than CLARITY_HIGH_DB over the noise floor,
+             "Moderate clarity" if it is more than CLARITY_MODERATE_DB over it,
+             "Low clarity" otherwise,
+             "Unable to analyze clarity" if an error occurs during analysis.
+    """
     try:
-        # Default sample rate
-        sample_rate = 44100
-        
-        if isinstance(audio_data, np.ndarray):
-            # Extract MFCC features
-            mfcc_features = mfcc(audio_data, samplerate=sample_rate, winlen=0.025, winstep=0.01, numcep=13, nfilt=26, nfft=2048)  # Increased NFFT
-            delta_mfcc = delta(mfcc_features, 2)
-
-            # Calculate mean values of MFCC and delta MFCC features
-            mean_mfcc = np.mean(mfcc_features, axis=0)
-            mean_delta_mfcc = np.mean(delta_mfcc, axis=0)
-
-            # Apply heuristics to determine clarity
-            if np.mean(mean_mfcc[:4]) > -20 and np.mean(mean_delta_mfcc[:4]) > -0.5:
-                return "High clarity"
-            elif np.mean(mean_mfcc[:4]) > -25 and np.mean(mean_delta_mfcc[:4]) > -1.0:
-                return "Moderate clarity"
-            else:
-                return "Low clarity"
-        elif isinstance(audio_data, AudioData):
-            # Convert AudioData to numpy array
-            with io.BytesIO() as wav_file:
-                wav_file.write(audio_data.get_wav_data())
-                wav_file.seek(0)
-                with wave.open(wav_file, 'rb') as wf:
-                    n_channels = wf.getnchannels()
-                    sample_width = wf.getsampwidth()
-                    frame_rate = wf.getframerate()
-                    n_frames = wf.getnframes()
-                    audio_array = np.frombuffer(wf.readframes(n_frames), dtype=np.int16)
-
-            # Extract MFCC features
-            mfcc_features = mfcc(audio_array, samplerate=sample_rate, winlen=0.025, winstep=0.01, numcep=13, nfilt=26, nfft=2048)  # Increased NFFT
-            delta_mfcc = delta(mfcc_features, 2)
-
-            # Calculate mean values of MFCC and delta MFCC features
-            mean_mfcc = np.mean(mfcc_features, axis=0)
-            mean_delta_mfcc = np.mean(delta_mfcc, axis=0)
-
-            # Apply heuristics to determine clarity
-            if np.mean(mean_mfcc[:4]) > -20 and np.mean(mean_delta_mfcc[:4]) > -0.5:
-                return "High clarity"
-            elif np.mean(mean_mfcc[:4]) > -25 and np.mean(mean_delta_mfcc[:4]) > -1.0:
-                return "Moderate clarity"
-            else:
-                return "Low clarity"
+        energy = frame_energies(samples, sample_rate)
+        # digital silence is floored like the volume envelope instead of reading as -inf dB
+        levels = 10 * np.log10(np.maximum(energy, np.finfo(np.float64).eps))
+        margin = np.percentile(levels, 95) - np.percentile(levels, 10)
+
+        if margin > CLARITY_HIGH_DB:
+            return "High clarity"
+        elif margin > CLARITY_MODERATE_DB:
+            return "Moderate clarity"
         else:
-            raise ValueError("Unsupported audio_data type")
-
+            return "Low clarity"
     except Exception as e:
         print(f"Error analyzing clarity: {e}")
         return "Unable to analyze clarity"
 
-
-
-def analyze_pitch_and_tone(audio_path) -> str:
+def analyze_pitch_and_tone(pitch_values) -> str:
     """
     Analyzes the pitch and tone variations in the audio using Praat.
 
     Args:
-        audio_path (str): The path to the audio file.
+        pitch_values (np.ndarray): The pitch track from extract_pitch.
 
     Returns:
-        str: "High variations" if the pitch variation is greater than 50, "Low variations" otherwise.
+        str: "High variations" if the standard deviation of the voiced pitch is greater than 50 Hz,
+             "Low variations" otherwise.
     """
-    sound = parselmouth.Sound(audio_path)
-    pitch = sound.to_pitch()
-    pitch_values = pitch.selected_array['frequency']
-    pitch_variation = np.std(pitch_values)
+    # unvoiced frames are 0 Hz, counting them measures how often someone pauses rather than their intonation
+    voiced = pitch_values[pitch_values > 0]
+    if len(voiced) < 2:
+        return "Low variations"
+    pitch_variation = np.std(voiced)
     if pitch_variation > 50:
         return "High variations"
     else:
@@ -262,6 +559,34 @@ def analyze_word_emphasis(text) -> str:
     emphasis_keywords = ["important", "crucial", "significant"]
     return "Effective emphasis" if any(keyword in text.lower() for keyword in emphasis_keywords) else "Lacks emphasis"
 
+@lru_cache(maxsize=None)
+def get_sentiment_analyzer() -> SentimentIntensityAnalyzer:
+    """
+    Returns the process wide VADER analyzer, loading its lexicon from disk on first use only.
+    """
+    return SentimentIntensityAnalyzer()
+
+def tone_label(compound) -> str:
+    if compound >= 0.5:
+        return "Positive tone"
+    elif compound <= -0.5:
+        return "Negative tone"
+    else:
+        return "Neutral tone"
+
+def analyze_tones(texts) -> list:
+    """
+    Analyzes the tone of many texts, e.g. transcript segments, with the shared analyzer.
+
+    Args:
+        texts (list): The texts to score.
+
+    Returns:
+        list: The tone label of every text, as returned by analyze_tone.
+    """
+    sia = get_sentiment_analyzer()
+    return [tone_label(sia.polarity_scores(text)['compound']) for text in texts]
+
 def analyze_tone(text) -> str:
     """
     Analyzes the overall tone of the text using sentiment analysis.
@@ -274,32 +599,21 @@ def analyze_tone(text) -> str:
              "Negative tone" if the sentiment score is less than or equal to -0.5,
              "Neutral tone" otherwise.
     """
-    sia = SentimentIntensityAnalyzer()
-    scores = sia.polarity_scores(text)
-    if scores['compound'] >= 0.5:
-        return "Positive tone"
-    elif scores['compound'] <= -0.5:
-        return "Negative tone"
-    else:
-        return "Neutral tone"
+    return analyze_tones([text])[0]
 
-def analyze_pace(audio_path, text) -> str:
+def analyze_pace(speech_rate) -> str:
     """
-    Analyzes the pace of speech based on the number of words and audio duration.
+    Analyzes the pace of speech based on the speech rate.
 
     Args:
-        audio_path (str): The path to the audio file.
-        text (str): The text transcribed from the audio.
+        speech_rate (float): The speech rate in words per minute.
 
     Returns:
         str: "Fast pace" if the pace is greater than 2.5 words per second,
              "Slow pace" if the pace is less than 1.5 words per second,
              "Moderate pace" otherwise.
     """
-    audio = AudioSegment.from_file(audio_path)
-    duration_in_seconds = audio.duration_seconds
-    num_words = len(text.split())
-    pace = num_words / duration_in_seconds
+    pace = speech_rate / 60
     if pace > 2.5:
         return "Fast pace"
     elif pace < 1.5:
@@ -307,49 +621,26 @@ def analyze_pace(audio_path, text) -> str:
     else:
         return "Moderate pace"
 
-def analyze_clarity(audio_data) -> str:
-    """
-    Analyzes the clarity of speech using Google Speech Recognition confidence scores.
-
-    Args:
-        audio_data (AudioData): The audio data from the audio file.
-
-    Returns:
-        str: "High clarity" if the confidence score is greater than 0.8,
-             "Moderate clarity" if the confidence score is greater than 0.6,
-             "Low clarity" if the confidence score is less than or equal to 0.6,
-             "Unable to analyze clarity" if an error occurs during analysis.
-    """
-    recognizer = sr.Recognizer()
-    try:
-        result = recognizer.recognize_google(audio_data, show_all=True)
-        if result:
-            clarity_score = result.get("alternative")[0].get("confidence")
-            if clarity_score > 0.8:
-                return "High clarity"
-            elif clarity_score > 0.6:
-                return "Moderate clarity"
-            else:
-                return "Low clarity"
-    except Exception as e:
-        print(f"Error analyzing clarity: {e}")
-        return "Unable to analyze clarity"
-
-def analyze_volume_energy(audio_path) -> str:
+def analyze_volume_energy(rms_dbfs) -> str:
     """
     Analyzes the volume and energy of the audio based on the RMS (Root Mean Square) values.
 
+    Only the windows above VOICE_GATE_DBFS are averaged, the pauses sit at the SILENCE_DBFS
+    floor and would drag the average of any recording with pauses down.
+
     Args:
-        audio_path (str): The path to the audio file.
+        rms_dbfs (np.ndarray): The RMS volume envelope in dBFS, from rms_envelope.
 
     Returns:
-        str: "High volume and energy" if the average RMS value is greater than -10,
-             "Moderate volume and energy" if the average RMS value is greater than -20,
+        str: "High volume and energy" if the average voiced RMS value is greater than -10 dBFS,
+             "Moderate volume and energy" if the average voiced RMS value is greater than -20 dBFS,
              "Low volume and energy" otherwise.
     """
-    audio = AudioSegment.from_file(audio_path, format="wav")
-    rms_values = [chunk.rms for chunk in audio[::100]]
-    avg_rms = sum(rms_values) / len(rms_values)
+    rms_dbfs = np.asarray(rms_dbfs)
+    voiced = rms_dbfs[rms_dbfs > VOICE_GATE_DBFS]
+    if len(voiced) == 0:
+        return "Low volume and energy"
+    avg_rms = float(np.mean(voiced))
     if avg_rms > -10:
         return "High volume and energy"
     elif avg_rms > -20:
@@ -357,54 +648,32 @@ def analyze_volume_energy(audio_path) -> str:
     else:
         return "Low volume and energy"
 
-def pitch_and_tone_graph(audio_path, save_dir):
-    """
-    Plots the pitch and tone variations over time.
-
-    Args:
-        audio_path (str): The path to the audio file.
-    Returns:
-        str: Path to the saved PNG file containing the graph.
-    """
-    sound = parselmouth.Sound(audio_path)
-    pitch = sound.to_pitch()
-    pitch_values = pitch.selected_array['frequency']
-    time_values = pitch.xs()
-
-    # Create plot
-    tone_fig = go.Figure()
-    tone_fig.add_trace(go.Scatter(x=time_values, y=pitch_values, mode='lines', name='Pitch', line=dict(color='#ba451a')))
-    tone_fig.update_layout(title='Pitch Variation Over Time', xaxis_title='Time (s)', yaxis_title='Pitch (Hz)', plot_bgcolor='#ffeed1')
-
-    # Save plot as PNG
-    pitch_png_path = f"{save_dir}/pitch_variation.png"
-    tone_fig.write_image(pitch_png_path)
-
-    return pitch_png_path
-
-def volume_energy_graph(audio_path, save_dir):
+def save_series(context, speech, save_dir):
     """
-    Plots the volume and energy variations over time.
+    Saves the pitch, volume and pace series for the report charts, which are drawn as vector paths
+    from the arrays instead of being rasterised here.
 
     Args:
-        audio_path (str): The path to the audio file.
+        context (AudioContext): The audio of the job.
+        speech (dict): The timeline summary from summarise.
+        save_dir (str): The directory the series are saved to.
     Returns:
-        str: Path to the saved PNG file containing the graph.
+        str: Path to the saved .npz file.
     """
-    audio = AudioSegment.from_file(audio_path, format="wav")
-    rms_values = [chunk.rms for chunk in audio[::100]]
-    time_values = np.linspace(0, audio.duration_seconds, len(rms_values))
-
-    # Create plot
-    volume_fig = go.Figure()
-    volume_fig.add_trace(go.Bar(x=time_values, y=rms_values, name='Volume', marker_color='chocolate', opacity=1))
-    volume_fig.update_layout(title='Volume Variation', xaxis_title='Time (s)', yaxis_title='Volume (RMS)', plot_bgcolor='#ffeed1')
-
-    # Save plot as PNG
-    vol_png_path =  f"{save_dir}/volume_variation.png"
-    volume_fig.write_image(vol_png_path)
-
-    return vol_png_path
+    pitch_times, pitch = context.pitch
+    volume_times, volume = context.volume
+    series_path = f"{save_dir}/{SERIES_FILE}"
+    pace = np.array(speech["words_per_minute"])
+    np.savez(
+        series_path,
+        pitch_times=pitch_times,
+        pitch=pitch,
+        volume_times=volume_times,
+        volume=volume,
+        pace_times=np.arange(len(pace)) * speech["bucket"],
+        pace=pace,
+    )
+    return series_path
 
 if __name__ == "__main__":
     # Example usage
@@ -415,4 +684,4 @@ if __name__ == "__main__":
     extract_audio_from_video(video_path, output_audio_path)
 
     # Analyze audio features
-    analyse(output_audio_path)
\ No newline at end of file
+    analyse(output_audio_path, transcribe_timeline(output_audio_path), ".")
\ No newline at end of file
@@ -0,0 +1,117 @@
+from dataclasses import dataclass, field
+
+FILLER_WORDS = {"um", "umm", "uh", "uhh", "er", "erm", "ah", "hmm", "like", "basically", "actually", "literally"}
+
+
+@dataclass
+class Segment:
+    start: float
+    end: float
+    text: str
+
+    @property
+    def words(self) -> list:
+        return self.text.split()
+
+
+@dataclass
+class Timeline:
+    """
+    The transcript of a job as timed segments, with the pauses between them.
+
+    Segments are the speech spans the transcription stage recognised one at a time, so their
+    boundaries are real timestamps. Words inside a segment are spread evenly over it. Spans the
+    recogniser could not be reached for are kept in failed, their time is not counted by the
+    speech rates.
+    """
+
+    duration: float
+    segments: list = field(default_factory=list)
+    pauses: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failed)
+
+    @property
+    def untranscribed(self) -> float:
+        """Seconds of speech in the failed spans."""
+        return sum(end - start for start, end in self.failed)
+
+    @property
+    def text(self) -> str:
+        return " ".join(segment.text for segment in self.segments if segment.text)
+
+    def to_dict(self) -> dict:
+        return {
+            "duration": self.duration,
+            "segments": [[s.start, s.end, s.text] for s in self.segments],
+            "pauses": [list(pause) for pause in self.pauses],
+            "failed": [list(span) for span in self.failed],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Timeline":
+        return cls(
+            duration=data["duration"],
+            segments=[Segment(start, end, text) for start, end, text in data["segments"]],
+            pauses=[tuple(pause) for pause in data["pauses"]],
+            failed=[tuple(span) for span in data.get("failed", [])],
+        )
+
+
+def summarise(timeline: Timeline, bucket: float = 60.0) -> dict:
+    """
+    Computes the time resolved speech metrics of a timeline in one pass over its words and pauses.
+
+    Args:
+        timeline: The timeline of the job.
+        bucket: Seconds per bucket of the series, a minute by default.
+
+    Returns:
+        dict: The word and filler counts, the speech rate in words per minute, the filler density
+        in fillers per 100 words, and per bucket series of words, fillers, pauses and transcribed
+        seconds. The rates are over the transcribed time, without the failed spans.
+    """
+    buckets = max(int(timeline.duration // bucket) + 1, 1)
+    words_per_bucket = [0] * buckets
+    fillers_per_bucket = [0] * buckets
+    pauses_per_bucket = [0] * buckets
+
+    words = fillers = 0
+    for segment in timeline.segments:
+        segment_words = segment.words
+        step = (segment.end - segment.start) / max(len(segment_words), 1)
+        for i, word in enumerate(segment_words):
+            index = min(int((segment.start + (i + 0.5) * step) // bucket), buckets - 1)
+            words_per_bucket[index] += 1
+            words += 1
+            if word.lower().strip(".,!?") in FILLER_WORDS:
+                fillers_per_bucket[index] += 1
+                fillers += 1
+
+    for start, end in timeline.pauses:
+        pauses_per_bucket[min(int(start // bucket), buckets - 1)] += 1
+
+    # the last bucket is usually partial, rates over it are scaled to its real length
+    bucket_lengths = [bucket] * (buckets - 1) + [timeline.duration - bucket * (buckets - 1) or bucket]
+    transcribed = list(bucket_lengths)
+    for start, end in timeline.failed:
+        for index in range(min(int(start // bucket), buckets - 1), min(int(end // bucket), buckets - 1) + 1):
+            transcribed[index] -= max(min(end, (index + 1) * bucket) - max(start, index * bucket), 0)
+    transcribed = [max(length, 0.0) for length in transcribed]
+    seconds = timeline.duration - timeline.untranscribed
+    return {
+        "words": words,
+        "fillers": fillers,
+        "speech_rate": words / (seconds / 60) if seconds > 0 else 0.0,
+        "filler_density": 100 * fillers / words if words else 0.0,
+        "bucket": bucket,
+        "words_per_minute": [
+            60 * count / length if length > 0 else 0.0 for count, length in zip(words_per_bucket, transcribed)
+        ],
+        "fillers_per_bucket": fillers_per_bucket,
+        "pauses_per_bucket": pauses_per_bucket,
+        "transcribed_per_bucket": transcribed,
+    }
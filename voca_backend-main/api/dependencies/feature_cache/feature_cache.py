@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+# Features of a recording are cached under the SHA-256 of the uploaded file, one directory per
+# recording with a JSON file per stage output and .npz files for arrays. Reading or writing an
+# entry touches its directory, eviction removes the least recently used directories first. A
+# corrupt or unreadable file is dropped and read as a miss, the cache never fails a job.
+
+
+def content_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_dir(root: str, key: str) -> Path:
+    return Path(root) / key
+
+
+def _touch(root: str, key: str):
+    os.utime(entry_dir(root, key))
+
+
+def _drop(path: Path, error: Exception):
+    logging.error(f"Dropping unreadable cache file {path}: {error}")
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def _write_atomic(path: Path, write):
+    # concurrent stages of one job write to the same entry, readers never see a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load(root: str, key: str, name: str) -> Optional[dict]:
+    """
+    Reads a cached stage output.
+
+    Args:
+        root: The cache directory.
+        key: The content hash of the recording.
+        name: The name of the stage output.
+
+    Returns:
+        dict: The cached output.
+        None: If nothing is cached, or the cached file can not be read.
+    """
+    path = entry_dir(root, key) / f"{name}.json"
+    if not path.exists():
+        return None
+    try:
+        with open(path) as file:
+            data = json.load(file)
+        _touch(root, key)
+    except (OSError, ValueError) as e:
+        _drop(path, e)
+        return None
+    return data
+
+
+def store(root: str, key: str, name: str, data: dict):
+    """Caches a stage output as JSON."""
+    _write_atomic(entry_dir(root, key) / f"{name}.json", lambda file: file.write(json.dumps(data).encode("utf-8")))
+    _touch(root, key)
+
+
+def load_arrays(root: str, key: str, name: str, destination: str) -> bool:
+    """
+    Copies a cached .npz file to destination.
+
+    Returns:
+        bool: False if nothing is cached, or the cached file can not be read.
+    """
+    path = entry_dir(root, key) / f"{name}.npz"
+    if not path.exists():
+        return False
+    try:
+        shutil.copyfile(path, destination)
+        _touch(root, key)
+    except OSError as e:
+        _drop(path, e)
+        return False
+    return True
+
+
+def store_arrays(root: str, key: str, name: str, source: str):
+    """Caches the .npz file at source."""
+    with open(source, "rb") as src:
+        _write_atomic(entry_dir(root, key) / f"{name}.npz", lambda file: shutil.copyfileobj(src, file))
+    _touch(root, key)
+
+
+def _size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+
+def evict(root: str, max_bytes: int) -> list:
+    """
+    Removes the least recently used entries until the cache is at most max_bytes.
+
+    Returns:
+        list: The keys of the removed entries.
+    """
+    if not os.path.isdir(root):
+        return []
+    entries = sorted((p for p in Path(root).iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    sizes = {p: _size(p) for p in entries}
+    total = sum(sizes.values())
+    removed = []
+    for path in entries:
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= sizes[path]
+        removed.append(path.name)
+    return removed
@@ -1,6 +1,15 @@
-from api.dependencies.geminiAPI.gemini_exceptions import KeyNotFoundError
-from api.dependencies.geminiAPI.gemini_prompt import build_prompt
-
+from api.dependencies.geminiAPI.gemini_exceptions import KeyNotFoundError, ReportValidationError
+from api.dependencies.geminiAPI.gemini_prompt import (
+    DEFAULT_MAX_CHUNKS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_TOKEN_BUDGET,
+    REPORT_SCHEMA,
+    build_prompts,
+)
+from api.dependencies.geminiAPI.gemini_report import GeminiReport, merge_reports, parse_report
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import yaml
 import google.api_core.exceptions as googleexceptions
 import google.generativeai as genai
@@ -58,28 +67,98 @@ def initialize_model(api_key: str) -> genai.GenerativeModel:
     return model
 
 
-def get_report(context: str, content: str, model: genai.GenerativeModel) -> str:
+@lru_cache(maxsize=None)
+def get_model(api_key_path: str = API_KEY_PATH) -> genai.GenerativeModel:
+    """
+    Returns the model for the key in api_key_path, configured once per process.
+
+    Args:
+        api_key_path: Path to the YAML file containing the API key.
+
+    Returns:
+        The initialized Generative AI model object.
+    """
+
+    return initialize_model(get_key(api_key_path))
+
+
+def generate_report(prompt: str, model: genai.GenerativeModel) -> GeminiReport:
+    """
+    Sends a single prompt to the model and validates the JSON response.
+
+    Args:
+        prompt: The full prompt.
+        model: The initialized Generative AI model object.
+
+    Returns:
+        GeminiReport: The validated report.
+
+    Raises:
+        ReportValidationError: If the response is empty or does not match REPORT_SCHEMA.
+    """
+
+    generation_config = genai.GenerationConfig(
+        response_mime_type="application/json",
+        response_schema=REPORT_SCHEMA,
+    )
+    response = model.generate_content(prompt, generation_config=generation_config)
+
+    answer: str = response.text
+    if not answer:
+        raise ReportValidationError("Empty response")
+    return parse_report(answer)
+
+
+def get_report(
+    context: str,
+    content: str,
+    model: genai.GenerativeModel,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_chunks: int = DEFAULT_MAX_CHUNKS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> GeminiReport:
     """
     Generates a report based on the provided context and content using the model.
 
+    The model is asked for a JSON response matching REPORT_SCHEMA, which is validated
+    into a GeminiReport so callers can read the fields directly. Content that does not
+    fit the token budget is split into chunks which are reported on concurrently and merged.
+    A chunk that fails is left out of the merge, and a report missing failed chunks is
+    marked as partial.
+
     Args:
         context: The context information to be used for report generation.
         content: The main content to be analyzed in the report.
         model: The initialized Generative AI model object.
+        token_budget: The maximum estimated tokens for a single prompt.
+        max_chunks: The maximum number of prompts for one report.
+        max_workers: The maximum number of prompts sent at once.
     Returns:
-        dict: 
+        GeminiReport: The validated report, or an empty report carrying the reason
+        in its summary if no part of the report could be generated.
     """
 
     try:
-        prompt: str = build_prompt(context, content)
-        response = model.generate_content(prompt)
-
-        answer: str = response.text
-        if answer:
-            return answer
-        else:
-            return "Can not generate report"
-    except googleexceptions.InternalServerError:
-        return f"Can not generate report for context {context}"
+        prompts = build_prompts(context, content, token_budget, max_chunks)
     except Exception as e:
         print(f"Error occured: {e}")
+        return GeminiReport.unavailable("Can not generate report")
+
+    reports, error = [], None
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as executor:
+        futures = [(executor.submit(generate_report, prompt, model), weight) for prompt, weight in prompts]
+        for future, weight in futures:
+            try:
+                reports.append((future.result(), weight))
+            except Exception as e:
+                print(f"Report for a part of the transcript failed: {e}")
+                error = e
+
+    if not reports:
+        if isinstance(error, googleexceptions.InternalServerError):
+            return GeminiReport.unavailable(f"Can not generate report for context {context}")
+        return GeminiReport.unavailable("Can not generate report")
+
+    report = merge_reports(reports)
+    report.reported_parts, report.total_parts = len(reports), len(prompts)
+    return report
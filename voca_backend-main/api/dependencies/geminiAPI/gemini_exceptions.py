@@ -1,4 +1,8 @@
 class KeyNotFoundError(Exception):
     def __init__(self, message):
         super().__init__(message)
-        
\ No newline at end of file
+
+
+class ReportValidationError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
@@ -7,67 +7,177 @@ professionalism(the way of speaking and tone)
 
 """
 
+import math
+import re
+
+# rough estimate used for budgeting, Gemini averages about 4 characters per token for english text
+CHARS_PER_TOKEN: int = 4
+DEFAULT_TOKEN_BUDGET: int = 8000
+DEFAULT_MAX_CHUNKS: int = 8
+DEFAULT_MAX_WORKERS: int = 4
+
 GENERIC_REPORT_FORMAT: str = \
 """
 imagine you are an interviewer and you are given a context and content and on the bases of that you have to provide a professional feedback in second person
-on using the follow parameters and in the given report format strictly
+on using the follow parameters and respond strictly with a JSON object matching the given response schema
 
 Parameters:
-1) Grammatical errors (if any): Highlight the mistakes in bullet points and provide the correct answer.
-2) What is the relevance of the content to the context: Provide an estimated percentage and highlight the non-relevant parts using bullet points.
-3) Also, check if the same sentence is repeated verbatim or molded in lieu of the content; call it repetition.
-4) Vocabulary of the speaker.
-5) Additional points that should contain things that can be improved.
+1) grammatical_errors: List the mistakes, each with the error and the corrected sentence.
+   (if the same error is repeated, do not add it here again)
+2) relevance: Provide an estimated percentage (0-100) of how relevant the content is to the context and list the non-relevant parts,
+   each with an explanation on why it is not relevant.
+3) repetition: List the sentences that are repeated verbatim or molded in lieu of the content.
+4) vocabulary: How good the vocabulary of the speaker was, how it can be improved and what the speaker could have used instead.
+5) strengths and weaknesses: Analyse the way the content is spoken. Weaknesses should carry an encouraging feedback.
+6) summary: A paragraph containing a brief summary of the content and the report.
+7) grade: A score on a scale of 1-10.
 
 Expectations:
-1) If the content does not match with the context, analyze every parameter except the second. Provide relevant points as bullet points.
-2) Instead of saying None, say There are no (field name) (in all parameters)
-
-Sample report:
-**Grammatical Errors**
-    - Error 1
-    - Error 2
-    (if the same error is repeated, do not add it here again or indicate they were repeated)
-
----
-
-**Relevance**
-    - *Relevance percentage:* Value
-    - *Non-relevant parts:*
-        - Part 1 with explanation on why it is not relevent
-        (if there are no non relevent parts skip this field)
-
----
-
-**Repetition**
-    - Repeated line with the line repeated in lieu to the context
-
----
-
-**Vocabulary**
-    - How good the vocabulary of the speaker was.
-    - How it can be improved.
-    - What could the speaker have used instead.
-
----
-
-(containing the strengths and weaknessess of the speaker, analyse based of the way it is spoken, do not show this heading)
-**Strengths**
-    - strength 1
-**Weaknessess**
-    - weakness 1 (provide an encouraging feedback)
-
----
-
-Summary:
-    A paragraph containing a brief summary of the content and the report.
-
----
+1) If the content does not match with the context, analyze every parameter except relevance and set its percentage to 0.
+2) If a parameter has nothing to report, return an empty list for it instead of writing None.
+"""
 
-Grade:
-    give a score on a scale of 1-10 
+REPORT_SCHEMA: dict = {
+    "type": "object",
+    "properties": {
+        "grammatical_errors": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string"},
+                    "correction": {"type": "string"},
+                },
+                "required": ["error", "correction"],
+            },
+        },
+        "relevance": {
+            "type": "object",
+            "properties": {
+                "percentage": {"type": "integer"},
+                "non_relevant_parts": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["percentage", "non_relevant_parts"],
+        },
+        "repetition": {"type": "array", "items": {"type": "string"}},
+        "vocabulary": {"type": "array", "items": {"type": "string"}},
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "weaknesses": {"type": "array", "items": {"type": "string"}},
+        "summary": {"type": "string"},
+        "grade": {"type": "integer"},
+    },
+    "required": [
+        "grammatical_errors",
+        "relevance",
+        "repetition",
+        "vocabulary",
+        "strengths",
+        "weaknesses",
+        "summary",
+        "grade",
+    ],
+}
+
+
+CHUNK_NOTE_FORMAT: str = \
+"""
+The content below is part {index} of {total} of a longer speech. Report only on this part, the parts are merged afterwards.
 """
 
 
 def build_prompt(context: str, content: str, report_fomat: str = GENERIC_REPORT_FORMAT) -> str:
     return f"Context: \n{context}\n\nPrompt: {report_fomat}Content:\n{content}"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text without calling the model.
+
+    Args:
+        text: The text to estimate.
+
+    Returns:
+        The estimated token count.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_transcript(content: str, max_tokens: int) -> list[str]:
+    """
+    Splits a transcript into chunks of at most max_tokens estimated tokens.
+
+    Chunks break on sentence boundaries where the transcript has punctuation and on
+    word boundaries otherwise.
+
+    Args:
+        content: The transcript to split.
+        max_tokens: The token budget for a single chunk.
+
+    Returns:
+        The list of chunks, in order.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for sentence in re.split(r"(?<=[.!?])\s+", content.strip()):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+        else:
+            pieces.extend(sentence.split())
+
+    chunks, current = [], ""
+    for piece in pieces:
+        candidate = f"{current} {piece}" if current else piece
+        if len(candidate) > max_chars and current:
+            chunks.append(current)
+            candidate = piece
+        current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_prompts(
+    context: str,
+    content: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_chunks: int = DEFAULT_MAX_CHUNKS,
+) -> list[tuple[str, int]]:
+    """
+    Builds the prompts for a transcript, keeping each prompt within the token budget.
+
+    Transcripts that fit are sent as a single prompt. Longer transcripts are chunked, and
+    if that needs more than max_chunks prompts adjacent chunks are merged into max_chunks
+    prompts, so the cost per report stays capped and every part of the transcript is
+    reported on. The merged prompts exceed the budget by the merged share of the chunks.
+
+    Args:
+        context: The context information to be used for report generation.
+        content: The transcript to be analyzed.
+        token_budget: The maximum estimated tokens for a single prompt, up to max_chunks prompts.
+        max_chunks: The maximum number of prompts for one transcript.
+
+    Returns:
+        A list of (prompt, weight) pairs where weight is the length of the content in the prompt.
+
+    Raises:
+        ValueError: If the budget does not leave room for any content.
+    """
+    if estimate_tokens(build_prompt(context, content)) <= token_budget:
+        return [(build_prompt(context, content), len(content))]
+
+    overhead = estimate_tokens(build_prompt(context, "") + CHUNK_NOTE_FORMAT.format(index=max_chunks, total=max_chunks))
+    if overhead >= token_budget:
+        raise ValueError(f"Token budget {token_budget} is smaller than the prompt overhead {overhead}")
+
+    chunks = chunk_transcript(content, token_budget - overhead)
+    if len(chunks) > max_chunks:
+        bounds = [round(i * len(chunks) / max_chunks) for i in range(max_chunks + 1)]
+        chunks = [" ".join(chunks[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+    return [
+        (
+            build_prompt(context, chunk, CHUNK_NOTE_FORMAT.format(index=i, total=len(chunks)) + GENERIC_REPORT_FORMAT),
+            len(chunk),
+        )
+        for i, chunk in enumerate(chunks, start=1)
+    ]
@@ -0,0 +1,191 @@
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from api.dependencies.geminiAPI.gemini_exceptions import ReportValidationError
+
+
+@dataclass
+class GrammarError:
+    error: str
+    correction: str
+
+
+@dataclass
+class Relevance:
+    percentage: int
+    non_relevant_parts: list[str] = field(default_factory=list)
+
+
+@dataclass
+class GeminiReport:
+    grammatical_errors: list[GrammarError]
+    relevance: Relevance
+    repetition: list[str]
+    vocabulary: list[str]
+    strengths: list[str]
+    weaknesses: list[str]
+    summary: str
+    grade: Optional[int]
+    # the parts of the transcript the report covers, fewer than total_parts when parts were
+    # dropped by the chunk cap or failed to generate
+    reported_parts: int = 1
+    total_parts: int = 1
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GeminiReport":
+        """
+        Validates a decoded report and builds the typed report object.
+
+        Args:
+            data: The decoded JSON object returned by the model.
+
+        Returns:
+            The validated report.
+
+        Raises:
+            ReportValidationError: If a field is missing or has the wrong type or range.
+        """
+
+        if not isinstance(data, dict):
+            raise ReportValidationError("Report must be a JSON object")
+
+        relevance: dict = _require(data, "relevance", dict)
+        percentage = _require(relevance, "percentage", (int, float))
+        if not 0 <= percentage <= 100:
+            raise ReportValidationError(f"Relevance percentage out of range: {percentage}")
+
+        grade = data.get("grade")
+        if grade is not None:
+            if not isinstance(grade, (int, float)) or isinstance(grade, bool):
+                raise ReportValidationError("Field 'grade' must be a number")
+            if not 1 <= grade <= 10:
+                raise ReportValidationError(f"Grade out of range: {grade}")
+            grade = int(round(grade))
+
+        grammatical_errors = []
+        for item in _require(data, "grammatical_errors", list):
+            if not isinstance(item, dict):
+                raise ReportValidationError("Grammatical errors must be objects")
+            grammatical_errors.append(
+                GrammarError(
+                    error=_require(item, "error", str),
+                    correction=_require(item, "correction", str),
+                )
+            )
+
+        return cls(
+            grammatical_errors=grammatical_errors,
+            relevance=Relevance(
+                percentage=int(round(percentage)),
+                non_relevant_parts=_string_list(relevance, "non_relevant_parts"),
+            ),
+            repetition=_string_list(data, "repetition"),
+            vocabulary=_string_list(data, "vocabulary"),
+            strengths=_string_list(data, "strengths"),
+            weaknesses=_string_list(data, "weaknesses"),
+            summary=_require(data, "summary", str),
+            grade=grade,
+            reported_parts=int(data.get("reported_parts", 1)),
+            total_parts=int(data.get("total_parts", 1)),
+        )
+
+    @classmethod
+    def unavailable(cls, reason: str) -> "GeminiReport":
+        """Returns an empty report carrying the reason in its summary."""
+        return cls(
+            grammatical_errors=[],
+            relevance=Relevance(percentage=0),
+            repetition=[],
+            vocabulary=[],
+            strengths=[],
+            weaknesses=[],
+            summary=reason,
+            grade=None,
+        )
+
+    @property
+    def partial(self) -> bool:
+        return self.reported_parts < self.total_parts
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def parse_report(answer: str) -> GeminiReport:
+    """
+    Decodes the JSON text returned by the model into a GeminiReport.
+
+    Args:
+        answer: The raw response text.
+
+    Returns:
+        The validated report.
+
+    Raises:
+        ReportValidationError: If the text is not valid JSON or does not match the schema.
+    """
+
+    try:
+        data = json.loads(answer)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ReportValidationError(f"Report is not valid JSON: {e}")
+    return GeminiReport.from_dict(data)
+
+
+def merge_reports(reports: list[tuple[GeminiReport, int]]) -> GeminiReport:
+    """
+    Merges the reports generated for the chunks of one transcript.
+
+    List fields are concatenated without duplicates, the relevance percentage and grade
+    are averaged weighted by the length of each chunk and the summaries are joined in order.
+
+    Args:
+        reports: (report, weight) pairs in transcript order.
+
+    Returns:
+        The merged report.
+    """
+
+    if len(reports) == 1:
+        return reports[0][0]
+
+    total_weight = sum(weight for _, weight in reports) or 1
+    graded = [(report.grade, weight) for report, weight in reports if report.grade is not None]
+    graded_weight = sum(weight for _, weight in graded)
+
+    return GeminiReport(
+        grammatical_errors=_unique(e for report, _ in reports for e in report.grammatical_errors),
+        relevance=Relevance(
+            percentage=round(sum(r.relevance.percentage * w for r, w in reports) / total_weight),
+            non_relevant_parts=_unique(p for r, _ in reports for p in r.relevance.non_relevant_parts),
+        ),
+        repetition=_unique(item for report, _ in reports for item in report.repetition),
+        vocabulary=_unique(item for report, _ in reports for item in report.vocabulary),
+        strengths=_unique(item for report, _ in reports for item in report.strengths),
+        weaknesses=_unique(item for report, _ in reports for item in report.weaknesses),
+        summary=" ".join(report.summary for report, _ in reports),
+        grade=round(sum(g * w for g, w in graded) / graded_weight) if graded_weight else None,
+    )
+
+
+def _unique(items) -> list:
+    unique = []
+    for item in items:
+        if item not in unique:
+            unique.append(item)
+    return unique
+
+
+def _require(data: dict, key: str, expected_type):
+    value = data.get(key)
+    if not isinstance(value, expected_type) or isinstance(value, bool):
+        raise ReportValidationError(f"Field '{key}' is missing or has the wrong type")
+    return value
+
+
+def _string_list(data: dict, key: str) -> list[str]:
+    values = data.get(key, [])
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise ReportValidationError(f"Field '{key}' must be a list of strings")
+    return values
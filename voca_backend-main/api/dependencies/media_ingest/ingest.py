@@ -0,0 +1,139 @@
+import queue
+import threading
+import wave
+
+# Demuxes a recording once with PyAV (FFmpeg) and fans the decoded audio and the sampled video
+# frames out to their consumers through bounded queues. The audio is written to a WAV file while
+# the frames are analysed, instead of moviepy and OpenCV each reading and decoding the file. The
+# queues bound the memory held, a slow consumer blocks the decoder instead of buffering the video.
+
+# the rate moviepy wrote the audio at, which the audio analysis is tuned for
+AUDIO_SAMPLE_RATE = 44100
+FRAME_QUEUE_SIZE = 16
+AUDIO_QUEUE_SIZE = 64
+# seconds between checks that a consumer is still running while its queue is full
+PUT_TIMEOUT = 0.1
+
+_END = object()
+
+
+class Consumer(threading.Thread):
+    """Runs target on the items put into a bounded queue, in its own thread."""
+
+    def __init__(self, target, maxsize: int):
+        super().__init__(daemon=True)
+        self.queue = queue.Queue(maxsize)
+        self.target = target
+        self.value = None
+        self.error = None
+
+    def items(self):
+        while (item := self.queue.get()) is not _END:
+            yield item
+
+    def run(self):
+        try:
+            self.value = self.target(self.items())
+        except BaseException as e:
+            self.error = e
+
+    def put(self, item):
+        # a consumer that stopped early never empties its queue, its items are dropped
+        while self.is_alive():
+            try:
+                self.queue.put(item, timeout=PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        self.put(_END)
+        self.join()
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def wav_writer(audio_path: str, channels: int, sample_rate: int):
+    """Returns a consumer target writing 16 bit PCM chunks to a WAV file."""
+
+    def write(chunks) -> str:
+        with wave.open(audio_path, "wb") as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            for chunk in chunks:
+                wf.writeframes(chunk)
+        return audio_path
+
+    return write
+
+
+def ingest(video_path: str, audio_path: str, analyse_frames=None, frame_step: int = 2):
+    """
+    Reads a recording once, writing its audio to a WAV file and handing every frame_step-th
+    video frame to analyse_frames, both while the file is being decoded.
+
+    Args:
+        video_path: The recording.
+        audio_path: The WAV file to write, 16 bit PCM at AUDIO_SAMPLE_RATE, mono or stereo
+            like the source.
+        analyse_frames: Called with an iterable of (index, timestamp, BGR frame), see
+            video.analyse_frames. None skips decoding the video stream.
+        frame_step: Every frame_step-th frame is handed to analyse_frames.
+
+    Returns:
+        The return value of analyse_frames, None if it is not given.
+    """
+    # PyAV is only needed by deployments with MEDIA_INGEST set to "single"
+    import av
+
+    with av.open(video_path) as container:
+        if not container.streams.audio:
+            raise ValueError(f"No audio stream in {video_path}")
+        audio_stream = container.streams.audio[0]
+        channels = 1 if audio_stream.codec_context.channels == 1 else 2
+        resampler = av.AudioResampler(
+            format="s16", layout="mono" if channels == 1 else "stereo", rate=AUDIO_SAMPLE_RATE
+        )
+        audio_consumer = Consumer(wav_writer(audio_path, channels, AUDIO_SAMPLE_RATE), AUDIO_QUEUE_SIZE)
+        consumers = [audio_consumer]
+
+        video_stream = None
+        if analyse_frames is not None and container.streams.video:
+            video_stream = container.streams.video[0]
+            # frame and slice threads, as many as FFmpeg picks for the machine
+            video_stream.thread_type = "AUTO"
+            fps = float(video_stream.average_rate or 0)
+            video_consumer = Consumer(analyse_frames, FRAME_QUEUE_SIZE)
+            consumers.append(video_consumer)
+
+        for consumer in consumers:
+            consumer.start()
+        try:
+            index = 0
+            streams = [audio_stream] + ([video_stream] if video_stream is not None else [])
+            for packet in container.demux(streams):
+                for frame in packet.decode():
+                    if packet.stream.index == audio_stream.index:
+                        for chunk in resampler.resample(frame):
+                            audio_consumer.put(chunk.to_ndarray().tobytes())
+                        continue
+                    if index % frame_step == 0:
+                        timestamp = frame.time if frame.time is not None else (index / fps if fps else 0.0)
+                        video_consumer.put((index, timestamp, frame.to_ndarray(format="bgr24")))
+                    index += 1
+            for chunk in resampler.resample(None):
+                audio_consumer.put(chunk.to_ndarray().tobytes())
+        finally:
+            for consumer in consumers:
+                consumer.close()
+
+    audio_consumer.result()
+    if video_stream is None:
+        if analyse_frames is not None:
+            raise ValueError(f"No video stream in {video_path}")
+        return None
+    return video_consumer.result()
@@ -1,6 +1,8 @@
+import os
+
 import redis
 
-def connect_to_redis(host='localhost', port=6379, db=0):
+def connect_to_redis(host=os.getenv("REDIS_HOST", "localhost"), port=int(os.getenv("REDIS_PORT", 6379)), db=0):
     """Connect to Redis and return a Redis client."""
     return redis.Redis(host=host, port=port, db=db)
 
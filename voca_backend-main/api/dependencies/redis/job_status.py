@@ -0,0 +1,111 @@
+from typing import Optional
+
+# pipeline stages in order, with the progress (in percent) reported when a stage starts
+STAGES = {
+    "QUEUED": 0,
+    "INGESTING": 5,
+    "EXTRACTING_AUDIO": 5,
+    "TRANSCRIBING": 15,
+    "ANALYSING_VIDEO": 15,
+    "ANALYSING_AUDIO": 50,
+    "GENERATING_REPORT": 70,
+    "RENDERING": 90,
+    "SUCCESS": 100,
+    "FAILURE": 100,
+}
+STATUS_TTL = 60 * 60 * 24  # status entries expire a day after their last update
+
+# deletes the lease only if it is still held by the given task
+RELEASE_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def status_key(video_id: str) -> str:
+    return f"job-status:{video_id}"
+
+
+def lease_key(video_id: str) -> str:
+    return f"job-lease:{video_id}"
+
+
+def set_status(r, video_id: str, stage: str, task_id: Optional[str] = None, error: Optional[str] = None) -> dict:
+    """
+    Records the current stage of a job in a Redis hash.
+
+    Args:
+        r: The Redis client.
+        video_id: The video the job is working on.
+        stage: One of STAGES.
+        task_id: The Celery task id of the job, stored once when the job is queued.
+        error: The error message for a failed job.
+
+    Returns:
+        dict: The fields that were written.
+    """
+    status = {"stage": stage, "progress": STAGES[stage]}
+    if task_id:
+        status["task_id"] = task_id
+    if error:
+        status["error"] = error
+
+    pipe = r.pipeline()
+    pipe.hset(status_key(video_id), mapping=status)
+    pipe.expire(status_key(video_id), STATUS_TTL)
+    pipe.execute()
+    return status
+
+
+def get_status(r, video_id: str) -> Optional[dict]:
+    """
+    Reads the status of a job.
+
+    Args:
+        r: The Redis client.
+        video_id: The video the job is working on.
+
+    Returns:
+        dict: The stage, progress, task id and error of the job.
+        None: If no job is known for the video.
+    """
+    raw = r.hgetall(status_key(video_id))
+    if not raw:
+        return None
+    status = {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
+    status["progress"] = int(status.get("progress", 0))
+    return status
+
+
+def acquire_lease(r, video_id: str, task_id: str, ttl: int) -> bool:
+    """
+    Claims the job for a video with SETNX so only one request queues it.
+
+    Args:
+        r: The Redis client.
+        video_id: The video the job is working on.
+        task_id: The Celery task id of the job claiming the lease.
+        ttl: Seconds after which an unreleased lease expires.
+
+    Returns:
+        bool: True if the lease was acquired, False if another job holds it.
+    """
+    return bool(r.set(lease_key(video_id), task_id, nx=True, ex=ttl))
+
+
+def lease_holder(r, video_id: str) -> Optional[str]:
+    """Returns the task id holding the lease for a video, if any."""
+    holder = r.get(lease_key(video_id))
+    return holder.decode("utf-8") if holder else None
+
+
+def release_lease(r, video_id: str, task_id: str) -> bool:
+    """
+    Releases the lease for a video if it is still held by task_id.
+
+    Returns:
+        bool: True if the lease was released.
+    """
+    return bool(r.eval(RELEASE_LEASE_SCRIPT, 1, lease_key(video_id), task_id))
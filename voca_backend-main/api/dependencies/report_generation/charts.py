@@ -0,0 +1,100 @@
+import numpy as np
+from reportlab.lib.units import inch
+
+# size the chart forms are drawn at, placements scale from it
+CHART_WIDTH = 2.55 * inch
+CHART_HEIGHT = 2.25 * inch
+MAX_POINTS = 400  # a chart is a couple of inches wide, more points are not visible
+
+
+def downsample(times: np.ndarray, values: np.ndarray, max_points: int = MAX_POINTS):
+    """
+    Reduces a series to at most max_points buckets, keeping the peak of each bucket.
+
+    Every sample lands in a bucket, the bucket sizes differ by at most one sample.
+
+    Args:
+        times: The time of every sample, in seconds.
+        values: The value of every sample.
+        max_points: The maximum number of points returned.
+
+    Returns:
+        tuple: (times, values) of the buckets.
+    """
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if len(values) <= max_points:
+        return times, values
+    starts = np.linspace(0, len(values), max_points, endpoint=False).astype(int)
+    return times[starts], np.maximum.reduceat(values, starts)
+
+
+def _frame(c, title: str, x_label: str, y_label: str, y_min: float, y_max: float, t_max: float):
+    c.setFillColor("#ffeed1")
+    c.setStrokeColor("black")
+    c.setLineWidth(0.5)
+    c.rect(0, 0, CHART_WIDTH, CHART_HEIGHT, fill=1)
+    c.setFillColor("black")
+    c.setFont("Helvetica-Bold", 7)
+    c.drawString(2, CHART_HEIGHT + 4, title)
+    c.setFont("Helvetica", 5)
+    c.drawString(2, -7, "0")
+    c.drawRightString(CHART_WIDTH, -7, f"{t_max:.0f} {x_label}")
+    c.drawString(2, CHART_HEIGHT - 7, f"{y_max:.0f} {y_label}")
+    c.drawString(2, 2, f"{y_min:.0f}")
+
+
+def _scale(times, values, y_min, y_max, t_max):
+    xs = times / (t_max or 1) * CHART_WIDTH
+    ys = (values - y_min) / ((y_max - y_min) or 1) * CHART_HEIGHT
+    return xs, ys
+
+
+def draw_line_chart(c, times, values, title: str, x_label: str, y_label: str, color: str):
+    """
+    Draws a series as a vector line chart with its origin at (0, 0) and size CHART_WIDTH x CHART_HEIGHT.
+
+    Samples with a value of 0 (unvoiced pitch frames) break the line instead of dropping to the axis.
+    """
+    t_max = float(times[-1]) if len(times) else 0.0
+    times, values = downsample(times, values)
+    voiced = values[values > 0]
+    y_min = float(voiced.min()) if len(voiced) else 0.0
+    y_max = float(voiced.max()) if len(voiced) else 1.0
+    _frame(c, title, x_label, y_label, y_min, y_max, t_max)
+
+    xs, ys = _scale(times, values, y_min, y_max, t_max)
+    path = c.beginPath()
+    pen_down = False
+    for x, y, value in zip(xs, ys, values):
+        if value <= 0:
+            pen_down = False
+        elif pen_down:
+            path.lineTo(x, y)
+        else:
+            path.moveTo(x, y)
+            pen_down = True
+    c.setStrokeColor(color)
+    c.setLineWidth(0.6)
+    c.drawPath(path, stroke=1, fill=0)
+
+
+def draw_bar_chart(c, times, values, title: str, x_label: str, y_label: str, color: str):
+    """
+    Draws a series as a vector bar chart with its origin at (0, 0) and size CHART_WIDTH x CHART_HEIGHT.
+
+    Bars rise from the minimum of the series, so negative (dBFS) values chart naturally.
+    """
+    t_max = float(times[-1]) if len(times) else 0.0
+    times, values = downsample(times, values)
+    y_min = float(values.min()) if len(values) else 0.0
+    y_max = float(values.max()) if len(values) else 1.0
+    _frame(c, title, x_label, y_label, y_min, y_max, t_max)
+
+    xs, ys = _scale(times, values, y_min, y_max, t_max)
+    bar_width = CHART_WIDTH / max(len(xs), 1)
+    path = c.beginPath()
+    for x, y in zip(xs, ys):
+        path.rect(min(x, CHART_WIDTH - bar_width), 0, bar_width, y)
+    c.setFillColor(color)
+    c.drawPath(path, stroke=0, fill=1)
@@ -0,0 +1,287 @@
+import os
+import textwrap
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from api.dependencies.geminiAPI.gemini_report import GeminiReport
+from api.dependencies.report_generation import charts
+
+STATICS_ROOT = Path("api/dependencies/report_statics")
+LOGO_PATH = str(STATICS_ROOT / "logo.jpg")
+
+HEADER_FORM = "page-header"
+
+# page coordinates after start_page, an inch in from the bottom left corner: the audio table
+# runs from under the charts down to above the page number at -0.7 inch
+AUDIO_TABLE_TOP = 4.4 * inch
+TABLE_BOTTOM = -0.4 * inch
+
+
+@lru_cache(maxsize=8)
+def _read_static_image(path: str, mtime: float) -> ImageReader:
+    # keyed on mtime so a changed file is decoded again, statics are decoded once per process
+    return ImageReader(path)
+
+
+def load_image(path: str) -> Optional[ImageReader]:
+    """
+    Returns the decoded image for a path, or None if the file does not exist.
+
+    Only the report statics are cached, the images of a job are read once and deleted with it.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    if Path(path).resolve().is_relative_to(STATICS_ROOT.resolve()):
+        return _read_static_image(str(path), os.path.getmtime(path))
+    return ImageReader(path)
+
+
+def load_series(path: str) -> Optional[dict]:
+    """
+    Returns the pitch and volume arrays saved by the audio analysis, or None if the file does not exist.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with np.load(path) as series:
+        return {key: series[key] for key in series.files}
+
+
+def register_chart(c: canvas.Canvas, name: str, draw, times, values, *args) -> bool:
+    """
+    Draws a chart once as vector paths into a form XObject so every placement is a reference.
+
+    Args:
+        c: The canvas.
+        name: The form name used by draw_chart.
+        draw: charts.draw_line_chart or charts.draw_bar_chart.
+        times: The time of every sample.
+        values: The value of every sample.
+        *args: The title, axis labels and colour passed to draw.
+
+    Returns:
+        bool: False if there is nothing to chart.
+    """
+    if times is None or len(times) == 0:
+        return False
+    # the box leaves room for the title above and the axis labels below the plot area
+    c.beginForm(name, lowerx=0, lowery=-10, upperx=charts.CHART_WIDTH, uppery=charts.CHART_HEIGHT + 14)
+    draw(c, times, values, *args)
+    c.endForm()
+    return True
+
+
+def register_header(c: canvas.Canvas, name: str, date: str, activity: str):
+    """
+    Draws the header shared by every page once into a form XObject.
+    """
+    # the form shares the page coordinates after start_page's translate, so its box is shifted with it
+    c.beginForm(HEADER_FORM, lowerx=-inch, lowery=-inch, upperx=letter[0] - inch, uppery=letter[1] - inch)
+    c.setFillColor("black")
+    c.setFont("Helvetica", 23)
+    c.drawString(1.55 * inch, 8.5 * inch, "Progression Report")
+    c.setFillColor("darkblue")
+    c.setFont("Helvetica", 12)
+    c.drawString(5.45 * inch, 9.6 * inch, f"Name: {name}")
+    c.drawString(5.45 * inch, 9.35 * inch, f"Date: {date}")
+    c.drawString(5.45 * inch, 9.1 * inch, f"Activity: {activity}")
+    c.setStrokeColor("black")
+    c.setLineWidth(1.3)
+    c.line(-0.55 * inch, 8.35 * inch, 7 * inch, 8.35 * inch)
+    logo = load_image(LOGO_PATH)
+    if logo is not None:
+        width, height = logo.getSize()
+        c.drawImage(logo, -1 * inch, 9.2 * inch, width=width, height=height)
+    c.endForm()
+
+
+def start_page(c: canvas.Canvas, section: str, page_number: Optional[int] = None):
+    """
+    Starts a page with the shared header, the section heading box and the page number.
+    """
+    c.translate(inch, inch)
+    c.doForm(HEADER_FORM)
+
+    c.setFillColor("grey")
+    c.setStrokeColor("black")
+    c.roundRect(-0.8 * inch, 7.6 * inch, 2 * inch, 0.4 * inch, 5, fill=1)
+    c.setFillColor("black")
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(-0.65 * inch, 7.73 * inch, section)
+
+    if page_number is not None:
+        c.setFont("Helvetica", 10)
+        c.drawString(2.7 * inch, -0.7 * inch, f"Page-{page_number}")
+
+
+def report_sections(report: GeminiReport) -> list:
+    """
+    Lays out the typed Gemini report as (heading, lines) pairs for the PDF.
+    """
+    relevance = [f"Relevance percentage: {report.relevance.percentage}%"]
+    relevance += [f"- {part}" for part in report.relevance.non_relevant_parts]
+    summary = [report.summary]
+    if report.partial:
+        summary.append(
+            f"This report covers {report.reported_parts} of {report.total_parts} parts of the transcript."
+        )
+    return [
+        (
+            "Grammatical Errors",
+            [f"- {e.error} -> {e.correction}" for e in report.grammatical_errors]
+            or ["There are no grammatical errors"],
+        ),
+        ("Relevance", relevance),
+        ("Repetition", [f"- {r}" for r in report.repetition] or ["There is no repetition"]),
+        ("Vocabulary", [f"- {v}" for v in report.vocabulary] or ["There are no vocabulary remarks"]),
+        ("Strengths", [f"- {s}" for s in report.strengths] or ["There are no strengths noted"]),
+        ("Weaknesses", [f"- {w}" for w in report.weaknesses] or ["There are no weaknesses noted"]),
+        ("Summary", summary),
+        ("Grade", [f"{report.grade}/10" if report.grade is not None else "Not graded"]),
+    ]
+
+
+def draw_gemini_report(c, report: GeminiReport, x_start, y_start, max_width, font_size):
+    y = y_start
+    for heading, lines in report_sections(report):
+        c.setFont("Helvetica-Bold", font_size)
+        c.drawString(x_start, y, "• " + heading)
+        y -= font_size * 1.2
+        y -= font_size * 0.3
+        for line in lines:
+            wrapped_lines = textwrap.wrap(line, width=80)
+            for wrapped_line in wrapped_lines:
+                c.setFont("Helvetica", font_size)
+                c.drawString(x_start, y, wrapped_line)
+                y -= font_size * 1.2
+            y -= font_size * 0.3
+
+
+def draw_table(c, table_data: list, x_start, y_start, col_width, row_height):
+    """
+    Draws the rows down from the row whose bottom is at y_start.
+
+    Returns:
+        The bottom of the last row.
+    """
+    for i, row in enumerate(table_data):
+        for j, cell in enumerate(row):
+            c.rect(x_start + j * col_width, y_start - i * row_height, col_width, row_height)
+            c.drawString(x_start + j * col_width + 5, y_start - i * row_height + 10, cell)
+    return y_start - (len(table_data) - 1) * row_height
+
+
+def fit_row_height(rows: int, top, bottom, row_height):
+    """The row height, at most row_height, that fits rows between top and bottom."""
+    return min(row_height, (top - bottom) / max(rows, 1))
+
+
+def draw_graph(c, name: str, registered: bool, x, y, width, height):
+    if registered:
+        c.saveState()
+        c.translate(x, y)
+        c.scale(width / charts.CHART_WIDTH, height / charts.CHART_HEIGHT)
+        c.doForm(name)
+        c.restoreState()
+    else:
+        c.rect(x, y, width, height)
+        c.drawString(x + 5, y + height / 2, "Graph unavailable")
+
+
+def generate_pdf(
+    results: dict,
+    name: str,
+    date: str,
+    activity: str,
+    directory: str,
+    id: str,
+    series_location: str,
+) -> str:
+    """
+    Renders the progression report PDF.
+
+    The header and the charts are drawn once as form XObjects and referenced from each page,
+    the charts as vector paths from the saved series, and the document is written in invariant mode so identical inputs produce a
+    byte-identical file.
+
+    Args:
+        results: The job results with video_output, audio_output and gemini_output.
+        name: The name printed in the header.
+        date: The date printed in the header.
+        activity: The activity printed in the header.
+        directory: The directory the PDF is written to.
+        id: The file name of the PDF, without extension.
+        series_location: The .npz file with the pitch and volume series.
+
+    Returns:
+        str: The path of the PDF.
+    """
+    mypath = os.path.join(directory, f"{id}.pdf")
+    c = canvas.Canvas(mypath, pagesize=letter, invariant=1)
+
+    video = results.get("video_output") or {}
+    audio = results.get("audio_output") or {}
+    gemini = GeminiReport.from_dict(results.get("gemini_output"))
+
+    register_header(c, name, date, activity)
+    series = load_series(series_location) or {}
+    has_pitch = register_chart(
+        c, "pitch-graph", charts.draw_line_chart, series.get("pitch_times"), series.get("pitch"),
+        "Pitch Variation Over Time", "s", "Hz", "#ba451a",
+    )
+    has_energy = register_chart(
+        c, "energy-graph", charts.draw_bar_chart, series.get("volume_times"), series.get("volume"),
+        "Volume Variation", "s", "dBFS", "chocolate",
+    )
+
+    # ------------------------------------------------------ Page 1 Content ------------------------------------------------------
+    start_page(c, "Content Analysis :")
+    draw_gemini_report(c, gemini, -0.6 * inch, 7 * inch, 7 * inch, 12)
+    c.showPage()
+
+    # ------------------------------------------------------ Page 2 Content ------------------------------------------------------
+    start_page(c, "Audio Analysis :", page_number=2)
+    c.setFont("Helvetica", 12)
+    table_data = [["Metric", "Value"]] + [[key, str(value)] for key, value in audio.items()]
+    # the rows shrink to keep the table between the charts and the page number
+    row_height = fit_row_height(len(table_data), AUDIO_TABLE_TOP, TABLE_BOTTOM, 0.4 * inch)
+    draw_table(c, table_data, -0.4 * inch, AUDIO_TABLE_TOP - row_height, 3.5 * inch, row_height)
+
+    draw_graph(c, "pitch-graph", has_pitch, -0.2 * inch, 5 * inch, 2.55 * inch, 2.25 * inch)
+    c.drawString(0.5 * inch, 4.8 * inch, "Pitch & Tone")
+    draw_graph(c, "energy-graph", has_energy, 3.9 * inch, 5 * inch, 2.55 * inch, 2.25 * inch)
+    c.drawString(4.7 * inch, 4.8 * inch, "Volume & Energy")
+    c.showPage()
+
+    # ------------------------------------------------------ Page 3 Content ------------------------------------------------------
+    start_page(c, "Video Analysis :", page_number=3)
+    draw_graph(c, "energy-graph", has_energy, 1.3 * inch, -0.4 * inch, 4 * inch, 3.8 * inch)
+
+    overall_confidence_report = video.get("Overall Confidence Report")
+    table_data = [["Metric", "Value"]] + [
+        [key, str(value)] for key, value in video.items() if key != "Overall Confidence Report"
+    ]
+    x_start = 1 * inch
+    y_start = 6.9 * inch
+    row_height = 0.4 * inch
+    c.setFont("Helvetica", 12)
+    draw_table(c, table_data, x_start, y_start, 2.5 * inch, row_height)
+
+    # Add overall confidence report as heading and paragraph for video output
+    if overall_confidence_report:
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(x_start, y_start - (len(table_data) + 1) * row_height, "Overall Confidence Report:")
+
+        c.setFont("Helvetica", 10)
+        text_object = c.beginText(x_start, y_start - (len(table_data) + 1.5) * row_height)
+        text_object.textLines(overall_confidence_report)
+        c.drawText(text_object)
+
+    c.save()
+    return mypath
@@ -0,0 +1,227 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+# Inputs, intermediates and reports are addressed by a key such as "video_input/<id>.mp4" and
+# live in a backend shared by the web and worker nodes. Transfers are streamed in chunks, so no
+# recording is ever held in memory as a whole.
+
+CHUNK_SIZE = 1 << 20
+# S3 rejects parts smaller than 5 MiB, except for the last one
+MIN_PART_SIZE = 5 << 20
+
+
+class StorageError(Exception):
+    pass
+
+
+class Storage:
+    """Interface implemented by the storage backends."""
+
+    def upload_stream(self, stream: BinaryIO, key: str):
+        """Stores everything read from stream under key."""
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        """Returns a readable binary stream of the object at key."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Removes the object at key, a missing object is not an error."""
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def stores_at(self, path: str, key: str) -> bool:
+        """Whether the object at key is the local file at path itself, which then needs no transfer."""
+        return False
+
+    def upload(self, path: str, key: str):
+        """Stores the local file at path under key."""
+        with open(path, "rb") as file:
+            self.upload_stream(file, key)
+
+    def upload_chunks(self, chunks: Iterable[bytes], key: str):
+        """Stores the concatenated chunks under key, e.g. the body of a streamed HTTP response."""
+        self.upload_stream(ChunkReader(chunks), key)
+
+    def download(self, key: str, path: str):
+        """Writes the object at key to the local file at path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file, self.open(key) as stream:
+                shutil.copyfileobj(stream, file, CHUNK_SIZE)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+class ChunkReader:
+    """A file-like reader over an iterable of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class LocalStorage(Storage):
+    """Keys are paths relative to a directory on the local disk."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise StorageError(f"Key outside of the storage root: {key}")
+        return path
+
+    def upload_stream(self, stream: BinaryIO, key: str):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                shutil.copyfileobj(stream, file, CHUNK_SIZE)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def stores_at(self, path: str, key: str) -> bool:
+        # the worker paths under the storage root are the stored objects themselves
+        return Path(path).resolve() == self.path(key)
+
+    def upload(self, path: str, key: str):
+        if self.stores_at(path, key):
+            return
+        super().upload(path, key)
+
+    def download(self, key: str, path: str):
+        if self.stores_at(path, key):
+            if not self.exists(key):
+                raise StorageError(f"No object stored under {key}")
+            return
+        super().download(key, path)
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise StorageError(f"No object stored under {key}")
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def delete(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+
+    def size(self, key: str) -> int:
+        return self.path(key).stat().st_size
+
+
+class S3Storage(Storage):
+    """
+    Keys are objects in a bucket of an S3 compatible service (AWS S3, MinIO). Uploads larger than
+    one part use a multipart upload, which is aborted if the upload fails.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str = None,
+        access_key: str = None,
+        secret_key: str = None,
+        region: str = None,
+        part_size: int = 8 << 20,
+        client=None,
+    ):
+        self.bucket = bucket
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        if client is None:
+            # boto3 is only needed by deployments storing to S3
+            import boto3
+
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url,
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region,
+            )
+        self.client = client
+
+    def upload_stream(self, stream: BinaryIO, key: str):
+        part = stream.read(self.part_size)
+        following = stream.read(self.part_size) if len(part) == self.part_size else b""
+        if not following:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=part)
+            return
+
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)["UploadId"]
+        parts = []
+        try:
+            while part:
+                number = len(parts) + 1
+                response = self.client.upload_part(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=part
+                )
+                parts.append({"ETag": response["ETag"], "PartNumber": number})
+                part, following = following, (stream.read(self.part_size) if following else b"")
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except BaseException:
+            # parts of an unfinished upload are billed until the upload is aborted
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def _missing(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def open(self, key: str) -> BinaryIO:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        except ClientError as e:
+            if self._missing(e):
+                raise StorageError(f"No object stored under {key}")
+            raise
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if self._missing(e):
+                return False
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
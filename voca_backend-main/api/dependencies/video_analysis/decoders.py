@@ -0,0 +1,76 @@
+import queue
+import threading
+
+# The PyAV (FFmpeg) decoder backend of video.read_frames. FFmpeg decodes with frame and slice
+# threads, and the decoding runs on a producer thread feeding a bounded queue, so the next frames
+# are decoded while MediaPipe runs on the current one. OpenCV decodes on the calling thread,
+# alternating with the inference.
+
+QUEUE_SIZE = 8
+# seconds between checks that the reader of the frames is still iterating while the queue is full
+PUT_TIMEOUT = 0.1
+
+_END = object()
+
+
+def available() -> bool:
+    """Whether PyAV is installed, only deployments with VIDEO_DECODER set to "pyav" need it."""
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def read_frames_pyav(video_path: str, frame_step: int, queue_size: int = QUEUE_SIZE):
+    """
+    Decodes a video with PyAV on a producer thread.
+
+    Yields:
+        tuple: (index, timestamp in seconds, BGR frame) of every frame_step-th frame.
+    """
+    import av
+
+    frames = queue.Queue(queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def put(item) -> bool:
+        # the reader stops early when the generator is closed, the producer then exits too
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            with av.open(video_path) as container:
+                stream = container.streams.video[0]
+                # frame and slice threads, as many as FFmpeg picks for the machine
+                stream.thread_type = "AUTO"
+                fps = float(stream.average_rate or 0)
+                for index, frame in enumerate(container.decode(stream)):
+                    if index % frame_step != 0:
+                        continue
+                    timestamp = frame.time if frame.time is not None else (index / fps if fps else 0.0)
+                    # only the analysed frames are converted from the decoder's pixel format
+                    if not put((index, timestamp, frame.to_ndarray(format="bgr24"))):
+                        return
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            put(_END)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while (item := frames.get()) is not _END:
+            yield item
+        if errors:
+            raise errors[0]
+    finally:
+        stop.set()
+        producer.join()
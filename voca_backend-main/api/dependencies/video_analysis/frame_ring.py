@@ -0,0 +1,78 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Frames handed to analysis processes go through a ring of fixed size slots in shared memory
+# instead of being pickled through a queue. The decoder acquires a free slot, copies the frame
+# into it and sends only the slot number; a consumer reads the slot as a zero-copy numpy view and
+# releases it once it is done. With every slot in use the decoder blocks, bounding the memory.
+
+
+class FrameRing:
+    """
+    A ring of frame slots in shared memory.
+
+    Created in the decoding process, which owns and unlinks the memory, and handed to consumer
+    processes as a Process argument, which attaches to the same memory.
+
+    Args:
+        slots: The number of frames held at once.
+        shape: The shape of every frame, e.g. (height, width, 3).
+        free: A multiprocessing queue of the free slot numbers, from the context starting the
+            consumer processes.
+        dtype: The dtype of the frames.
+    """
+
+    def __init__(self, slots: int, shape: tuple, free, dtype=np.uint8):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.free = free
+        size = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._owner = True
+        self._attach()
+        for slot in range(slots):
+            free.put(slot)
+
+    def _attach(self):
+        self.frames = np.ndarray((self.slots, *self.shape), dtype=self.dtype, buffer=self._shm.buf)
+
+    def __getstate__(self):
+        return {
+            "name": self._shm.name,
+            "slots": self.slots,
+            "shape": self.shape,
+            "dtype": self.dtype.str,
+            "free": self.free,
+        }
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.shape = state["shape"]
+        self.dtype = np.dtype(state["dtype"])
+        self.free = state["free"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._attach()
+
+    def acquire(self, timeout: float = None) -> int:
+        """Returns a free slot, blocking until a consumer releases one."""
+        return self.free.get(timeout=timeout)
+
+    def write(self, slot: int, frame: np.ndarray):
+        self.frames[slot] = frame
+
+    def view(self, slot: int) -> np.ndarray:
+        """The frame in slot, valid until the slot is released."""
+        return self.frames[slot]
+
+    def release(self, slot: int):
+        self.free.put(slot)
+
+    def close(self):
+        # the views have to go before the buffer they point into can be closed
+        self.frames = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+
+# The video results are means over frames (the facial expression confidence and the fraction of
+# frames with a gesture), which converge long before an hour long session is fully analysed.
+# Frames are sampled in stratified order, every prefix of the order spreads evenly over the
+# whole video, and the sampling stops once the confidence interval of every mean is within the
+# tolerance.
+
+# z score of the two sided 95% confidence interval
+Z_95 = 1.96
+# frames analysed before the intervals are trusted, and between checks
+MIN_SAMPLES = 64
+BATCH_SIZE = 32
+
+# VIDEO_QUALITY presets, the tolerance is the allowed half width of the confidence intervals,
+# None analyses every frame
+QUALITY_TOLERANCES = {
+    "full": None,
+    "high": 0.01,
+    "balanced": 0.025,
+    "fast": 0.05,
+}
+
+
+def stratified_order(n: int):
+    """
+    Yields every position in range(n) once, in van der Corput (bit reversed) order: the first 2^k
+    positions split the range into 2^k nearly equal strata with one position in each.
+    """
+    if n <= 0:
+        return
+    bits = (n - 1).bit_length()
+    seen = np.zeros(n, dtype=bool)
+    for k in range(1 << bits):
+        reversed_k = int(format(k, f"0{bits}b")[::-1], 2) if bits else 0
+        # floor(reversed_k * n / 2^bits) reaches every position since 2^bits >= n
+        position = (reversed_k * n) >> bits
+        if not seen[position]:
+            seen[position] = True
+            yield position
+
+
+def half_width(values, population: int, z: float = Z_95) -> float:
+    """
+    The half width of the confidence interval of the mean of values in [0, 1], sampled without
+    replacement from population frames.
+
+    One pseudo observation at each bound keeps a run of identical samples, e.g. no gesture in
+    the first frames, from reading as certainty. The variance of a simple random sample is
+    used, which overestimates the error of a stratified sample of a smooth signal.
+    """
+    n = len(values)
+    if n == 0:
+        return math.inf
+    if n >= population:
+        return 0.0
+    padded = np.concatenate([np.asarray(values, dtype=float), [0.0, 1.0]])
+    correction = 1 - n / population
+    return z * math.sqrt(padded.var(ddof=1) / n * correction)
+
+
+def converged(gestures, confidences, population: int, tolerance: float) -> bool:
+    """Whether both video means are within tolerance, at MIN_SAMPLES or more frames."""
+    if len(confidences) < min(MIN_SAMPLES, population):
+        return False
+    return (
+        half_width(np.asarray(gestures, dtype=float), population) <= tolerance
+        and half_width(confidences, population) <= tolerance
+    )
@@ -1,7 +1,18 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from contextlib import contextmanager
+from queue import Empty
+
 import cv2
 import mediapipe as mp
 import numpy as np
 
+from api.dependencies.video_analysis import decoders, sampling
+from api.dependencies.video_analysis.frame_ring import FrameRing
+
 # Function to detect hand gestures
 def detect_hand_gestures(frame, hands) -> bool:
     results_hands = hands.process(frame)
@@ -10,14 +21,91 @@ def detect_hand_gestures(frame, hands) -> bool:
         gesture_detected = True
     return gesture_detected
 
-# Function to detect facial expressions
-def detect_facial_expressions(frame, face_detection) -> float:
+# Function to detect a face, returns its confidence and relative bounding box
+def detect_face(frame, face_detection) -> tuple:
     results_face = face_detection.process(frame)
     facial_expression_confidence = 0
+    box = None
     if results_face.detections:
         for detection in results_face.detections:
             facial_expression_confidence = detection.score[0]
-    return facial_expression_confidence
+            box = detection.location_data.relative_bounding_box
+    return facial_expression_confidence, box
+
+# Function to detect facial expressions
+def detect_facial_expressions(frame, face_detection) -> float:
+    return detect_face(frame, face_detection)[0]
+
+
+class FaceTracker:
+    """
+    Detects the face every detect_every frames and reuses the last detection in between.
+
+    A speaker's face barely moves in a webcam recording. Between detections the frame is only
+    compared with the last detected one on a small grayscale thumbnail: the detection runs
+    early on a scene change (the mean absolute difference of the thumbnails is above
+    SCENE_CHANGE) or once the face region no longer matches its appearance at the detection
+    (normalised cross-correlation below ROI_SIMILARITY). Every frame gets the confidence of
+    the detection it is matched to.
+    """
+
+    THUMBNAIL_WIDTH = 160
+    SCENE_CHANGE = 0.08
+    ROI_SIMILARITY = 0.8
+
+    def __init__(self, face_detection, detect_every: int = 1):
+        self.face_detection = face_detection
+        self.detect_every = max(detect_every, 1)
+        self.detections = 0
+        self._since = 0
+        self._reference = None
+        self._roi = None
+        self._confidence = 0
+
+    def _thumbnail(self, frame) -> np.ndarray:
+        height, width = frame.shape[:2]
+        size = (self.THUMBNAIL_WIDTH, max(int(height * self.THUMBNAIL_WIDTH / width), 1))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def _crop(self, thumbnail, box):
+        height, width = thumbnail.shape
+        x0, y0 = max(int(box.xmin * width), 0), max(int(box.ymin * height), 0)
+        x1, y1 = min(int((box.xmin + box.width) * width), width), min(int((box.ymin + box.height) * height), height)
+        return thumbnail[y0:y1, x0:x1]
+
+    def _matches(self, thumbnail) -> bool:
+        if np.mean(np.abs(thumbnail - self._reference)) / 255 > self.SCENE_CHANGE:
+            return False
+        if self._roi is None:
+            return True
+        reference, box = self._roi
+        current = self._crop(thumbnail, box)
+        if current.shape != reference.shape or current.size < 4:
+            return False
+        a, b = reference - reference.mean(), current - current.mean()
+        denominator = np.sqrt((a * a).sum() * (b * b).sum())
+        # a flat region has no structure to compare, the scene check above already covered it
+        return denominator == 0 or (a * b).sum() / denominator >= self.ROI_SIMILARITY
+
+    def __call__(self, frame) -> float:
+        if self.detect_every == 1:
+            self.detections += 1
+            return detect_facial_expressions(frame, self.face_detection)
+
+        thumbnail = self._thumbnail(frame)
+        if self._reference is not None and self._since < self.detect_every and self._matches(thumbnail):
+            self._since += 1
+            return self._confidence
+
+        self._confidence, box = detect_face(frame, self.face_detection)
+        self.detections += 1
+        self._since = 1
+        self._reference = thumbnail
+        self._roi = None
+        if box is not None:
+            self._roi = (self._crop(thumbnail, box), box)
+        return self._confidence
 
 # Function to assess body posture
 def assess_body_posture(facial_expression_percentage) -> str:
@@ -41,43 +129,282 @@ def evaluate_performance(facial_expression_percentage, gesture_rating, posture_r
         overall_report = "There are areas for improvement. Focus on enhancing expressions, gestures, and posture."
     return overall_report
 
-# Function to analyze video
-def analyse(video_path: str) -> dict:
-    print("Starting Video analysis")
+# every FRAME_STEP-th frame is analysed
+FRAME_STEP = 2
+# per frame results saved next to the results by analyse, see save_series
+SERIES_FILE = "video_series.npz"
+# frames in flight per analysis process, decoded ahead while the process runs inference
+RING_SLOTS_PER_PROCESS = 4
+# a frame this many frames ahead is reached by decoding forward instead of seeking
+SEEK_DISTANCE = 48
+
+
+def read_frames(video_path: str, frame_step: int = FRAME_STEP, decoder: str = "cv2"):
+    """
+    Decodes a video with the decoder picked by the VIDEO_DECODER setting: "cv2" decodes with
+    OpenCV on the calling thread, "pyav" with threaded FFmpeg ahead of the caller (see
+    decoders.py). Without PyAV installed OpenCV is used.
+
+    Returns:
+        An iterator of (index, timestamp in seconds, BGR frame) of every frame_step-th frame.
+    """
+    if decoder == "pyav":
+        if decoders.available():
+            return decoders.read_frames_pyav(video_path, frame_step)
+        logging.warning("PyAV is not installed, decoding the video with OpenCV")
+    return read_frames_cv2(video_path, frame_step)
+
+
+def read_frames_cv2(video_path: str, frame_step: int = FRAME_STEP):
+    """
+    Decodes a video with OpenCV.
+
+    Yields:
+        tuple: (index, timestamp in seconds, BGR frame) of every frame_step-th frame.
+    """
     cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    try:
+        index = 0
+        # grab decodes a frame, only the analysed ones are converted by retrieve
+        while cap.grab():
+            if index % frame_step == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield index, index / fps if fps else 0.0, frame
+            index += 1
+    finally:
+        cap.release()
 
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    gesture_count = 0
-    facial_expression_confidences = []
 
-    # Initialize mediapipe hands and face detection objects
-    mp_hands = mp.solutions.hands.Hands(min_detection_confidence=0.8, min_tracking_confidence=0.8)
-    mp_face = mp.solutions.face_detection.FaceDetection(min_detection_confidence=0.8)
+class FrameAnalyser:
+    """The MediaPipe graphs run on every analysed frame, built once per process."""
+
+    def __init__(self, face_detect_every: int = 1):
+        # Initialize mediapipe hands and face detection objects
+        self.hands = mp.solutions.hands.Hands(min_detection_confidence=0.8, min_tracking_confidence=0.8)
+        self.face_detection = mp.solutions.face_detection.FaceDetection(min_detection_confidence=0.8)
+        self.face_tracker = FaceTracker(self.face_detection, face_detect_every)
+
+    def __call__(self, frame) -> tuple:
+        """
+        Returns:
+            tuple: (hand gesture detected, facial expression confidence)
+        """
+        return detect_hand_gestures(frame, self.hands), self.face_tracker(frame)
+
+    def reset(self, face_detect_every: int = 1):
+        """Starts the face tracking afresh, for the next video analysed with the same graphs."""
+        self.face_tracker = FaceTracker(self.face_detection, face_detect_every)
+
+    def close(self):
+        self.hands.close()
+        self.face_detection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HolisticAnalyser:
+    """
+    Experimental. One MediaPipe Holistic graph per frame instead of the Hands graph.
+
+    Holistic returns landmarks without a face detection score, the visibility of its pose face
+    keypoints saturates near 1 whenever it finds a face and does not follow the FaceDetection
+    score. The facial expression confidence is therefore still the FaceDetection score, tracked
+    like FrameAnalyser does, so the results of both models are rated alike; Holistic only
+    replaces Hands for the gestures.
+    """
+
+    def __init__(self, face_detect_every: int = 1):
+        self.holistic = mp.solutions.holistic.Holistic(min_detection_confidence=0.8, min_tracking_confidence=0.8)
+        self.face_detection = mp.solutions.face_detection.FaceDetection(min_detection_confidence=0.8)
+        self.face_tracker = FaceTracker(self.face_detection, face_detect_every)
+
+    def __call__(self, frame) -> tuple:
+        results = self.holistic.process(frame)
+        gesture_detected = bool(results.left_hand_landmarks or results.right_hand_landmarks)
+        return gesture_detected, self.face_tracker(frame)
+
+    def reset(self, face_detect_every: int = 1):
+        self.face_tracker = FaceTracker(self.face_detection, face_detect_every)
+
+    def close(self):
+        self.holistic.close()
+        self.face_detection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
-    with mp_hands as hands, mp_face as face_detection:
-        for frame_num in range(total_frames):
-            ret, frame = cap.read()
-            if not ret:
-                break
 
-            # Skip every other frame
-            if frame_num % 2 != 0:
-                continue
+# the MediaPipe graphs run on every frame, picked by the VIDEO_MODEL setting
+ANALYSERS = {
+    "separate": FrameAnalyser,
+    "holistic": HolisticAnalyser,
+}
 
-            # Detect hand gestures
-            gesture_detected = detect_hand_gestures(frame, hands)
-            if gesture_detected:
-                gesture_count += 1
+# analysers kept by this process between videos, by model
+_idle_analysers = {}
+_idle_lock = threading.Lock()
 
-            # Detect facial expressions
-            facial_expression_confidence = detect_facial_expressions(frame, face_detection)
-            facial_expression_confidences.append(facial_expression_confidence)
 
-    avg_facial_expression_confidence = np.mean(facial_expression_confidences)
+@contextmanager
+def analyser_for(model: str = "separate", face_detect_every: int = 1):
+    """
+    Lends an analyser kept by this process, so the MediaPipe graphs built by the worker warm-up
+    (api/warmup.py) or an earlier video are reused instead of built for every video. Analyses
+    running at the same time in threads get one each. An analyser whose analysis raised is
+    closed instead of kept.
+    """
+    with _idle_lock:
+        idle = _idle_analysers.setdefault(model, [])
+        analyser = idle.pop() if idle else None
+    if analyser is None:
+        analyser = ANALYSERS[model](face_detect_every)
+    analyser.reset(face_detect_every)
+    try:
+        yield analyser
+    except BaseException:
+        analyser.close()
+        raise
+    with _idle_lock:
+        _idle_analysers[model].append(analyser)
+
+
+def _failure(results) -> Exception:
+    # the error a failed worker reported, frames already analysed are skipped
+    while True:
+        try:
+            result = results.get(timeout=0.1)
+        except Empty:
+            return RuntimeError("A video analysis process exited unexpectedly")
+        if isinstance(result, Exception):
+            return result
+
+
+def _get(queue, workers, results, sending: bool, timeout: float = 1.0):
+    # a worker that failed, or was killed by the OS, stops taking frames and its exit is noticed
+    # while waiting. While frames are sent no worker has its sentinel yet, any exit is a failure.
+    while True:
+        try:
+            return queue.get(timeout=timeout)
+        except Empty:
+            exited = [worker for worker in workers if worker.exitcode is not None]
+            if (sending and exited) or any(worker.exitcode != 0 for worker in exited):
+                raise _failure(results)
+            if len(exited) == len(workers):
+                # the results put before the last exit are read before giving up
+                try:
+                    return queue.get(timeout=timeout)
+                except Empty:
+                    raise _failure(results)
+
+
+def _ring_worker(ring: FrameRing, tasks, results, model: str, face_detect_every: int):
+    try:
+        with ANALYSERS[model](face_detect_every) as analyser:
+            while (task := tasks.get()) is not None:
+                slot, index, timestamp = task
+                try:
+                    gesture_detected, confidence = analyser(ring.view(slot))
+                finally:
+                    ring.release(slot)
+                results.put((index, timestamp, gesture_detected, float(confidence)))
+    except Exception as e:
+        results.put(RuntimeError(f"Video analysis process failed: {e}"))
+    finally:
+        ring.close()
+
+
+def analyse_parallel(frames, processes: int, model: str = "separate", face_detect_every: int = 1) -> list:
+    """
+    Analyses frames in processes worker processes. The frames are passed through a shared
+    memory ring (frame_ring.py) instead of being pickled.
+
+    Returns:
+        list: (index, timestamp, gesture detected, confidence) of every frame, in frame order.
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        return []
+
+    # fork is unsafe with the decoder and Celery threads running, every worker builds its graphs
+    context = multiprocessing.get_context("spawn")
+    tasks, results = context.Queue(), context.Queue()
+    ring = FrameRing(RING_SLOTS_PER_PROCESS * processes, first[2].shape, context.Queue(), dtype=first[2].dtype)
+    workers = [context.Process(target=_ring_worker, args=(ring, tasks, results, model, face_detect_every), daemon=True) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        count = 0
+        for index, timestamp, frame in itertools.chain([first], frames):
+            slot = _get(ring.free, workers, results, sending=True)
+            ring.write(slot, frame)
+            tasks.put((slot, index, timestamp))
+            count += 1
+        for _ in workers:
+            tasks.put(None)
+
+        analysed = []
+        for _ in range(count):
+            result = _get(results, workers, results, sending=False)
+            if isinstance(result, Exception):
+                raise result
+            analysed.append(result)
+    finally:
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        ring.close()
+    return sorted(analysed)
+
+
+def save_series(analysed, save_dir: str) -> str:
+    """
+    Saves the per frame results as compact arrays, one entry per analysed frame: frame_times
+    (float32 seconds), hands (bool, a hand gesture was detected) and face (float16 facial
+    expression confidence).
+
+    Returns:
+        str: The path of the .npz file.
+    """
+    path = os.path.join(save_dir, SERIES_FILE)
+    np.savez(
+        path,
+        frame_times=np.array([timestamp for _, timestamp, _, _ in analysed], dtype=np.float32),
+        hands=np.array([gesture_detected for _, _, gesture_detected, _ in analysed], dtype=bool),
+        face=np.array([confidence for _, _, _, confidence in analysed], dtype=np.float16),
+    )
+    return path
+
+
+def summarise(gestures, confidences) -> dict:
+    """
+    Args:
+        gestures: Whether a hand gesture was detected, for every analysed frame.
+        confidences: The facial expression confidence of every analysed frame.
+
+    Returns:
+        dict: The video analysis results.
+    """
+    if len(confidences) == 0:
+        raise ValueError("No frames were decoded from the video")
+
+    avg_facial_expression_confidence = np.mean(confidences)
     facial_expression_percentage = int(avg_facial_expression_confidence * 100)
 
     # Calculate gesture rating
-    gesture_rating = min((gesture_count / (total_frames / 2)) * 10, 10)
+    gesture_rating = min((np.count_nonzero(gestures) / len(confidences)) * 10, 10)
 
     # Assess body posture
     posture_rating = assess_body_posture(facial_expression_percentage)
@@ -85,16 +412,139 @@ def analyse(video_path: str) -> dict:
     # Evaluate overall performance
     overall_report = evaluate_performance(facial_expression_percentage, gesture_rating, posture_rating)
 
-    results_dict = {
+    return {
         "Facial Expressions (Percentage)": f"{facial_expression_percentage}%",
         "Hand Gesture Rating (out of 10)": gesture_rating,
         "Body Posture Rating": posture_rating,
         "Overall Confidence Report": overall_report
     }
 
+
+def read_frames_at(video_path: str, indices):
+    """
+    Decodes the frames at the given indices with OpenCV, in ascending order. Near frames are
+    decoded forward, far ones seeked to.
+
+    Yields:
+        tuple: (index, timestamp in seconds, BGR frame)
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    position = 0
+    try:
+        for index in sorted(indices):
+            if index < position or index - position > SEEK_DISTANCE:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                position = index
+            while position < index and cap.grab():
+                position += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+            position += 1
+            yield index, index / fps if fps else 0.0, frame
+    finally:
+        cap.release()
+
+
+def analyse_sampled(video_path: str, tolerance: float, model: str = "separate", face_detect_every: int = 1):
+    """
+    Analyses the frames of a video in stratified order, in batches, until the confidence
+    intervals of the video means are within tolerance (see sampling.py).
+
+    Returns:
+        list: (index, timestamp, gesture detected, confidence) of every analysed frame, in
+        frame order. None if the frame count of the video is unknown.
+    """
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     cap.release()
-    print("Finishing video analysis")
+    if total_frames <= 0:
+        return None
+
+    population = (total_frames + FRAME_STEP - 1) // FRAME_STEP
+    order = sampling.stratified_order(population)
+    analysed = []
+    with analyser_for(model, face_detect_every) as analyser:
+        while not sampling.converged(
+            [result[2] for result in analysed], [result[3] for result in analysed], population, tolerance
+        ):
+            size = sampling.MIN_SAMPLES if not analysed else sampling.BATCH_SIZE
+            batch = [position * FRAME_STEP for _, position in zip(range(size), order)]
+            if not batch:
+                break
+            for index, timestamp, frame in read_frames_at(video_path, batch):
+                analysed.append((index, timestamp, *analyser(frame)))
+    return sorted(analysed)
+
 
+def results(analysed, save_dir: str = None) -> dict:
+    """Summarises the per frame results, and saves them to save_dir if it is given."""
+    if save_dir is not None and analysed:
+        save_series(analysed, save_dir)
+    gestures = [gesture_detected for _, _, gesture_detected, _ in analysed]
+    confidences = [confidence for _, _, _, confidence in analysed]
+    return summarise(gestures, confidences)
+
+
+def analyse_frames(
+    frames, processes: int = 1, model: str = "separate", face_detect_every: int = 1, save_dir: str = None
+) -> dict:
+    """
+    Analyses decoded frames, from read_frames or the single pass ingestion
+    (api/dependencies/media_ingest/ingest.py).
+
+    Args:
+        frames: An iterable of (index, timestamp, BGR frame).
+        processes: The number of processes running the MediaPipe graphs, 1 analyses the
+            frames in the calling thread.
+        model: "separate" runs the Hands and FaceDetection graphs, "holistic" the Holistic
+            graph in place of Hands (see ANALYSERS).
+        face_detect_every: Detect the face every face_detect_every frames and track it in
+            between (see FaceTracker), 1 detects it on every frame.
+        save_dir: The directory to save the per frame results to (see save_series).
+
+    Returns:
+        dict: The video analysis results.
+    """
+    if processes > 1:
+        analysed = analyse_parallel(frames, processes, model, face_detect_every)
+    else:
+        with analyser_for(model, face_detect_every) as analyser:
+            analysed = [(index, timestamp, *analyser(frame)) for index, timestamp, frame in frames]
+    return results(analysed, save_dir)
+
+
+# Function to analyze video
+def analyse(
+    video_path: str,
+    processes: int = 1,
+    model: str = "separate",
+    face_detect_every: int = 1,
+    tolerance: float = None,
+    save_dir: str = None,
+    decoder: str = "cv2",
+) -> dict:
+    """
+    Analyses a video. With a tolerance the frames are sampled until the results are within it
+    (see analyse_sampled), otherwise every FRAME_STEP-th frame is analysed, decoded by decoder
+    (see read_frames). With a save_dir the per frame results are saved to SERIES_FILE in it.
+    """
+    print("Starting Video analysis")
+    analysed = None
+    if tolerance is not None:
+        analysed = analyse_sampled(video_path, tolerance, model=model, face_detect_every=face_detect_every)
+    if analysed is not None:
+        results_dict = results(analysed, save_dir)
+    else:
+        results_dict = analyse_frames(
+            read_frames(video_path, decoder=decoder),
+            processes=processes,
+            model=model,
+            face_detect_every=face_detect_every,
+            save_dir=save_dir,
+        )
+    print("Finishing video analysis")
     return results_dict
 
 if __name__ == "_main_":
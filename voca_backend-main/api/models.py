@@ -1,11 +1,14 @@
 import os
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from django.contrib.auth.hashers import Argon2PasswordHasher, check_password
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 from django.utils.autoreload import time
 
+from .storage import REPORT_PREFIX, SharedFileStorage
+
 
 class vocaUser(models.Model):
     user = models.ForeignKey(to=User, on_delete=models.CASCADE)
@@ -45,7 +48,7 @@ class vocaUser(models.Model):
 
 
 class Report(models.Model):
-    reportFile = models.FileField(upload_to="reports/")
+    reportFile = models.FileField(upload_to=f"{REPORT_PREFIX}/", storage=SharedFileStorage())
     reportID = models.CharField(max_length=256, primary_key=True)
     owner = models.ForeignKey(
         vocaUser, on_delete=models.CASCADE, related_name="reports"
@@ -56,12 +59,29 @@ class Report(models.Model):
         return f"{self.owner.__str__()} on {self.activity}"
 
 
+class AnalysisJob(models.Model):
+    videoID = models.CharField(max_length=256, primary_key=True)
+    reportID = models.CharField(max_length=256)
+    taskID = models.CharField(max_length=36)
+    status = models.CharField(max_length=20, default="QUEUED")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.videoID} ({self.status})"
+
+
+def key_expiry():
+    """The expiry of a key stored without one, ten minutes from when it is created."""
+    return timezone.now() + timedelta(minutes=10)
+
+
 class Key(models.Model):
     username = models.CharField(max_length=512, primary_key=True)
     public_key = models.TextField()  # Stores the full PEM-formatted public key
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    expiry_at = models.DateTimeField(default=datetime.now() + timedelta(minutes=10))
+    expiry_at = models.DateTimeField(default=key_expiry)
 
     def __str__(self):
         return f"Public Key for {self.username}"
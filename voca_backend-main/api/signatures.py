@@ -0,0 +1,10 @@
+"""
+Signatures of the Celery tasks enqueued by the web process, referenced by task name.
+
+Importing api.tasks loads the analysis stack (MediaPipe, OpenCV, Praat, NLTK, ReportLab and the
+Gemini client), which only the workers need. Views enqueue through these signatures instead, so
+the web process never imports it. Routing by name still applies (see voca_backend/celery.py).
+"""
+from voca_backend.celery import app
+
+report_main = app.signature("api.tasks.main")
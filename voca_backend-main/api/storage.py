@@ -0,0 +1,69 @@
+"""
+The storage shared by the web and worker nodes (see api/dependencies/storage/storage.py), picked
+by the STORAGE_BACKEND setting. With the local backend every node has to see the same
+STORAGE_ROOT, with the S3 backend the nodes only share the bucket.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import Storage as DjangoStorage
+from django.utils.deconstruct import deconstructible
+
+from api.dependencies.storage.storage import LocalStorage, S3Storage, Storage
+
+INPUT_PREFIX = "video_input"
+REPORT_PREFIX = "reports"
+# per frame results kept with the report, which later charts are drawn from
+SERIES_PREFIX = "series"
+
+
+@lru_cache
+def get_storage() -> Storage:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            settings.STORAGE_BUCKET,
+            endpoint_url=settings.STORAGE_ENDPOINT_URL,
+            access_key=settings.STORAGE_ACCESS_KEY,
+            secret_key=settings.STORAGE_SECRET_KEY,
+            region=settings.STORAGE_REGION,
+            part_size=settings.STORAGE_PART_SIZE,
+        )
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STORAGE_ROOT)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+def input_key(video_id: str) -> str:
+    return f"{INPUT_PREFIX}/{video_id}.mp4"
+
+
+def series_key(video_id: str, name: str) -> str:
+    return f"{SERIES_PREFIX}/{video_id}/{name}"
+
+
+def hash_key(key: str) -> str:
+    """The key of the SHA-256 of the object at key, stored next to it when it is uploaded."""
+    return f"{key}.sha256"
+
+
+@deconstructible
+class SharedFileStorage(DjangoStorage):
+    """Serves the FileFields of the models from the shared storage."""
+
+    def _open(self, name, mode="rb"):
+        return File(get_storage().open(name), name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        get_storage().upload_stream(content, name)
+        return name
+
+    def exists(self, name):
+        return get_storage().exists(name)
+
+    def delete(self, name):
+        get_storage().delete(name)
+
+    def size(self, name):
+        return get_storage().size(name)
@@ -1,24 +1,37 @@
-from celery import shared_task
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.lib.pagesizes import letter
+from celery import chain, chord, shared_task
+from django.conf import settings
+import datetime
+import functools
 import time
-import textwrap
 import os
 import shutil
-import threading
 from pathlib import Path
 import logging
 import json
+import hashlib
+import tempfile
+from contextlib import ExitStack, contextmanager
+from typing import Optional
 
 from api.dependencies.geminiAPI import gemini
 from api.dependencies.audio_analysis import audio
-from api.dependencies.video_analysis import video
+from api.dependencies.audio_analysis.timeline import Timeline
+from api.dependencies.video_analysis import sampling, video
 from api.dependencies.respond import main as respond
-
-INPUT_ROOT = Path("data/video_input")
-OUTPUT_ROOT = Path("data/video_output")
-JSON_LOC = Path("data/json_files")
+from api.dependencies.report_generation import pdf
+from api.dependencies.redis import Redis as redisDBRaw
+from api.dependencies.redis import job_status
+from api.dependencies.feature_cache import feature_cache
+from api.dependencies.media_ingest import ingest
+from api.dependencies.storage.storage import StorageError
+from api.models import AnalysisJob
+from api.storage import INPUT_PREFIX, REPORT_PREFIX, get_storage, hash_key, series_key
+
+# local working copies, stored under the same keys relative to DATA_ROOT in the shared storage
+DATA_ROOT = Path("data")
+INPUT_ROOT = DATA_ROOT / INPUT_PREFIX
+OUTPUT_ROOT = DATA_ROOT / "video_output"
+JSON_LOC = DATA_ROOT / "json_files"
 
 logging.basicConfig(
     level=logging.INFO,  # Set the logging level
@@ -27,314 +40,457 @@ logging.basicConfig(
     filemode='a'  # Set the file mode (append)
 )
 
-def split_results(results: dict):
-    return (
-        results.get("video_output"),
-        results.get("audio_output"),
-        results.get("gemini_output"),
-    )  # splits the result dict into video, audio and gemini
-
-
-def render_markdown(c, markdown_text, x_start, y_start, max_width, font_size):
-    lines = markdown_text.split("\n")
-    y = y_start
-    skip_main_heading = False
-    for line in lines:
-        line = line.lstrip("*").strip()
-        if line.startswith("---"):
-            continue
-        elif (
-            line.startswith("Strengths")
-            or line.startswith("Weaknesses")
-            or line.startswith("Repetition")
-            or line.startswith("Summary")
-            or line.startswith("Grammatical Errors")
-            or line.startswith("Relevance")
-            or line.startswith("Vocabulary")
-            or line.startswith("Summary")
-            or line.startswith("Grade")
-            or line.startswith("Overall Confidence Report")
-        ):
-            c.setFont("Helvetica-Bold", font_size)
-            c.drawString(x_start, y, "• " + line)
-            y -= font_size * 1.2
-            y -= font_size * 0.3
-        else:
-            wrapped_lines = textwrap.wrap(line, width=80)
-            for wrapped_line in wrapped_lines:
-                c.setFont("Helvetica", font_size)
-                c.drawString(x_start, y, wrapped_line)
-                y -= font_size * 1.2
-            y -= font_size * 0.3
-
+redisDB = redisDBRaw.connect_to_redis()
+
+def report_progress(task, video_name: str, stage: str, error: str = None):
+    """
+    Publishes the stage of a job as Celery task state and to the Redis status hash
+    read by the jobstatus endpoint.
+    """
+    status = job_status.set_status(redisDB, video_name, stage, error=error)
+    # terminal states are left to Celery, which records them when the task returns
+    if task is not None and task.request.id and stage not in ("SUCCESS", "FAILURE"):
+        task.update_state(state="PROGRESS", meta=status)
+
+
+def storage_key(path: str) -> str:
+    return Path(path).relative_to(DATA_ROOT).as_posix()
+
+
+@contextmanager
+def fetched(path: str):
+    """
+    Makes a stored input or intermediate available while a stage reads it. The stages of a job
+    may run on different nodes, each fetches what it reads from the shared storage into a copy
+    of its own, removed when the stage is done so no node is left with the files of a job.
+    Objects the storage keeps at their local paths are read in place.
+
+    Yields:
+        str: The local path to read.
+    """
+    storage = get_storage()
+    key = storage_key(path)
+    if storage.stores_at(path, key):
+        storage.download(key, path)
+        yield path
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, copy = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".fetched-", suffix=Path(path).suffix)
+    os.close(fd)
+    try:
+        storage.download(key, copy)
+        yield copy
+    finally:
+        if os.path.exists(copy):
+            os.remove(copy)
+
+
+def publish(path: str):
+    """
+    Stores a file a later stage reads, which may run on another node, and removes the local copy
+    unless the storage keeps the object at its local path.
+    """
+    storage = get_storage()
+    key = storage_key(path)
+    storage.upload(path, key)
+    if not storage.stores_at(path, key):
+        os.remove(path)
+
+
+def recording_hash(video_path: str) -> Optional[str]:
+    """
+    The SHA-256 of a recording, stored next to it when it was uploaded, so the recording is not
+    fetched to hash it. None if it can not be read, the job then runs without the feature cache.
+    """
+    storage = get_storage()
+    key = storage_key(video_path)
+    try:
+        with storage.open(hash_key(key)) as file:
+            return file.read().decode("ascii").strip()
+    except StorageError:
+        # uploads from before the hashes were stored, hashed where the storage keeps them locally
+        if storage.stores_at(video_path, key) and os.path.exists(video_path):
+            return feature_cache.content_hash(video_path)
+        logging.error(f"No content hash stored for {video_path}")
+        return None
+
+
+def build_job(video_name: str, context: str, report_id: str, task_id: str) -> dict:
+    """
+    Builds the job dict handed from stage to stage. Stages add their outputs to it.
+    """
+    video_path = str(INPUT_ROOT / f"{video_name}.mp4")
+    return {
+        "video_name": video_name,
+        "context": context,
+        "report_id": report_id,
+        "task_id": task_id,
+        "video_path": video_path,
+        "audio_path": str(OUTPUT_ROOT / video_name / f"{video_name}.wav"),
+        "save_dir": str(OUTPUT_ROOT / video_name),
+        "content_hash": recording_hash(video_path),
+        "started_at": time.time(),
+    }
+
+
+# bumped when an analysis changes its results, the entries of older versions are no longer read
+CACHE_VERSION = 1
+
+# the settings every stage output depends on, part of the cache entry name
+CACHE_SETTINGS = {
+    "timeline": (),
+    "audio": ("PITCH_TIME_STEP", "PITCH_SAMPLE_RATE"),
+    "video": ("VIDEO_MODEL", "VIDEO_QUALITY", "VIDEO_FACE_DETECT_EVERY"),
+    "gemini": ("GEMINI_TOKEN_BUDGET", "GEMINI_MAX_CHUNKS"),
+}
+
+
+def cache_name(stage: str, *inputs: str) -> str:
+    """
+    The cache entry name of a stage output, tagged with CACHE_VERSION, the CACHE_SETTINGS of the
+    stage and any inputs besides the recording, so changing one of them misses the old entries.
+    """
+    tag = [CACHE_VERSION, *(getattr(settings, name) for name in CACHE_SETTINGS[stage]), *inputs]
+    return f"{stage}-{hashlib.sha256(json.dumps(tag).encode('utf-8')).hexdigest()[:16]}"
+
+
+def cached(job: dict, name: str):
+    """Returns a stage output cached for the recording of the job, or None."""
+    if not job.get("content_hash"):
+        return None
+    return feature_cache.load(settings.FEATURE_CACHE_DIR, job["content_hash"], name)
+
+
+def cache(job: dict, name: str, data: dict, arrays: str = None):
+    """Caches a stage output, and optionally a .npz file, for the recording of the job."""
+    if not job.get("content_hash"):
+        return
+    try:
+        feature_cache.store(settings.FEATURE_CACHE_DIR, job["content_hash"], name, data)
+        if arrays:
+            feature_cache.store_arrays(settings.FEATURE_CACHE_DIR, job["content_hash"], name, arrays)
+        feature_cache.evict(settings.FEATURE_CACHE_DIR, settings.FEATURE_CACHE_MAX_BYTES)
+    except OSError as e:
+        # the cache only saves work, a full or unwritable cache does not fail the job
+        logging.error(f"Unable to cache {name} for {job['video_name']}: {e}")
+
+
+def cached_video(job: dict):
+    """
+    Returns the cached video output, with its per frame series restored to the save_dir of the
+    job, or None if either is not cached.
+    """
+    name = cache_name("video")
+    video_output = cached(job, name)
+    if video_output is None or not feature_cache.load_arrays(
+        settings.FEATURE_CACHE_DIR, job["content_hash"], name, os.path.join(job["save_dir"], video.SERIES_FILE)
+    ):
+        return None
+    return video_output
+
+
+def cached_audio(job: dict):
+    """
+    Returns the cached timeline and audio output, with the audio series restored to the save_dir
+    of the job, or None if any of them is not cached.
+    """
+    timeline = cached(job, cache_name("timeline"))
+    audio_output = cached(job, cache_name("audio"))
+    if timeline is None or audio_output is None or not feature_cache.load_arrays(
+        settings.FEATURE_CACHE_DIR, job["content_hash"], cache_name("audio"),
+        os.path.join(job["save_dir"], audio.SERIES_FILE),
+    ):
+        return None
+    return timeline, audio_output
+
+
+def skip_audio(job: dict) -> bool:
+    """
+    Carries the cached timeline and audio output of the recording forward in the job, so the
+    audio is neither extracted nor published. The later audio stages may run on other nodes with
+    their own caches, they use what the job carries instead of looking the entries up again.
+    """
+    outputs = cached_audio(job)
+    if outputs is None:
+        return False
+    job["timeline"], job["audio_output"] = outputs
+    publish(os.path.join(job["save_dir"], audio.SERIES_FILE))
+    return True
+
+
+def video_options() -> dict:
+    """The video analysis settings, passed to video.analyse and video.analyse_frames."""
+    return {
+        "processes": settings.VIDEO_PROCESSES,
+        "model": settings.VIDEO_MODEL,
+        "face_detect_every": settings.VIDEO_FACE_DETECT_EVERY,
+    }
+
+
+def video_tolerance():
+    """
+    The tolerance the video results are sampled to, from the VIDEO_QUALITY preset. The single
+    pass ingestion reads the frames in order and always analyses all of them.
+    """
+    return sampling.QUALITY_TOLERANCES[settings.VIDEO_QUALITY]
+
+
+def build_pipeline(job: dict):
+    """
+    Builds the analysis canvas for a job.
+
+    The video branch and the audio branch (extraction, speech to text, audio analysis and
+    the Gemini report) run in parallel, each stage on the queue matching its resource
+    profile (see voca_backend/celery.py), and the render stage joins both branches.
+
+    With MEDIA_INGEST set to "single" one ingestion stage reads the recording once, extracting
+    the audio while it analyses the video, and the audio stages follow it.
+    """
+    if settings.MEDIA_INGEST == "single":
+        branches = [chain(ingest_media.s(job), transcribe.s(), analyse_audio.s(), gemini_report.s())]
+    else:
+        audio_branch = chain(
+            extract_audio.s(job),
+            transcribe.s(),
+            analyse_audio.s(),
+            gemini_report.s(),
+        )
+        branches = [analyse_video.s(job), audio_branch]
+    return chord(branches, render_report.s(job)).on_error(pipeline_failed.s(job=job))
+
+
+@shared_task(bind=True)
+def extract_audio(self, job: dict) -> dict:
+    os.makedirs(job["save_dir"], exist_ok=True)
+    report_progress(self, job["video_name"], "EXTRACTING_AUDIO")
+    if skip_audio(job):
+        print("Transcript and audio features cached, skipping audio extraction")
+        return job
+    with fetched(job["video_path"]) as video_path:
+        audio_file = audio.extract_audio_from_video(video_path, job["audio_path"])
+    publish(job["audio_path"])
+    print(f"Audio file generated: {audio_file}")
+    return job
+
+
+@shared_task(bind=True)
+def ingest_media(self, job: dict) -> dict:
+    os.makedirs(job["save_dir"], exist_ok=True)
+    report_progress(self, job["video_name"], "INGESTING")
+    job["video_output"] = cached_video(job)
+    analyse_frames = None
+    if job["video_output"] is None:
+        analyse_frames = functools.partial(video.analyse_frames, save_dir=job["save_dir"], **video_options())
+
+    if not skip_audio(job):
+        with fetched(job["video_path"]) as video_path:
+            video_output = ingest.ingest(video_path, job["audio_path"], analyse_frames, frame_step=video.FRAME_STEP)
+        publish(job["audio_path"])
+        print(f"Audio file generated: {job['audio_path']}")
+    elif analyse_frames is not None:
+        with fetched(job["video_path"]) as video_path:
+            video_output = video.analyse(
+                video_path,
+                tolerance=video_tolerance(),
+                save_dir=job["save_dir"],
+                decoder=settings.VIDEO_DECODER,
+                **video_options(),
+            )
+
+    if analyse_frames is not None:
+        job["video_output"] = video_output
+        cache(job, cache_name("video"), video_output, arrays=os.path.join(job["save_dir"], video.SERIES_FILE))
+    publish(os.path.join(job["save_dir"], video.SERIES_FILE))
+    print(f"Video analysis output: {job['video_output']}")
+    return job
+
+
+@shared_task(bind=True)
+def transcribe(self, job: dict) -> dict:
+    report_progress(self, job["video_name"], "TRANSCRIBING")
+    if job.get("timeline") is None:
+        job["timeline"] = cached(job, cache_name("timeline"))
+    if job["timeline"] is None:
+        with fetched(job["audio_path"]) as audio_path:
+            timeline = audio.transcribe_timeline(audio_path)
+        job["timeline"] = timeline.to_dict()
+        # a timeline with failed spans is not cached, a retry should attempt them again
+        if not timeline.partial:
+            cache(job, cache_name("timeline"), job["timeline"])
+    timeline = Timeline.from_dict(job["timeline"])
+    job["transcript"] = timeline.text
+    print(f"Speech to text result: {job['transcript']}")
+    return job
+
+
+@shared_task(bind=True)
+def analyse_audio(self, job: dict) -> dict:
+    report_progress(self, job["video_name"], "ANALYSING_AUDIO")
+    series = os.path.join(job["save_dir"], audio.SERIES_FILE)
+    if job.get("audio_output") is not None:
+        # carried from the extraction stage, which published the series
+        print(f"Audio analysis output: {job['audio_output']}")
+        return job
+    job["audio_output"] = cached(job, cache_name("audio"))
+    if job["audio_output"] is None or not feature_cache.load_arrays(
+        settings.FEATURE_CACHE_DIR, job["content_hash"], cache_name("audio"), series
+    ):
+        timeline = Timeline.from_dict(job["timeline"])
+        with fetched(job["audio_path"]) as audio_path:
+            job["audio_output"] = audio.analyse(
+                audio_path,
+                timeline,
+                job["save_dir"],
+                pitch_time_step=settings.PITCH_TIME_STEP,
+                pitch_sample_rate=settings.PITCH_SAMPLE_RATE,
+            )
+        # the speech metrics of a timeline with failed spans are not cached either
+        if job["audio_output"] is not None and not timeline.partial:
+            cache(job, cache_name("audio"), job["audio_output"], arrays=series)
+    if os.path.exists(series):
+        publish(series)
+    print(f"Audio analysis output: {job['audio_output']}")
+    return job
+
+
+@shared_task(bind=True)
+def gemini_report(self, job: dict) -> dict:
+    report_progress(self, job["video_name"], "GENERATING_REPORT")
+    job["gemini_output"] = cached(job, cache_name("gemini", job["context"]))
+    if job["gemini_output"] is not None:
+        return job
+    model = gemini.get_model()
+    gemini_output = gemini.get_report(
+        job["context"],
+        job["transcript"],
+        model,
+        token_budget=settings.GEMINI_TOKEN_BUDGET,
+        max_chunks=settings.GEMINI_MAX_CHUNKS,
+        max_workers=settings.GEMINI_MAX_WORKERS,
+    )
+    print(f"Gemini report output: {gemini_output}")
+    job["gemini_output"] = gemini_output.to_dict()
+    # an ungraded report stands in for a failed generation and a partial one misses the parts
+    # that failed, a retry should attempt them again
+    if gemini_output.grade is not None and not gemini_output.partial:
+        cache(job, cache_name("gemini", job["context"]), job["gemini_output"])
+    return job
+
+
+@shared_task(bind=True)
+def analyse_video(self, job: dict) -> dict:
+    os.makedirs(job["save_dir"], exist_ok=True)
+    report_progress(self, job["video_name"], "ANALYSING_VIDEO")
+    series = os.path.join(job["save_dir"], video.SERIES_FILE)
+    video_output = cached_video(job)
+    if video_output is None:
+        with fetched(job["video_path"]) as video_path:
+            video_output = video.analyse(
+                video_path,
+                tolerance=video_tolerance(),
+                save_dir=job["save_dir"],
+                decoder=settings.VIDEO_DECODER,
+                **video_options(),
+            )
+        cache(job, cache_name("video"), video_output, arrays=series)
+    publish(series)
+    print(f"Video analysis output: {video_output}")
+    return {"video_output": video_output}
+
+
+@shared_task(bind=True)
+def render_report(self, branches: list, job: dict) -> dict:
+    results = {}
+    for branch in branches:
+        results.update({k: branch[k] for k in ("video_output", "audio_output", "gemini_output") if k in branch})
+
+    report_progress(self, job["video_name"], "RENDERING")
+    os.makedirs(JSON_LOC, exist_ok=True)
+    with open(f"{JSON_LOC}/{job['video_name']}.json", 'w') as file:
+        file.write(json.dumps(results))
+    keep_series(job)
+
+    with ExitStack() as stack:
+        series = os.path.join(job["save_dir"], audio.SERIES_FILE)
+        try:
+            series = stack.enter_context(fetched(series))
+        except StorageError:
+            # the report is rendered with placeholders instead of the charts
+            logging.error(f"No audio series stored for {job['video_name']}")
+        loc = pdf.generate_pdf(
+            results=results,
+            name=job["video_name"],
+            date=datetime.date.fromtimestamp(job["started_at"]).isoformat(),
+            activity=job["context"],
+            directory=str(JSON_LOC),
+            id=job["report_id"] or job["video_name"],
+            series_location=series,
+        )
+    print(f"PDF generated: {loc}")
+    get_storage().upload(loc, f"{REPORT_PREFIX}/{os.path.basename(loc)}")
+    try:
+        respond(loc, job["report_id"] or job["video_name"], job["context"])
+    except Exception as e:
+        # the PDF stays in JSON_LOC, a failed delivery does not fail the analysis
+        logging.error(f"Unable to deliver report {loc}: {e}")
+
+    report_progress(self, job["video_name"], "SUCCESS")
+    print(f"Processing time: {time.time() - job['started_at']}")
+    finish_job(job, "SUCCESS")
+    return results
+
+
+def keep_series(job: dict):
+    """
+    Copies the per frame video series of a job from its working key to series_key, which the
+    cleanup of the job leaves, so gesture and presence charts can be drawn later without
+    analysing the video again.
+    """
+    storage = get_storage()
+    try:
+        with storage.open(storage_key(os.path.join(job["save_dir"], video.SERIES_FILE))) as stream:
+            storage.upload_stream(stream, series_key(job["video_name"], video.SERIES_FILE))
+    except StorageError as e:
+        logging.error(f"Unable to keep the video series of {job['video_name']}: {e}")
 
-@shared_task
-def generate_pdf(results: dict, name: str, date: str, activity: str, directory: str, id: str, pitch_tone_location: str, energy_location: str):
-    mypath = f"{directory}{id}.pdf"
-    c = canvas.Canvas(mypath, pagesize=letter)
-    c.translate(inch, inch)
-
-    # Split the results into video, audio, and gemini dictionaries
-    video, audio, gemini = split_results(results)
-
-    # ------------------------------------------------------ Page 1 Content ------------------------------------------------------
-    # Draw colored box
-    c.setFillColor("grey")
-    c.setStrokeColor("black")
-    c.roundRect(-0.8 * inch, 7.6 * inch, 2 * inch, 0.4 * inch, 5, fill=1)
-
-    # Add heading text
-    c.setFillColor("black")
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(-0.65 * inch, 7.73 * inch, "Content Analysis :")
-
-    # Main content
-    c.setFillColorRGB(89, 89, 87)
-    c.setFillColor("black")
-    c.setFont("Helvetica", 23)
-    c.drawString(1.55 * inch, 8.5 * inch, "Progression Report")
-    c.setFillColor("darkblue")
-    c.setFont("Helvetica", 12)
-    c.drawString(5.45 * inch, 9.6 * inch, f"Name: {name}")
-    c.drawString(5.45 * inch, 9.35 * inch, f"Date: {date}")
-    c.drawString(5.45 * inch, 9.1 * inch, f"Activity: {activity}")
-    c.setStrokeColor("black")
-    c.setLineWidth(1.3)
-    c.line(-0.55 * inch, 8.35 * inch, 7 * inch, 8.35 * inch)
-
-    # Add Gemini content
-    x_start = -0.6 * inch
-    y_start = 7 * inch
-    max_width = 7 * inch
-    font_size = 12
-    render_markdown(c, gemini, x_start, y_start, max_width, font_size)
-
-    c.showPage()
-
-    # Additional content on the second page
-    c.translate(inch, inch)
-
-    # Draw colored box
-    c.setFillColor("grey")
-    c.setStrokeColor("black")
-    c.roundRect(-0.8 * inch, 7.6 * inch, 2 * inch, 0.4 * inch, 5, fill=1)
-
-    # Add heading text
-    c.setFillColor("black")
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(-0.65 * inch, 7.73 * inch, "Audio Analysis :")
-
-    # Initialize table data
-    table_data = [["Metric", "Value"]]
-
-    # Populate table data and extract overall confidence report for video output
-    for key, value in audio.items():
-        table_data.append([key, str(value)])
-
-    # Draw table for video output only
-    col_width = 3.5 * inch
-    row_height = 0.4 * inch
-    x_start = -0.4 * inch
-    y_start = 4 * inch
-    for i, row in enumerate(table_data):
-        for j, cell in enumerate(row):
-            c.rect(x_start + j * col_width, y_start - i * row_height, col_width, row_height)
-            c.drawString(x_start + j * col_width + 5, y_start - i * row_height + 10, cell)
-
-    pitch_graph_path = pitch_tone_location
-    c.drawImage(pitch_graph_path, -0.2 * inch, 5 * inch, width=2.55 * inch, height=2.25 * inch)
-    c.drawString(0.5 * inch, 4.8 * inch, "Pitch & Tone")
-    volume_graph_path = energy_location
-    c.drawImage(volume_graph_path, 3.9 * inch, 5 * inch, width=2.55 * inch, height=2.25 * inch)
-    c.drawString(4.7 * inch, 4.8 * inch, "Volume & Energy")
-
-    # Add other details
-    c.setFillColorRGB(89, 89, 87)
-    c.setFillColor("black")
-    c.setFont("Helvetica", 23)
-    c.drawString(1.55 * inch, 8.5 * inch, "Progression Report")
-    c.setFillColor("darkblue")
-    c.setFont("Helvetica", 12)
-    c.drawString(5.45 * inch, 9.6 * inch, f"Name: {name}")
-    c.drawString(5.45 * inch, 9.35 * inch, f"Date: {date}")
-    c.drawString(5.45 * inch, 9.1 * inch, f"Activity: {activity}")
-    c.setStrokeColor("black")
-    c.setLineWidth(1.3)
-    c.line(-0.55 * inch, 8.35 * inch, 7 * inch, 8.35 * inch)
-    c.drawImage(energy_location, -1 * inch, 9.2 * inch)
-    c.setFillColor("black")
-    c.setFont("Helvetica", 10)
-    c.drawString(2.7 * inch, -0.7 * inch, "Page-2")
-
-    # Additional content on the third page
-    c.showPage()
-    c.translate(inch, inch)
-
-    c.setFillColor("grey")
-    c.setStrokeColor("black")
-    c.roundRect(-0.8 * inch, 7.6 * inch, 2 * inch, 0.4 * inch, 5, fill=1)
-
-    # Add heading text
-    c.setFillColor("black")
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(-0.65 * inch, 7.73 * inch, "Video Analysis :")
-
-    c.setFillColorRGB(89, 89, 87)
-    c.setFillColor("black")
-    c.setFont("Helvetica", 23)
-    c.drawString(1.55 * inch, 8.5 * inch, "Progression Report")
-    c.setFillColor("darkblue")
-    c.setFont("Helvetica", 12)
-    c.drawString(5.45 * inch, 9.6 * inch, f"Name: {name}")
-    c.drawString(5.45 * inch, 9.35 * inch, f"Date: {date}")
-    c.drawString(5.45 * inch, 9.1 * inch, f"Activity: {activity}")
-    c.setStrokeColor("black")
-    c.setLineWidth(1.3)
-    c.line(-0.55 * inch, 8.35 * inch, 7 * inch, 8.35 * inch)
-    c.drawImage(energy_location, -1 * inch, 9.2 * inch)
-    c.setFillColor("black")
-    c.setFont("Helvetica", 10)
-    c.drawString(2.7 * inch, -0.7 * inch, "Page-3")
-    c.drawImage(energy_location, 1.3 * inch, -0.4 * inch, width=4 * inch, height=3.8 * inch)
-
-    # Initialize table data
-    table_data = [["Metric", "Value"]]
-
-    # Initialize variables for the overall confidence report
-    overall_confidence_report = None
-
-    # Populate table data and extract overall confidence report for video output
-    for key, value in video.items():
-        if key == "Overall Confidence Report":
-            overall_confidence_report = value
-        else:
-            table_data.append([key, str(value)])
-
-    # Draw table for video output only
-    col_width = 2.5 * inch
-    row_height = 0.4 * inch
-    x_start = 1 * inch
-    y_start = 6.9 * inch
-    for i, row in enumerate(table_data):
-        for j, cell in enumerate(row):
-            c.rect(x_start + j * col_width, y_start - i * row_height, col_width, row_height)
-            c.drawString(x_start + j * col_width + 5, y_start - i * row_height + 10, cell)
-
-    # Add overall confidence report as heading and paragraph for video output
-    if overall_confidence_report:
-        heading_font_size = 12
-        paragraph_font_size = 10
-        heading_text = "Overall Confidence Report:"
-        paragraph_text = overall_confidence_report
-
-        # Draw heading
-        c.setFont("Helvetica-Bold", heading_font_size)
-        c.drawString(x_start, y_start - (len(table_data) + 1) * row_height, heading_text)
-
-        # Draw paragraph
-        c.setFont("Helvetica", paragraph_font_size)
-        text_object = c.beginText(x_start, y_start - (len(table_data) + 1.5) * row_height)
-        text_object.textLines(paragraph_text)
-        c.drawText(text_object)
-
-    # Save the PDF
-    c.save()
-    print(mypath)
-    return mypath
 
 @shared_task
-def process(video_name, context):
-    results = {}
-    save_dir = str(OUTPUT_ROOT / video_name)  # Construct the directory path
-    logging.error(f"save dir is: {save_dir}") # Create the directory
-    os.mkdir(save_dir)
+def pipeline_failed(request, exc, traceback, job: dict):
+    print(f"Exception {exc} occurred in task {request.id}")
+    report_progress(None, job["video_name"], "FAILURE", error=str(exc))
+    finish_job(job, "FAILURE")
+
+
+def finish_job(job: dict, status: str):
+    """
+    Persists the final status of a job, releases its idempotency lease and removes its files.
+    """
+    AnalysisJob.objects.filter(videoID=job["video_name"]).update(status=status)
+    job_status.release_lease(redisDB, job["video_name"], job["task_id"])
+    cleanup(job)
+
+
+def cleanup(job: dict):
+    print("removing file")
+    series = [os.path.join(job["save_dir"], name) for name in (audio.SERIES_FILE, video.SERIES_FILE)]
+    for path in (job["audio_path"], job["video_path"], *series):
+        if os.path.exists(path):
+            os.remove(path)
+        try:
+            get_storage().delete(storage_key(path))
+        except Exception as e:
+            logging.error(f"Unable to remove {path} from the storage: {e}")
     try:
-        api_key = gemini.get_key()
-        model = gemini.initialize_model(api_key)
-
-        # Use Path objects to handle paths
-        video_path = str(INPUT_ROOT / f"{video_name}.mp4")
-        audio_output_path = str(OUTPUT_ROOT / video_name / f"{video_name}.wav")
-        print(f"Video path: {video_path}")
-        print(f"Audio output path: {audio_output_path}")
-        
-        audio_file = audio.extract_audio_from_video(video_path, audio_output_path)
-        print(f"Audio file generated: {audio_file}")
-        text = None  # Placeholder for the speech-to-text result
-
-        # Define thread target functions
-        def video_worker():
-            video_result_path = video.analyse(video_path)
-            print(f"Video analysis output path: {video_result_path}")
-            results["video_output"] = video_result_path
-
-        def speech_to_text_worker():
-            nonlocal text  # Use the nonlocal keyword to modify the outer scope variable
-            text = audio.speech_to_text(audio_file)
-            print(f"Speech to text result: {text}")
-
-        def audio_and_gemini_worker():
-            # Wait until the speech-to-text thread finishes
-            speech_to_text_thread.join()
-
-            # Now that we have the text, we can proceed with audio analysis and Gemini report
-            audio_result_path = audio.analyse(audio_output_path, text, save_dir)
-            print(f"Audio analysis output path: {audio_result_path}")
-            gemini_output = gemini.get_report(context, text, model)
-            print(f"Gemini report output: {gemini_output}")
-            results["audio_output"] = audio_result_path
-            results["gemini_output"] = gemini_output
-
-        # Create threads
-        video_thread = threading.Thread(target=video_worker)
-        speech_to_text_thread = threading.Thread(target=speech_to_text_worker)
-        audio_and_gemini_thread = threading.Thread(target=audio_and_gemini_worker)
-
-        # Start video and speech-to-text threads simultaneously
-        video_thread.start()
-        speech_to_text_thread.start()
-
-        # Wait for the speech-to-text thread to finish before starting audio and Gemini thread
-        speech_to_text_thread.join()
-
-        # Start audio and Gemini thread
-        audio_and_gemini_thread.start()
-
-        # Wait for all threads to finish
-        video_thread.join()
-        audio_and_gemini_thread.join()
-
-        print("All threads finished")
-        with open(f"{JSON_LOC}/{video_name}.json", 'w') as file:
-            file.write(json.dumps(results))
-
-        # loc = generate_pdf(
-        #     results=results,
-        #     name=videoID,
-        #     date=time.time(),
-        #     activity="chilling",
-        #     directory=JSON_LOC,
-        #     id=videoID,
-        #     pitch_tone_location=save_dir / "pitch_variation.png",
-        #     energy_location=save_dir / "volume_variation.png",
-        # )
-        # print("pdf made. or not")
-        # respond(loc, videoID, context)
-
+        get_storage().delete(hash_key(storage_key(job["video_path"])))
     except Exception as e:
-        print(f"Exception {e} occurred")
+        logging.error(f"Unable to remove the content hash of {job['video_path']}: {e}")
+    shutil.rmtree(job["save_dir"], ignore_errors=True)
 
-    finally:
-        print("removing file")
-        os.remove(audio_file)
-        os.remove(video_path)
-        shutil.rmtree(save_dir)
 
-@shared_task
-def main(video_file: str, context: str):
+@shared_task(bind=True)
+def main(self, video_file: str, context: str, report_id: str = None):
     video_name = video_file.split(".mp4")[0]
     print(f"Working on {video_name} - {video_name}")
-    st = time.time()
     print("Started processing")
-    process(video_name, context)
-    print(f"Processing time: {time.time() - st}")
+    # the pipeline takes over this task's id, so the id returned to the client tracks the whole job
+    return self.replace(build_pipeline(build_job(video_name, context, report_id, self.request.id)))
@@ -0,0 +1,262 @@
+import json
+import os
+import tempfile
+import wave
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..dependencies.audio_analysis import audio
+from ..dependencies.audio_analysis.timeline import Segment, Timeline, summarise
+
+SAMPLE_RATE = 16000
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE, channels=1):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm.tobytes())
+    return path
+
+
+class AudioEnergyTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_load_pcm_mixes_channels(self):
+        stereo = np.tile([0.5, -0.5], SAMPLE_RATE)
+        path = write_wav(os.path.join(self.directory, "stereo.wav"), stereo, channels=2)
+        samples, sample_rate = audio.load_pcm(path)
+        self.assertEqual(sample_rate, SAMPLE_RATE)
+        self.assertEqual(len(samples), SAMPLE_RATE)
+        self.assertTrue(np.allclose(samples, 0, atol=1e-4))
+
+    def test_rms_envelope_in_dbfs(self):
+        t = np.arange(SAMPLE_RATE * 2) / SAMPLE_RATE
+        tone = np.sin(2 * np.pi * 440 * t)
+        signal = np.concatenate([tone, 0.01 * tone, np.zeros(SAMPLE_RATE)])
+        times, dbfs = audio.rms_envelope(signal, SAMPLE_RATE)
+
+        self.assertEqual(len(dbfs), 50)
+        self.assertAlmostEqual(times[1], 0.1)
+        # a full scale sine has an RMS of 1/sqrt(2), -3 dBFS, and -40 dB below that at 1%
+        self.assertAlmostEqual(dbfs[0], -3.01, places=1)
+        self.assertAlmostEqual(dbfs[25], -43.01, places=1)
+        self.assertEqual(dbfs[-1], audio.SILENCE_DBFS)
+
+    def test_volume_thresholds(self):
+        self.assertEqual(audio.analyze_volume_energy(np.full(10, -5.0)), "High volume and energy")
+        self.assertEqual(audio.analyze_volume_energy(np.full(10, -15.0)), "Moderate volume and energy")
+        self.assertEqual(audio.analyze_volume_energy(np.full(10, -30.0)), "Low volume and energy")
+        self.assertEqual(audio.analyze_volume_energy(np.zeros(0)), "Low volume and energy")
+
+    def test_volume_energy_ignores_pauses(self):
+        speech_with_pauses = np.concatenate([np.full(10, -15.0), np.full(10, audio.SILENCE_DBFS)])
+        self.assertEqual(audio.analyze_volume_energy(speech_with_pauses), "Moderate volume and energy")
+        self.assertEqual(audio.analyze_volume_energy(np.full(10, audio.SILENCE_DBFS)), "Low volume and energy")
+
+    def test_context_matches_envelope(self):
+        t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+        path = write_wav(os.path.join(self.directory, "tone.wav"), 0.5 * np.sin(2 * np.pi * 220 * t))
+        context = audio.AudioContext(path)
+        self.assertAlmostEqual(context.duration, 1.0)
+        times, dbfs = context.volume
+        self.assertIs(context.volume, context.volume)
+        self.assertTrue(np.allclose(dbfs, -9.03, atol=0.05))
+
+
+class AudioPitchTestCase(SimpleTestCase):
+    def test_variation_ignores_unvoiced_frames(self):
+        # a steady 150 Hz voice broken by pauses is not a varied one
+        steady = np.tile([150.0, 152.0, 0.0, 0.0], 100)
+        self.assertEqual(audio.analyze_pitch_and_tone(steady), "Low variations")
+        varied = np.tile([100.0, 250.0, 0.0], 100)
+        self.assertEqual(audio.analyze_pitch_and_tone(varied), "High variations")
+        self.assertEqual(audio.analyze_pitch_and_tone(np.zeros(10)), "Low variations")
+
+    @patch("api.dependencies.audio_analysis.audio.extract_pitch")
+    @patch("api.dependencies.audio_analysis.audio.load_pcm")
+    def test_pitch_extracted_once_per_context(self, mock_load, mock_extract):
+        mock_load.return_value = (np.zeros(SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE)
+        mock_extract.return_value = (np.arange(3) * 0.02, np.array([0.0, 120.0, 130.0]))
+        context = audio.AudioContext("unused.wav", pitch_time_step=0.02, pitch_sample_rate=8000)
+
+        self.assertEqual(context.pitch[1][1], 120.0)
+        self.assertIs(context.pitch, context.pitch)
+        mock_extract.assert_called_once()
+        self.assertEqual(mock_extract.call_args.args[1:], (SAMPLE_RATE, 0.02, 8000))
+
+
+class AudioToneTestCase(SimpleTestCase):
+    def setUp(self):
+        audio.get_sentiment_analyzer.cache_clear()
+
+    def tearDown(self):
+        audio.get_sentiment_analyzer.cache_clear()
+
+    @patch("api.dependencies.audio_analysis.audio.SentimentIntensityAnalyzer")
+    def test_analyzer_loaded_once(self, mock_analyzer):
+        scores = {"great talk": 0.8, "awful talk": -0.7, "a talk": 0.0}
+        mock_analyzer.return_value.polarity_scores.side_effect = lambda text: {"compound": scores[text]}
+
+        self.assertEqual(
+            audio.analyze_tones(["great talk", "awful talk", "a talk"]),
+            ["Positive tone", "Negative tone", "Neutral tone"],
+        )
+        self.assertEqual(audio.analyze_tone("great talk"), "Positive tone")
+        mock_analyzer.assert_called_once_with()
+
+
+class AudioPauseTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        t = np.arange(SAMPLE_RATE * 10) / SAMPLE_RATE
+        speech = 0.3 * np.sin(2 * np.pi * 200 * t)
+        silence = np.zeros_like(speech)
+        # 0.5 s lead-in, 1 s and 1.5 s pauses, a 0.3 s gap too short to count and a trailing silence
+        spans = [(silence, 0.5), (speech, 2), (silence, 1), (speech, 2), (silence, 0.3), (speech, 1), (silence, 1.5),
+                 (speech, 1), (silence, 2)]
+        signal = np.concatenate([source[: int(seconds * SAMPLE_RATE)] for source, seconds in spans])
+        self.path = write_wav(os.path.join(self.directory, "speech.wav"), signal)
+
+    def test_silence_intervals(self):
+        pauses, duration = audio.detect_silences(self.path, block_seconds=0.7)
+        self.assertAlmostEqual(duration, 11.3, places=1)
+        self.assertEqual(len(pauses), 2)
+        for (start, end), (expected_start, expected_end) in zip(pauses, [(2.5, 3.5), (6.8, 8.3)]):
+            self.assertAlmostEqual(start, expected_start, delta=2 * audio.PAUSE_WINDOW)
+            self.assertAlmostEqual(end, expected_end, delta=2 * audio.PAUSE_WINDOW)
+
+    def test_block_size_does_not_change_result(self):
+        self.assertEqual(
+            audio.detect_silences(self.path, block_seconds=0.07),
+            audio.detect_silences(self.path, block_seconds=60),
+        )
+
+    def test_pause_statistics(self):
+        pauses = audio.detect_pauses(self.path)
+        self.assertEqual(pauses["count"], 2)
+        self.assertAlmostEqual(pauses["longest"], 1.5, delta=2 * audio.PAUSE_WINDOW)
+        self.assertAlmostEqual(pauses["mean"], 1.25, delta=2 * audio.PAUSE_WINDOW)
+        self.assertAlmostEqual(pauses["ratio"], 2.5 / 11.3, delta=0.01)
+
+
+class AudioClarityTestCase(SimpleTestCase):
+    def _syllables(self, sample_rate, noise):
+        # 200 ms voiced syllables with 100 ms pauses, over a white noise background
+        t = np.arange(sample_rate * 3) / sample_rate
+        speech = 0.3 * np.sin(2 * np.pi * 200 * t) * ((t % 0.3) < 0.2)
+        return speech + noise * np.random.default_rng(0).normal(size=len(t))
+
+    def test_clarity_at_native_rate(self):
+        for sample_rate in (16000, 48000):
+            self.assertEqual(audio.analyze_clarity(self._syllables(sample_rate, 0.0), sample_rate), "High clarity")
+            self.assertEqual(audio.analyze_clarity(self._syllables(sample_rate, 0.02), sample_rate), "Moderate clarity")
+            self.assertEqual(audio.analyze_clarity(self._syllables(sample_rate, 0.1), sample_rate), "Low clarity")
+
+
+class AudioTimelineTestCase(SimpleTestCase):
+    def setUp(self):
+        self.timeline = Timeline(
+            duration=150.0,
+            segments=[
+                Segment(0.0, 30.0, " ".join(["word"] * 60)),
+                Segment(32.0, 62.0, "um so " + " ".join(["word"] * 58)),
+                Segment(125.0, 135.0, "like a closing line"),
+            ],
+            pauses=[(30.0, 32.0), (62.0, 125.0), (135.0, 136.0)],
+        )
+
+    def test_summarise(self):
+        speech = summarise(self.timeline)
+        self.assertEqual(speech["words"], 124)
+        self.assertEqual(speech["fillers"], 2)
+        self.assertAlmostEqual(speech["speech_rate"], 124 / 2.5)
+        self.assertAlmostEqual(speech["filler_density"], 200 / 124)
+        # the second segment ends 2 s into the second minute, the last bucket is 30 s long
+        self.assertEqual(speech["pauses_per_bucket"], [1, 1, 1])
+        self.assertEqual(len(speech["words_per_minute"]), 3)
+        self.assertAlmostEqual(speech["words_per_minute"][2], 4 * 2)
+        self.assertEqual(audio.analyze_pace(speech["speech_rate"]), "Slow pace")
+
+    def test_round_trip(self):
+        self.assertEqual(Timeline.from_dict(json.loads(json.dumps(self.timeline.to_dict()))), self.timeline)
+
+    def test_speech_spans(self):
+        spans = audio.speech_spans([(10.0, 12.0)], 80.0, max_segment=30.0)
+        self.assertEqual(spans, [(0.0, 10.0), (12.0, 34.667), (34.667, 57.333), (57.333, 80.0)])
+
+    def test_speech_spans_merge_short_pauses(self):
+        # a pause every 4 seconds, the spans group the speech between them up to max_segment
+        pauses = [(start, start + 0.6) for start in np.arange(3.4, 96, 4.0)]
+        spans = audio.speech_spans(pauses, 100.0, max_segment=30.0)
+        self.assertEqual(len(spans), 4)
+        self.assertTrue(all(end - start <= 30.0 for start, end in spans))
+        self.assertEqual((spans[0][0], spans[-1][1]), (0.0, 100.0))
+        pause_ends = {round(end, 3) for _, end in pauses}
+        self.assertTrue(all(start in pause_ends for start, _ in spans[1:]))
+
+    def test_failed_spans_are_left_out_of_the_rates(self):
+        timeline = Timeline(
+            duration=110.0,
+            segments=[Segment(0.0, 60.0, " ".join(["word"] * 120))],
+            failed=[(60.0, 110.0)],
+        )
+        speech = summarise(timeline)
+        self.assertTrue(timeline.partial)
+        self.assertAlmostEqual(speech["speech_rate"], 120.0)
+        self.assertEqual(speech["transcribed_per_bucket"], [60.0, 0.0])
+        self.assertEqual(speech["words_per_minute"], [120.0, 0.0])
+        self.assertEqual(Timeline.from_dict(timeline.to_dict()), timeline)
+
+    @patch("api.dependencies.audio_analysis.audio.time.sleep")
+    def test_recognize_segment_retries(self, mock_sleep):
+        class RequestError(Exception):
+            pass
+
+        recognizer = MagicMock()
+        stand_in = SimpleNamespace(Recognizer=lambda: recognizer, UnknownValueError=KeyError, RequestError=RequestError)
+        with patch("api.dependencies.audio_analysis.audio.sr", stand_in):
+            recognizer.recognize_google.side_effect = [RequestError("503"), "hello"]
+            self.assertEqual(audio.recognize_segment("clip", retries=2, retry_delay=1.0), "hello")
+            recognizer.recognize_google.side_effect = RequestError("503")
+            self.assertIsNone(audio.recognize_segment("clip", retries=2, retry_delay=1.0))
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [1.0, 1.0, 2.0])
+
+    @patch("api.dependencies.audio_analysis.audio.recognize_segment")
+    def test_failed_spans_are_marked(self, mock_recognize):
+        directory = tempfile.mkdtemp()
+        t = np.arange(SAMPLE_RATE * 2) / SAMPLE_RATE
+        speech = 0.3 * np.sin(2 * np.pi * 200 * t)
+        path = write_wav(os.path.join(directory, "speech.wav"), np.concatenate([speech, np.zeros(SAMPLE_RATE), speech]))
+
+        mock_recognize.side_effect = ["hello there", None]
+        timeline = audio.transcribe_timeline(path, max_segment=2.5)
+        self.assertEqual(timeline.text, "hello there")
+        self.assertEqual(len(timeline.failed), 1)
+        self.assertAlmostEqual(timeline.failed[0][0], 3.0, delta=0.05)
+
+        mock_recognize.side_effect = [None, None]
+        with self.assertRaises(audio.TranscriptionError):
+            audio.transcribe_timeline(path, max_segment=2.5)
+
+    @patch("api.dependencies.audio_analysis.audio.recognize_segment")
+    def test_transcribe_timeline(self, mock_recognize):
+        directory = tempfile.mkdtemp()
+        t = np.arange(SAMPLE_RATE * 2) / SAMPLE_RATE
+        speech = 0.3 * np.sin(2 * np.pi * 200 * t)
+        path = write_wav(os.path.join(directory, "speech.wav"), np.concatenate([speech, np.zeros(SAMPLE_RATE), speech]))
+        mock_recognize.side_effect = ["hello there", "goodbye"]
+
+        # spans shorter than the audio keep the two stretches of speech apart
+        timeline = audio.transcribe_timeline(path, max_segment=2.5)
+        self.assertEqual(timeline.text, "hello there goodbye")
+        self.assertEqual(len(timeline.pauses), 1)
+        clips = [call.args[0] for call in mock_recognize.call_args_list]
+        self.assertAlmostEqual(len(clips[0].frame_data) / 2 / SAMPLE_RATE, 2.0, delta=0.05)
+        self.assertAlmostEqual(timeline.segments[1].start, 3.0, delta=0.05)
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from benchmarks import fixtures, run
+from ..dependencies.audio_analysis import audio
+
+
+def crash(*args):
+    os._exit(3)
+
+
+def hang(*args):
+    time.sleep(60)
+
+
+class BenchmarkTestCase(SimpleTestCase):
+    def test_synthetic_audio_has_pauses(self):
+        path = fixtures.synthetic_audio(os.path.join(tempfile.mkdtemp(), "bench.wav"), 20, sample_rate=16000)
+        pauses, duration = audio.detect_silences(path)
+        self.assertAlmostEqual(duration, 20, delta=0.1)
+        self.assertGreater(len(pauses), 1)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"stages": {"render_pdf": {"p50": 1.0, "p90": 1.2, "peak_rss_mb": 100}, "transcribe": {"p50": 1.0}}}
+        results = {"stages": {"render_pdf": {"p50": 1.1, "p90": 1.6, "peak_rss_mb": 100}}}
+        self.assertEqual(run.compare(results, baseline, 0.2), ["render_pdf: p90 1.6 exceeds baseline 1.2"])
+        results["stages"]["render_pdf"] = {"error": "ValueError: broken"}
+        self.assertEqual(run.compare(results, baseline, 0.2), ["render_pdf: ValueError: broken"])
+
+    def test_failed_stage_process_is_reported(self):
+        fixtures = {"duration": 1.0}
+        self.assertIn("exited with code", run.measure("render_pdf", fixtures, 1, 0, target=crash)["error"])
+        self.assertIn("timed out", run.measure("render_pdf", fixtures, 1, 0, timeout=1.0, target=hang)["error"])
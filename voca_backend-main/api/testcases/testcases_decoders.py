@@ -0,0 +1,39 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from django.test import SimpleTestCase
+
+from benchmarks import fixtures
+from ..dependencies.video_analysis import decoders, video
+
+
+@unittest.skipUnless(decoders.available(), "PyAV is not installed")
+class PyAVDecoderTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.path = fixtures.synthetic_video(os.path.join(tempfile.mkdtemp(), "clip.mp4"), 2, 160, 120, 10)
+
+    def test_same_frames_as_opencv(self):
+        expected = [(index, round(timestamp, 3), frame.shape) for index, timestamp, frame in video.read_frames(self.path)]
+        actual = [
+            (index, round(timestamp, 3), frame.shape)
+            for index, timestamp, frame in video.read_frames(self.path, decoder="pyav")
+        ]
+        self.assertEqual(actual, expected)
+
+    def test_closing_early_stops_the_producer(self):
+        threads = threading.active_count()
+        frames = decoders.read_frames_pyav(self.path, 1, queue_size=1)
+        next(frames)
+        frames.close()
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_decode_errors_are_raised(self):
+        with self.assertRaises(Exception):
+            list(decoders.read_frames_pyav(os.path.join(tempfile.mkdtemp(), "missing.mp4"), 2))
+
+    def test_analysis_with_pyav(self):
+        self.assertEqual(video.analyse(self.path, decoder="pyav").keys(), video.analyse(self.path).keys())
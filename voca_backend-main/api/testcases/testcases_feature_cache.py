@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from .. import tasks
+from ..dependencies.feature_cache import feature_cache
+
+
+class FeatureCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def _age(self, key, seconds):
+        path = feature_cache.entry_dir(self.root, key)
+        os.utime(path, (seconds, seconds))
+
+    def test_content_hash(self):
+        path = os.path.join(self.root, "video.mp4")
+        with open(path, "wb") as file:
+            file.write(b"frame" * 100000)
+        self.assertEqual(feature_cache.content_hash(path, chunk_size=4096), feature_cache.content_hash(path))
+        self.assertEqual(len(feature_cache.content_hash(path)), 64)
+
+    def test_json_round_trip(self):
+        self.assertIsNone(feature_cache.load(self.root, "abc", "timeline"))
+        feature_cache.store(self.root, "abc", "timeline", {"duration": 12.5, "segments": []})
+        self.assertEqual(feature_cache.load(self.root, "abc", "timeline"), {"duration": 12.5, "segments": []})
+
+    def test_corrupt_entry_is_a_miss(self):
+        feature_cache.store(self.root, "abc", "timeline", {"duration": 12.5})
+        path = feature_cache.entry_dir(self.root, "abc") / "timeline.json"
+        path.write_bytes(b'{"duration": 12')
+        with self.assertLogs(level="ERROR"):
+            self.assertIsNone(feature_cache.load(self.root, "abc", "timeline"))
+        self.assertFalse(path.exists())
+
+    def test_cache_name_follows_the_settings(self):
+        with override_settings(VIDEO_QUALITY="full"):
+            full = tasks.cache_name("video")
+            self.assertEqual(tasks.cache_name("video"), full)
+        with override_settings(VIDEO_QUALITY="fast"):
+            self.assertNotEqual(tasks.cache_name("video"), full)
+        self.assertNotEqual(tasks.cache_name("gemini", "interview"), tasks.cache_name("gemini", "pitch"))
+
+    def test_arrays_round_trip(self):
+        source = os.path.join(self.root, "series.npz")
+        np.savez(source, pitch=np.arange(5.0))
+        feature_cache.store_arrays(self.root, "abc", "audio", source)
+
+        destination = os.path.join(self.root, "restored.npz")
+        self.assertTrue(feature_cache.load_arrays(self.root, "abc", "audio", destination))
+        with np.load(destination) as restored:
+            self.assertTrue(np.array_equal(restored["pitch"], np.arange(5.0)))
+        self.assertFalse(feature_cache.load_arrays(self.root, "missing", "audio", destination))
+
+    def test_evicts_least_recently_used(self):
+        for i, key in enumerate(["old", "used", "new"]):
+            feature_cache.store(self.root, key, "audio", {"padding": "x" * 1000})
+            self._age(key, 1000 + i)
+        # reading an entry makes it the most recently used
+        feature_cache.load(self.root, "used", "audio")
+
+        removed = feature_cache.evict(self.root, max_bytes=2500)
+        self.assertEqual(removed, ["old"])
+        self.assertIsNotNone(feature_cache.load(self.root, "used", "audio"))
+        self.assertEqual(feature_cache.evict(self.root, max_bytes=2500), [])
@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import tempfile
+from queue import Empty
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from benchmarks import fixtures
+from ..dependencies.video_analysis import video
+from ..dependencies.video_analysis.frame_ring import FrameRing
+
+
+def _sum_frames(ring, tasks, results):
+    while (slot := tasks.get()) is not None:
+        results.put(int(ring.view(slot).sum()))
+        ring.release(slot)
+    ring.close()
+
+
+class FrameRingTestCase(SimpleTestCase):
+    def setUp(self):
+        self.context = multiprocessing.get_context("spawn")
+
+    def test_frames_reach_another_process(self):
+        ring = FrameRing(2, (4, 6, 3), self.context.Queue())
+        tasks, results = self.context.Queue(), self.context.Queue()
+        process = self.context.Process(target=_sum_frames, args=(ring, tasks, results))
+        process.start()
+        try:
+            sums = []
+            for value in range(1, 6):
+                slot = ring.acquire(timeout=10)
+                ring.write(slot, np.full((4, 6, 3), value, dtype=np.uint8))
+                tasks.put(slot)
+                sums.append(results.get(timeout=10))
+            tasks.put(None)
+            process.join(timeout=10)
+        finally:
+            ring.close()
+        self.assertEqual(sums, [value * 72 for value in range(1, 6)])
+
+    def test_acquire_blocks_while_every_slot_is_in_use(self):
+        ring = FrameRing(2, (2, 2), self.context.Queue())
+        try:
+            first, second = ring.acquire(timeout=1), ring.acquire(timeout=1)
+            with self.assertRaises(Empty):
+                ring.acquire(timeout=0.2)
+            ring.release(first)
+            self.assertEqual(ring.acquire(timeout=1), first)
+            self.assertNotEqual(first, second)
+        finally:
+            ring.close()
+
+    def test_parallel_analysis_matches_single_process(self):
+        path = fixtures.synthetic_video(os.path.join(tempfile.mkdtemp(), "clip.mp4"), 1, 160, 120, 10)
+        self.assertEqual(video.analyse(path, processes=2), video.analyse(path))
+
+    def test_failing_workers_fail_the_analysis(self):
+        # more frames than ring slots, the decoder has to notice the workers are gone
+        frames = ((index, index / 10, np.zeros((24, 32, 3), dtype=np.uint8)) for index in range(40))
+        with self.assertRaisesRegex(RuntimeError, "Video analysis process failed"):
+            video.analyse_parallel(frames, 2, model="bogus")
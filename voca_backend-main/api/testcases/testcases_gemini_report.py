@@ -0,0 +1,153 @@
+import json
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from benchmarks import stubs
+
+from ..dependencies.geminiAPI import gemini
+from ..dependencies.geminiAPI.gemini_exceptions import ReportValidationError
+from ..dependencies.geminiAPI.gemini_prompt import build_prompts, chunk_transcript, estimate_tokens
+from ..dependencies.geminiAPI.gemini_report import GeminiReport, merge_reports, parse_report
+from ..dependencies.report_generation import pdf
+
+
+class GeminiReportTestCase(SimpleTestCase):
+    def setUp(self):
+        self.valid_report = {
+            "grammatical_errors": [
+                {"error": "He go to school", "correction": "He goes to school"}
+            ],
+            "relevance": {"percentage": 85, "non_relevant_parts": ["The weather"]},
+            "repetition": [],
+            "vocabulary": ["Good range of words"],
+            "strengths": ["Clear structure"],
+            "weaknesses": ["Speak a little slower"],
+            "summary": "A short talk about school.",
+            "grade": 7,
+        }
+
+    def test_valid_report(self):
+        report = parse_report(json.dumps(self.valid_report))
+        self.assertIsInstance(report, GeminiReport)
+        self.assertEqual(report.relevance.percentage, 85)
+        self.assertEqual(report.grammatical_errors[0].correction, "He goes to school")
+        self.assertEqual(report.grade, 7)
+
+    def test_round_trip(self):
+        report = parse_report(json.dumps(self.valid_report))
+        self.assertEqual(GeminiReport.from_dict(report.to_dict()), report)
+
+    def test_invalid_json(self):
+        with self.assertRaises(ReportValidationError):
+            parse_report("**Grammatical Errors**\n- none")
+
+    def test_missing_field(self):
+        del self.valid_report["summary"]
+        with self.assertRaises(ReportValidationError):
+            parse_report(json.dumps(self.valid_report))
+
+    def test_percentage_out_of_range(self):
+        self.valid_report["relevance"]["percentage"] = 140
+        with self.assertRaises(ReportValidationError):
+            parse_report(json.dumps(self.valid_report))
+
+    def test_wrong_list_type(self):
+        self.valid_report["strengths"] = "Clear structure"
+        with self.assertRaises(ReportValidationError):
+            parse_report(json.dumps(self.valid_report))
+
+    def test_unavailable_report(self):
+        report = GeminiReport.unavailable("Can not generate report")
+        self.assertIsNone(report.grade)
+        self.assertEqual(report.summary, "Can not generate report")
+
+
+class PromptBudgetTestCase(SimpleTestCase):
+    def setUp(self):
+        self.context = "Introduce yourself"
+        self.transcript = " ".join(f"This is sentence number {i}." for i in range(2000))
+
+    def test_short_transcript_single_prompt(self):
+        prompts = build_prompts(self.context, "Hello, my name is Test.", token_budget=8000)
+        self.assertEqual(len(prompts), 1)
+
+    def test_long_transcript_within_budget(self):
+        prompts = build_prompts(self.context, self.transcript, token_budget=2000, max_chunks=100)
+        self.assertGreater(len(prompts), 1)
+        for prompt, _ in prompts:
+            self.assertLessEqual(estimate_tokens(prompt), 2000)
+
+    def test_chunks_keep_all_content(self):
+        chunks = chunk_transcript(self.transcript, 500)
+        self.assertEqual(" ".join(chunks), self.transcript)
+
+    def test_unpunctuated_transcript(self):
+        chunks = chunk_transcript("word " * 5000, 100)
+        self.assertTrue(all(estimate_tokens(chunk) <= 100 for chunk in chunks))
+
+    def test_chunk_cap(self):
+        prompts = build_prompts(self.context, self.transcript, token_budget=2000, max_chunks=3)
+        self.assertEqual(len(prompts), 3)
+        # adjacent chunks share a prompt, none of the transcript is left out
+        self.assertEqual(sum(weight for _, weight in prompts) + 2, len(self.transcript))
+        for i in (0, 999, 1999):
+            self.assertEqual(sum(f"number {i}." in prompt for prompt, _ in prompts), 1)
+
+    def test_budget_too_small(self):
+        with self.assertRaises(ValueError):
+            build_prompts(self.context, self.transcript, token_budget=10)
+
+    def test_merge_reports(self):
+        first = GeminiReport.unavailable("First part.")
+        first.grade, first.relevance.percentage, first.strengths = 8, 100, ["Clear"]
+        second = GeminiReport.unavailable("Second part.")
+        second.grade, second.relevance.percentage, second.strengths = 4, 50, ["Clear", "Calm"]
+
+        merged = merge_reports([(first, 300), (second, 100)])
+        self.assertEqual(merged.grade, 7)
+        self.assertEqual(merged.relevance.percentage, 88)
+        self.assertEqual(merged.strengths, ["Clear", "Calm"])
+        self.assertEqual(merged.summary, "First part. Second part.")
+
+
+class FailingChunkModel(stubs.StubModel):
+    """Answers like the stub model, except for the prompts of the given parts."""
+
+    def __init__(self, failing_parts):
+        self.failing_parts = failing_parts
+
+    def generate_content(self, prompt, generation_config=None):
+        if any(f"part {index} of" in prompt for index in self.failing_parts):
+            return SimpleNamespace(text="")
+        return super().generate_content(prompt, generation_config)
+
+
+class ChunkedReportTestCase(SimpleTestCase):
+    def setUp(self):
+        self.transcript = " ".join(f"This is sentence number {i}." for i in range(2000))
+
+    def test_failed_chunk_is_left_out(self):
+        report = gemini.get_report("Introduce yourself", self.transcript, FailingChunkModel([2]), 2000, 4, 2)
+        self.assertEqual(report.grade, stubs.STUB_REPORT["grade"])
+        self.assertEqual(report.reported_parts, 3)
+        self.assertTrue(report.partial)
+
+    def test_every_chunk_failing_is_unavailable(self):
+        report = gemini.get_report("Introduce yourself", self.transcript, FailingChunkModel(range(1, 5)), 2000, 4)
+        self.assertIsNone(report.grade)
+
+    def test_capped_report_is_complete(self):
+        report = gemini.get_report("Introduce yourself", self.transcript, stubs.StubModel(), 2000, 3)
+        self.assertEqual((report.reported_parts, report.total_parts), (3, 3))
+        self.assertFalse(report.partial)
+
+    def test_partial_report_is_noted(self):
+        report = gemini.get_report("Introduce yourself", self.transcript, FailingChunkModel([2]), 2000, 3)
+        self.assertEqual((report.reported_parts, report.total_parts), (2, 3))
+        self.assertIn("parts of the transcript", pdf.report_sections(report)[6][1][-1])
+
+    def test_complete_report_is_not_partial(self):
+        report = gemini.get_report("Introduce yourself", self.transcript, stubs.StubModel(), 2000, 100)
+        self.assertFalse(report.partial)
+        self.assertEqual(pdf.report_sections(report)[6][1], [report.summary])
@@ -0,0 +1,9 @@
+from django.test import SimpleTestCase
+
+from benchmarks import imports
+
+
+class WebImportTestCase(SimpleTestCase):
+    def test_web_process_does_not_import_analysis_stack(self):
+        result = imports.measure()
+        self.assertEqual(result["analysis_modules"], [])
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+import wave
+
+from django.test import SimpleTestCase
+
+from benchmarks import fixtures
+from ..dependencies.media_ingest import ingest
+from ..dependencies.video_analysis import video
+
+try:
+    import av  # noqa: F401
+except ImportError:
+    av = None
+
+
+@unittest.skipIf(av is None, "PyAV is not installed")
+class IngestTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.recording = fixtures.synthetic_recording(os.path.join(cls.directory, "rec.mp4"), 2, 160, 120, 10)
+
+    def test_audio_and_frames_in_one_pass(self):
+        audio_path = os.path.join(self.directory, "rec.wav")
+        frames = ingest.ingest(self.recording, audio_path, lambda frames: [(i, t) for i, t, _ in frames])
+
+        with wave.open(audio_path, "rb") as wf:
+            self.assertEqual(wf.getframerate(), ingest.AUDIO_SAMPLE_RATE)
+            self.assertEqual(wf.getnchannels(), 2)
+            self.assertAlmostEqual(wf.getnframes() / wf.getframerate(), 2, delta=0.1)
+
+        # the same frames OpenCV hands to the analysis
+        self.assertEqual([i for i, _ in frames], [i for i, _, _ in video.read_frames(self.recording)])
+        self.assertAlmostEqual(frames[1][1], 0.2, places=3)
+
+    def test_audio_only(self):
+        audio_path = os.path.join(self.directory, "audio_only.wav")
+        self.assertIsNone(ingest.ingest(self.recording, audio_path))
+        self.assertTrue(os.path.getsize(audio_path) > 0)
+
+    def test_consumer_error_is_raised(self):
+        def analyse_frames(frames):
+            next(iter(frames))
+            raise RuntimeError("inference failed")
+
+        with self.assertRaisesMessage(RuntimeError, "inference failed"):
+            ingest.ingest(self.recording, os.path.join(self.directory, "failed.wav"), analyse_frames)
@@ -0,0 +1,40 @@
+from unittest.mock import patch
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+
+class JobStatusTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("jobstatus", args=["video123"])
+
+    @patch("api.Views.jobstatus.job_status.get_status")
+    def test_known_job(self, mock_get_status):
+        mock_get_status.return_value = {
+            "stage": "ANALYSING_AUDIO",
+            "progress": 50,
+            "task_id": "task123",
+        }
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["videoID"], "video123")
+        self.assertEqual(response.json()["stage"], "ANALYSING_AUDIO")
+        self.assertEqual(response.json()["progress"], 50)
+
+    @patch("api.Views.jobstatus.job_status.get_status")
+    def test_unknown_job(self, mock_get_status):
+        mock_get_status.return_value = None
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "Unknown job"})
+
+    @patch("api.Views.jobstatus.job_status.get_status")
+    def test_redis_unavailable(self, mock_get_status):
+        mock_get_status.side_effect = ConnectionError("redis down")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()["error"], "Could not process request")
@@ -0,0 +1,110 @@
+import os
+import tempfile
+
+import numpy as np
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from ..dependencies.geminiAPI.gemini_report import GeminiReport
+from ..dependencies.report_generation import charts, pdf
+
+
+class ReportPdfTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.results = {
+            "video_output": {
+                "Body Posture Rating": "Good",
+                "Overall Confidence Report": "You are doing well overall.",
+            },
+            "audio_output": {"Fluency": "Fluent"},
+            "gemini_output": GeminiReport.unavailable("A short talk.").to_dict(),
+        }
+        self.series = os.path.join(self.directory, "audio_series.npz")
+        times = np.linspace(0, 60, 6000)
+        np.savez(
+            self.series,
+            pitch_times=times,
+            pitch=np.where(np.sin(times) > 0, 120 + 40 * np.sin(times * 3), 0),
+            volume_times=times,
+            volume=np.abs(np.sin(times)) * 3000,
+        )
+
+    def _render(self, id):
+        path = pdf.generate_pdf(
+            results=self.results,
+            name="test",
+            date="2025-01-01",
+            activity="interview",
+            directory=self.directory,
+            id=id,
+            series_location=self.series,
+        )
+        with open(path, "rb") as file:
+            return file.read()
+
+    def test_identical_inputs_give_identical_bytes(self):
+        self.assertEqual(self._render("first"), self._render("second"))
+
+    def test_charts_are_vector_forms(self):
+        # the logo is the only raster image, the charts are forms drawn once and placed three times
+        data = self._render("report")
+        self.assertEqual(data.count(b"/Subtype /Image"), 1)
+        self.assertEqual(data.count(b"/Subtype /Form"), 3)
+
+    def test_audio_table_stays_on_the_page(self):
+        self.results["audio_output"] = {f"Metric {i}": "value" for i in range(14)}
+        tables = []
+
+        def draw_table(c, table_data, x_start, y_start, col_width, row_height):
+            bottom = draw(c, table_data, x_start, y_start, col_width, row_height)
+            tables.append((len(table_data), y_start + row_height, bottom))
+            return bottom
+
+        draw = pdf.draw_table
+        with patch.object(pdf, "draw_table", draw_table):
+            self._render("report")
+        rows, top, bottom = tables[0]
+        self.assertEqual(rows, 15)
+        self.assertLessEqual(top, pdf.AUDIO_TABLE_TOP)
+        # the last row ends above the page number, up to rounding
+        self.assertGreaterEqual(bottom, pdf.TABLE_BOTTOM - 1e-6)
+
+    def test_downsample_keeps_peaks(self):
+        times = np.arange(10000) / 100
+        values = np.zeros(10000)
+        values[1234] = 5
+        ds_times, ds_values = charts.downsample(times, values, max_points=100)
+        self.assertEqual(len(ds_values), 100)
+        self.assertEqual(ds_values.max(), 5)
+
+    def test_only_statics_are_cached(self):
+        pdf._read_static_image.cache_clear()
+        self.assertIsNotNone(pdf.load_image(pdf.LOGO_PATH))
+        job_image = os.path.join(self.directory, "chart.jpg")
+        with open(pdf.LOGO_PATH, "rb") as logo, open(job_image, "wb") as file:
+            file.write(logo.read())
+        self.assertIsNotNone(pdf.load_image(job_image))
+        self.assertEqual(pdf._read_static_image.cache_info().currsize, 1)
+
+    def test_downsample_keeps_the_end(self):
+        times = np.arange(799) / 10
+        values = np.zeros(799)
+        values[-1] = 5
+        ds_times, ds_values = charts.downsample(times, values)
+        self.assertEqual(len(ds_values), charts.MAX_POINTS)
+        self.assertEqual(ds_values[-1], 5)
+        self.assertGreater(ds_times[-1], 79.5)
+
+    def test_missing_graph(self):
+        path = pdf.generate_pdf(
+            results=self.results,
+            name="test",
+            date="2025-01-01",
+            activity="interview",
+            directory=self.directory,
+            id="missing",
+            series_location=os.path.join(self.directory, "missing.npz"),
+        )
+        self.assertTrue(os.path.exists(path))
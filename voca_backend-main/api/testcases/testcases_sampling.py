@@ -0,0 +1,54 @@
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from benchmarks import fixtures
+from ..dependencies.video_analysis import sampling, video
+
+
+class SamplingTestCase(SimpleTestCase):
+    def test_stratified_order_covers_every_position(self):
+        order = list(sampling.stratified_order(100))
+        self.assertEqual(sorted(order), list(range(100)))
+        # the first 2^k positions are spread evenly, 100 / 2^k apart
+        self.assertEqual(sorted(order[:8]), [0, 12, 25, 37, 50, 62, 75, 87])
+        self.assertEqual(list(sampling.stratified_order(1)), [0])
+        self.assertEqual(list(sampling.stratified_order(0)), [])
+
+    def test_half_width(self):
+        rng = np.random.default_rng(0)
+        values = rng.uniform(0.8, 1.0, size=400)
+        self.assertLess(sampling.half_width(values, 100000), sampling.half_width(values[:100], 100000))
+        # sampling the whole population leaves no uncertainty
+        self.assertEqual(sampling.half_width(values, 400), 0.0)
+        # identical samples are not taken for certainty
+        self.assertGreater(sampling.half_width(np.zeros(10), 100000), 0.1)
+
+    def test_converged(self):
+        confidences = np.full(sampling.MIN_SAMPLES - 1, 0.9)
+        self.assertFalse(sampling.converged([False] * len(confidences), confidences, 100000, 0.5))
+        confidences = np.full(2000, 0.9)
+        self.assertTrue(sampling.converged([False] * 2000, confidences, 100000, 0.05))
+        self.assertFalse(sampling.converged([False] * 2000, confidences, 100000, 0.0001))
+
+
+class SampledVideoTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.path = fixtures.synthetic_video(os.path.join(tempfile.mkdtemp(), "clip.mp4"), 60, 160, 120, 10)
+
+    def test_read_frames_at_matches_sequential_decode(self):
+        sequential = {index: frame for index, _, frame in video.read_frames(self.path)}
+        for index, timestamp, frame in video.read_frames_at(self.path, [500, 2, 4, 300]):
+            self.assertAlmostEqual(timestamp, index / 10)
+            self.assertTrue(np.array_equal(frame, sequential[index]))
+
+    def test_sampling_stops_early(self):
+        analysed = video.analyse_sampled(self.path, tolerance=0.05)
+        self.assertLess(len(analysed), 300)
+        self.assertEqual(analysed, sorted(analysed))
+        results = video.analyse(self.path, tolerance=0.05)
+        self.assertEqual(results.keys(), video.analyse(self.path).keys())
@@ -0,0 +1,229 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+import uuid
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from .. import tasks
+from ..Views.helper import download_file
+from ..dependencies.audio_analysis import audio
+from ..dependencies.video_analysis import video
+from ..dependencies.feature_cache import feature_cache
+from ..dependencies.storage.storage import MIN_PART_SIZE, LocalStorage, S3Storage, StorageError
+from ..storage import series_key
+
+# The S3 backend is tested against STORAGE_TEST_ENDPOINT (e.g. a local MinIO server), or against
+# an in-process moto server when moto is installed. Without either the tests are skipped.
+TEST_ENDPOINT = os.getenv("STORAGE_TEST_ENDPOINT")
+
+
+def _start_stand_in():
+    if TEST_ENDPOINT:
+        return None, TEST_ENDPOINT
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        return None, None
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f"http://{host}:{port}"
+
+
+class LocalStorageTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.storage = LocalStorage(self.root)
+
+    def test_round_trip(self):
+        self.storage.upload_chunks([b"frame"] * 1000, "video_input/a.mp4")
+        self.assertTrue(self.storage.exists("video_input/a.mp4"))
+        self.assertEqual(self.storage.size("video_input/a.mp4"), 5000)
+
+        path = os.path.join(tempfile.mkdtemp(), "copy", "a.mp4")
+        self.storage.download("video_input/a.mp4", path)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b"frame" * 1000)
+
+        self.storage.delete("video_input/a.mp4")
+        self.assertFalse(self.storage.exists("video_input/a.mp4"))
+        self.storage.delete("video_input/a.mp4")
+
+    def test_path_under_root_is_the_object(self):
+        path = os.path.join(self.root, "video_output", "a.wav")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as file:
+            file.write(b"wav")
+        self.storage.upload(path, "video_output/a.wav")
+        self.storage.download("video_output/a.wav", path)
+        with self.storage.open("video_output/a.wav") as stream:
+            self.assertEqual(stream.read(), b"wav")
+
+    def test_missing_and_escaping_keys(self):
+        with self.assertRaises(StorageError):
+            self.storage.open("reports/missing.pdf")
+        with self.assertRaises(StorageError):
+            self.storage.exists("../outside")
+
+
+class StageFilesTestCase(SimpleTestCase):
+    """The files of a job on a node whose local paths are not the stored objects."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(tempfile.mkdtemp())
+        self.storage = LocalStorage(tempfile.mkdtemp())
+        patcher = patch("api.tasks.get_storage", return_value=self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def test_fetched_copy_is_removed_after_the_stage(self):
+        self.storage.upload_chunks([b"video"], "video_input/a.mp4")
+        with tasks.fetched("data/video_input/a.mp4") as path:
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), b"video")
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(os.listdir("data/video_input"), [])
+
+    def test_published_file_is_removed_locally(self):
+        os.makedirs("data/video_output/a")
+        with open("data/video_output/a/audio_series.npz", "wb") as file:
+            file.write(b"series")
+        tasks.publish("data/video_output/a/audio_series.npz")
+        self.assertTrue(self.storage.exists("video_output/a/audio_series.npz"))
+        self.assertFalse(os.path.exists("data/video_output/a/audio_series.npz"))
+
+    def test_objects_stored_in_place_are_kept(self):
+        with patch("api.tasks.get_storage", return_value=LocalStorage("data")):
+            os.makedirs("data/video_output/a")
+            with open("data/video_output/a/audio_series.npz", "wb") as file:
+                file.write(b"series")
+            tasks.publish("data/video_output/a/audio_series.npz")
+            with tasks.fetched("data/video_output/a/audio_series.npz") as path:
+                self.assertEqual(path, "data/video_output/a/audio_series.npz")
+            self.assertTrue(os.path.exists(path))
+
+    @patch("api.tasks.report_progress")
+    def test_cached_audio_is_carried_to_the_later_stages(self, mock_progress):
+        job = tasks.build_job("a", "interview", None, "task")
+        job["content_hash"] = "abc"
+        cache_dir = tempfile.mkdtemp()
+        timeline = {"duration": 2.0, "segments": [[0.0, 2.0, "hello"]], "pauses": []}
+        with override_settings(FEATURE_CACHE_DIR=cache_dir):
+            feature_cache.store(cache_dir, "abc", tasks.cache_name("timeline"), timeline)
+            feature_cache.store(cache_dir, "abc", tasks.cache_name("audio"), {"Pace": "Slow pace"})
+            series = os.path.join(cache_dir, "series.npz")
+            np.savez(series, pitch=np.arange(5.0))
+            feature_cache.store_arrays(cache_dir, "abc", tasks.cache_name("audio"), series)
+            job = tasks.extract_audio(job)
+        self.assertFalse(self.storage.exists("video_output/a/a.wav"))
+        self.assertTrue(self.storage.exists(f"video_output/a/{audio.SERIES_FILE}"))
+
+        # the later stages run on a node without the cache entries, and without the audio
+        with override_settings(FEATURE_CACHE_DIR=tempfile.mkdtemp()):
+            job = tasks.analyse_audio(tasks.transcribe(job))
+        self.assertEqual(job["transcript"], "hello")
+        self.assertEqual(job["audio_output"], {"Pace": "Slow pace"})
+
+    def test_video_series_outlives_the_job(self):
+        job = tasks.build_job("a", "interview", None, "task")
+        self.storage.upload_chunks([b"series"], f"video_output/a/{video.SERIES_FILE}")
+        tasks.keep_series(job)
+        tasks.cleanup(job)
+        self.assertFalse(self.storage.exists(f"video_output/a/{video.SERIES_FILE}"))
+        with self.storage.open(series_key("a", video.SERIES_FILE)) as stream:
+            self.assertEqual(stream.read(), b"series")
+
+    @patch("api.Views.helper.requests.get")
+    def test_hash_is_stored_with_the_upload(self, mock_get):
+        response = MagicMock(status_code=200)
+        response.iter_content.return_value = [b"frame"] * 1000
+        mock_get.return_value.__enter__.return_value = response
+        with patch("api.Views.helper.get_storage", return_value=self.storage):
+            self.assertEqual(download_file("https://example.com/a.mp4", "a"), "video_input/a.mp4")
+        self.assertEqual(
+            tasks.recording_hash("data/video_input/a.mp4"), hashlib.sha256(b"frame" * 1000).hexdigest()
+        )
+        self.assertIsNone(tasks.recording_hash("data/video_input/missing.mp4"))
+
+
+class S3StorageTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            import boto3  # noqa: F401
+        except ImportError:
+            raise unittest.SkipTest("boto3 is not installed")
+        cls.server, cls.endpoint = _start_stand_in()
+        if cls.endpoint is None:
+            raise unittest.SkipTest("No S3 compatible endpoint, set STORAGE_TEST_ENDPOINT")
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.server is not None:
+            cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.storage = S3Storage(
+            f"voca-test-{uuid.uuid4().hex[:8]}",
+            endpoint_url=self.endpoint,
+            access_key=os.getenv("STORAGE_TEST_ACCESS_KEY", "testing"),
+            secret_key=os.getenv("STORAGE_TEST_SECRET_KEY", "testing"),
+            region="us-east-1",
+            part_size=MIN_PART_SIZE,
+        )
+        self.storage.client.create_bucket(Bucket=self.storage.bucket)
+
+    def tearDown(self):
+        client = self.storage.client
+        for item in client.list_objects_v2(Bucket=self.storage.bucket).get("Contents", []):
+            client.delete_object(Bucket=self.storage.bucket, Key=item["Key"])
+        client.delete_bucket(Bucket=self.storage.bucket)
+
+    def test_small_object_round_trip(self):
+        self.storage.upload_stream(io.BytesIO(b"report"), "reports/a.pdf")
+        self.assertTrue(self.storage.exists("reports/a.pdf"))
+        self.assertEqual(self.storage.size("reports/a.pdf"), 6)
+        with self.storage.open("reports/a.pdf") as stream:
+            self.assertEqual(stream.read(), b"report")
+
+    def test_multipart_round_trip(self):
+        data = os.urandom(2 * MIN_PART_SIZE + 1234)
+        chunks = (data[i : i + 65536] for i in range(0, len(data), 65536))
+        self.storage.upload_chunks(chunks, "video_input/a.mp4")
+
+        head = self.storage.client.head_object(Bucket=self.storage.bucket, Key="video_input/a.mp4")
+        # the ETag of a multipart object ends with the number of parts
+        self.assertTrue(head["ETag"].strip('"').endswith("-3"))
+
+        path = os.path.join(tempfile.mkdtemp(), "a.mp4")
+        self.storage.download("video_input/a.mp4", path)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), data)
+
+    def test_failed_multipart_upload_is_aborted(self):
+        def chunks():
+            yield os.urandom(2 * MIN_PART_SIZE)
+            raise ConnectionError("video host went away")
+
+        with self.assertRaises(ConnectionError):
+            self.storage.upload_chunks(chunks(), "video_input/b.mp4")
+        uploads = self.storage.client.list_multipart_uploads(Bucket=self.storage.bucket)
+        self.assertEqual(uploads.get("Uploads", []), [])
+        self.assertFalse(self.storage.exists("video_input/b.mp4"))
+
+    def test_missing_object(self):
+        self.assertFalse(self.storage.exists("reports/missing.pdf"))
+        with self.assertRaises(StorageError):
+            self.storage.open("reports/missing.pdf")
+        self.storage.delete("reports/missing.pdf")
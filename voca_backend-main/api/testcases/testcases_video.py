@@ -0,0 +1,124 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from benchmarks import fixtures
+from ..dependencies.video_analysis import video
+
+
+class VideoModelTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.path = fixtures.synthetic_video(os.path.join(tempfile.mkdtemp(), "clip.mp4"), 1, 160, 120, 10)
+
+    def test_holistic_reports_the_same_metrics(self):
+        separate = video.analyse(self.path)
+        holistic = video.analyse(self.path, model="holistic")
+        self.assertEqual(holistic.keys(), separate.keys())
+        self.assertLessEqual(holistic["Hand Gesture Rating (out of 10)"], 10)
+
+    def test_holistic_face_confidence(self):
+        # the synthetic clip has no person in it, stubbed results run the gesture and face branches
+        person = SimpleNamespace(face_landmarks=object(), left_hand_landmarks=None, right_hand_landmarks=object())
+        frame = np.zeros((90, 160, 3), dtype=np.uint8)
+        with video.HolisticAnalyser() as analyser:
+            analyser.holistic = SimpleNamespace(process=lambda frame: person, close=analyser.holistic.close)
+            analyser.face_tracker = video.FaceTracker(ScriptedFaceDetection(score=0.95))
+            analysed = [analyser(frame) for _ in range(4)]
+        self.assertEqual(analysed, [(True, 0.95)] * 4)
+        # the face is rated on the FaceDetection score, the top bands are reachable
+        results = video.summarise(*zip(*analysed))
+        self.assertEqual(results["Body Posture Rating"], "Good")
+        self.assertEqual(results["Overall Confidence Report"], video.evaluate_performance(95, 10, "Good"))
+
+    def test_analysers_are_kept_between_videos(self):
+        with video.analyser_for("separate", face_detect_every=3) as first:
+            tracker = first.face_tracker
+            with video.analyser_for("separate") as concurrent:
+                self.assertIsNot(concurrent, first)
+        with video.analyser_for("separate", face_detect_every=5) as second:
+            self.assertIn(second, (first, concurrent))
+            # the face tracking starts afresh for every video
+            self.assertIsNot(second.face_tracker, tracker)
+            self.assertEqual(second.face_tracker.detect_every, 5)
+
+        with self.assertRaises(ValueError):
+            with video.analyser_for("separate") as failed:
+                raise ValueError("decoding failed")
+        with video.analyser_for("separate") as analyser:
+            self.assertIsNot(analyser, failed)
+
+    def test_per_frame_series(self):
+        save_dir = tempfile.mkdtemp()
+        video.analyse(self.path, save_dir=save_dir)
+        with np.load(os.path.join(save_dir, video.SERIES_FILE)) as series:
+            self.assertEqual(series["frame_times"].dtype, np.float32)
+            self.assertEqual(series["hands"].dtype, bool)
+            self.assertEqual(series["face"].dtype, np.float16)
+            # every other frame of one second at 10 fps
+            self.assertEqual(len(series["frame_times"]), 5)
+            self.assertTrue(np.allclose(series["frame_times"], [0, 0.2, 0.4, 0.6, 0.8]))
+            self.assertEqual(len(series["hands"]), len(series["face"]))
+
+    def test_summarise(self):
+        results = video.summarise([True, False, False, False], [0.95, 0.9, 0.93, 0.92])
+        self.assertEqual(results["Facial Expressions (Percentage)"], "92%")
+        self.assertEqual(results["Hand Gesture Rating (out of 10)"], 2.5)
+        self.assertEqual(results["Body Posture Rating"], "Good")
+        with self.assertRaises(ValueError):
+            video.summarise([], [])
+
+
+class ScriptedFaceDetection:
+    """Stands in for FaceDetection, finding a face in the top left quarter of every frame."""
+
+    def __init__(self, score=0.9):
+        self.calls = 0
+        self.score = score
+
+    def process(self, frame):
+        self.calls += 1
+        box = SimpleNamespace(xmin=0.0, ymin=0.0, width=0.5, height=0.5)
+        detection = SimpleNamespace(score=[self.score], location_data=SimpleNamespace(relative_bounding_box=box))
+        return SimpleNamespace(detections=[detection])
+
+
+class FaceTrackerTestCase(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.scene = rng.integers(0, 255, size=(90, 160, 3), dtype=np.uint8)
+
+    def test_detects_every_n_frames_on_a_static_scene(self):
+        detection = ScriptedFaceDetection()
+        tracker = video.FaceTracker(detection, detect_every=5)
+        scores = [tracker(self.scene) for _ in range(20)]
+        self.assertEqual(detection.calls, 4)
+        self.assertEqual(scores, [0.9] * 20)
+
+    def test_detects_on_scene_change(self):
+        detection = ScriptedFaceDetection()
+        tracker = video.FaceTracker(detection, detect_every=50)
+        for frame in [self.scene] * 5 + [255 - self.scene] * 5:
+            tracker(frame)
+        self.assertEqual(detection.calls, 2)
+
+    def test_detects_when_the_face_region_changes(self):
+        detection = ScriptedFaceDetection()
+        tracker = video.FaceTracker(detection, detect_every=50)
+        moved = self.scene.copy()
+        # only the face region changes, too little of the frame for a scene change
+        moved[:20, :40] = np.flip(moved[:20, :40], axis=1)
+        for frame in [self.scene] * 3 + [moved] * 3:
+            tracker(frame)
+        self.assertEqual(detection.calls, 2)
+
+    def test_every_frame_detects_by_default(self):
+        detection = ScriptedFaceDetection()
+        tracker = video.FaceTracker(detection)
+        for _ in range(3):
+            tracker(self.scene)
+        self.assertEqual(detection.calls, 3)
@@ -0,0 +1,145 @@
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import AnalysisJob
+
+
+@patch("api.Views.videoanalysis.job_status.set_status")
+@patch("api.Views.videoanalysis.report_main.apply_async")
+@patch("api.Views.videoanalysis.download_file")
+@patch("api.Views.videoanalysis.check_user")
+@patch("api.Views.videoanalysis.load_private_key")
+@patch("api.Views.videoanalysis.decrypt_message")
+class VideoAnalysisIdempotencyTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("videoanalysis")
+        self.payload = json.dumps(
+            {
+                "verificationHash": "encrypted",
+                "reportID": "report123",
+                "activityName": "interview",
+                "videoID": "video123",
+                "videoLink": "https://example.com/video123.mp4",
+            }
+        )
+
+    def _post(self):
+        return self.client.post(self.url, self.payload, content_type="application/json")
+
+    @patch("api.Views.videoanalysis.job_status.acquire_lease", return_value=True)
+    def test_first_submission_queues_job(
+        self, mock_lease, mock_decrypt, mock_key, mock_check_user, mock_download, mock_apply, mock_status
+    ):
+        mock_check_user.return_value = True
+        mock_download.return_value = "data/video_input/video123.mp4"
+
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("duplicate", response.json())
+        mock_apply.assert_called_once()
+        job = AnalysisJob.objects.get(videoID="video123")
+        self.assertEqual(job.taskID, response.json()["taskID"])
+        self.assertEqual(job.reportID, "report123")
+
+    @patch("api.Views.videoanalysis.job_status.lease_holder", return_value="running-task")
+    @patch("api.Views.videoanalysis.job_status.acquire_lease", return_value=False)
+    def test_duplicate_attaches_to_running_job(
+        self, mock_lease, mock_holder, mock_decrypt, mock_key, mock_check_user, mock_download, mock_apply, mock_status
+    ):
+        mock_check_user.return_value = True
+
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["taskID"], "running-task")
+        self.assertTrue(response.json()["duplicate"])
+        mock_download.assert_not_called()
+        mock_apply.assert_not_called()
+
+    @patch("api.Views.videoanalysis.job_status.lease_holder", return_value=None)
+    @patch("api.Views.videoanalysis.job_status.acquire_lease", side_effect=[False, True])
+    def test_lease_expiring_before_it_is_read_is_claimed_again(
+        self, mock_lease, mock_holder, mock_decrypt, mock_key, mock_check_user, mock_download, mock_apply, mock_status
+    ):
+        mock_check_user.return_value = True
+        mock_download.return_value = "data/video_input/video123.mp4"
+
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("duplicate", response.json())
+        self.assertEqual(mock_lease.call_count, 2)
+        mock_apply.assert_called_once()
+
+    @patch("api.Views.videoanalysis.job_status.release_lease")
+    @patch("api.Views.videoanalysis.job_status.acquire_lease", return_value=True)
+    def test_duplicate_attaches_to_finished_job(
+        self, mock_lease, mock_release, mock_decrypt, mock_key, mock_check_user, mock_download, mock_apply, mock_status
+    ):
+        mock_check_user.return_value = True
+        AnalysisJob.objects.create(videoID="video123", reportID="report123", taskID="done-task", status="SUCCESS")
+
+        response = self._post()
+        self.assertEqual(response.json()["taskID"], "done-task")
+        self.assertTrue(response.json()["duplicate"])
+        mock_release.assert_called_once()
+        mock_apply.assert_not_called()
+
+    @patch("api.Views.videoanalysis.job_status.acquire_lease", return_value=True)
+    def test_failed_job_can_be_resubmitted(
+        self, mock_lease, mock_decrypt, mock_key, mock_check_user, mock_download, mock_apply, mock_status
+    ):
+        mock_check_user.return_value = True
+        mock_download.return_value = "data/video_input/video123.mp4"
+        AnalysisJob.objects.create(videoID="video123", reportID="report123", taskID="failed-task", status="FAILURE")
+
+        response = self._post()
+        self.assertNotIn("duplicate", response.json())
+        mock_apply.assert_called_once()
+        self.assertEqual(AnalysisJob.objects.get(videoID="video123").status, "QUEUED")
+
+    @patch("api.Views.videoanalysis.job_status.release_lease")
+    @patch("api.Views.videoanalysis.job_status.acquire_lease", return_value=True)
+    def test_duplicate_attaches_to_unfinished_job_within_lease(
+        self, mock_lease, mock_release, mock_decrypt, mock_key, mock_check_user, mock_download, mock_apply, mock_status
+    ):
+        mock_check_user.return_value = True
+        AnalysisJob.objects.create(videoID="video123", reportID="report123", taskID="queued-task", status="QUEUED")
+
+        response = self._post()
+        self.assertEqual(response.json()["taskID"], "queued-task")
+        mock_apply.assert_not_called()
+
+    @patch("api.Views.videoanalysis.job_status.acquire_lease", return_value=True)
+    def test_stale_job_can_be_resubmitted(
+        self, mock_lease, mock_decrypt, mock_key, mock_check_user, mock_download, mock_apply, mock_status
+    ):
+        mock_check_user.return_value = True
+        mock_download.return_value = "data/video_input/video123.mp4"
+        AnalysisJob.objects.create(videoID="video123", reportID="report123", taskID="lost-task", status="QUEUED")
+        # a worker killed without the errback leaves its job unfinished
+        stale = timezone.now() - timedelta(seconds=settings.JOB_LEASE_TTL + 1)
+        AnalysisJob.objects.filter(videoID="video123").update(updated_at=stale)
+
+        response = self._post()
+        self.assertNotIn("duplicate", response.json())
+        mock_apply.assert_called_once()
+        self.assertEqual(AnalysisJob.objects.get(videoID="video123").taskID, response.json()["taskID"])
+
+    @patch("api.Views.videoanalysis.job_status.release_lease")
+    @patch("api.Views.videoanalysis.job_status.acquire_lease", return_value=True)
+    def test_failed_download_releases_lease(
+        self, mock_lease, mock_release, mock_decrypt, mock_key, mock_check_user, mock_download, mock_apply, mock_status
+    ):
+        mock_check_user.return_value = True
+        mock_download.return_value = False
+
+        response = self._post()
+        self.assertEqual(response.status_code, 400)
+        mock_release.assert_called_once()
+        self.assertFalse(AnalysisJob.objects.filter(videoID="video123").exists())
@@ -0,0 +1,29 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from .. import warmup
+
+
+class WarmupTestCase(SimpleTestCase):
+    def test_components_for_queue(self):
+        self.assertEqual(warmup.components_for("video-cpu"), ["video"])
+        self.assertEqual(warmup.components_for("audio-cpu"), ["audio", "vader"])
+        self.assertEqual(warmup.components_for(None), list(warmup.COMPONENTS))
+
+    def test_setting_overrides_queue(self):
+        self.assertEqual(warmup.components_for("video-cpu", "gemini, render"), ["gemini", "render"])
+        self.assertEqual(warmup.components_for("video-cpu", "none"), [])
+
+    def test_failing_component_does_not_stop_warm_up(self):
+        calls = []
+        components = {
+            "broken": lambda directory: (_ for _ in ()).throw(RuntimeError("no model")),
+            "render": lambda directory: calls.append(directory),
+        }
+        with patch.dict(warmup.COMPONENTS, components, clear=True):
+            timings = warmup.warm_up(["broken", "render", "unknown"])
+        self.assertIsNone(timings["broken"])
+        self.assertIsNone(timings["unknown"])
+        self.assertIsNotNone(timings["render"])
+        self.assertEqual(len(calls), 1)
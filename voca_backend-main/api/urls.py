@@ -1,12 +1,13 @@
 from django.urls import path
 
-from .Views import register, returnreport, videoanalysis, wordoftheday, keyexchange
+from .Views import register, returnreport, videoanalysis, wordoftheday, keyexchange, jobstatus
 
 urlpatterns = [
     path("register", register.Register.as_view(), name="register"),
     path("fetchreport", returnreport.ReturnReport.as_view(), name="fetchreport"),
     path("videoanalysis", videoanalysis.VideoAnalysis.as_view(), name="videoanalysis"),
     path("wod", wordoftheday.WordOfTheDay.as_view(), name="wod"),
-    path("key", keyexchange.KeyExchange.as_view(), name="keyx")
+    path("key", keyexchange.KeyExchange.as_view(), name="keyx"),
+    path("jobstatus/<str:video_id>", jobstatus.JobStatus.as_view(), name="jobstatus"),
     # path("csrf", views.gen_csrf, name="csrf_gen"),
 ]
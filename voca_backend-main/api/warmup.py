@@ -0,0 +1,148 @@
+"""
+Warm-up run by every Celery worker process before it takes jobs (see voca_backend/celery.py).
+
+The first task on a fresh worker otherwise pays for building the MediaPipe graphs, loading the
+VADER lexicon, the first Praat, scipy and OpenCV calls and configuring the Gemini client. Each
+component runs its stage once against a tiny synthetic clip, so the libraries, models and
+per process caches are loaded before the first real job arrives.
+"""
+import logging
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+CLIP_SECONDS = 1.0
+CLIP_SAMPLE_RATE = 16000
+CLIP_SIZE = (160, 120)
+CLIP_FPS = 10
+
+# components warmed by a worker consuming each queue, a worker for every queue warms them all
+QUEUE_COMPONENTS = {
+    "video-cpu": ["video"],
+    "audio-cpu": ["audio", "vader"],
+    "llm-io": ["gemini"],
+    "render": ["render"],
+}
+
+
+def _clip_audio(directory: str) -> str:
+    path = os.path.join(directory, "warmup.wav")
+    t = np.arange(int(CLIP_SECONDS * CLIP_SAMPLE_RATE)) / CLIP_SAMPLE_RATE
+    signal = 0.3 * np.sin(2 * np.pi * 150 * t) * (t < CLIP_SECONDS / 2)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(CLIP_SAMPLE_RATE)
+        wf.writeframes((signal * 32767).astype(np.int16).tobytes())
+    return path
+
+
+def _clip_video(directory: str) -> str:
+    import cv2
+
+    path = os.path.join(directory, "warmup.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), CLIP_FPS, CLIP_SIZE)
+    for i in range(int(CLIP_SECONDS * CLIP_FPS)):
+        frame = np.full((CLIP_SIZE[1], CLIP_SIZE[0], 3), 60, dtype=np.uint8)
+        cv2.circle(frame, (CLIP_SIZE[0] // 2 + i, CLIP_SIZE[1] // 2), CLIP_SIZE[1] // 4, (140, 170, 220), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def warm_video(directory: str):
+    """
+    Analyses the clip in the worker process, which keeps the analyser it built for the video
+    stages (see video.analyser_for). With VIDEO_PROCESSES above 1 the graphs are built by the
+    analysis processes of every job, only the imports and model files are warmed for them.
+    """
+    from django.conf import settings
+
+    from api.dependencies.video_analysis import video
+
+    video.analyse(
+        _clip_video(directory),
+        model=settings.VIDEO_MODEL,
+        face_detect_every=settings.VIDEO_FACE_DETECT_EVERY,
+        decoder=settings.VIDEO_DECODER,
+    )
+
+
+def warm_audio(directory: str):
+    from api.dependencies.audio_analysis import audio
+
+    context = audio.AudioContext(_clip_audio(directory))
+    audio.analyze_volume_energy(context.volume[1])
+    audio.analyze_pitch_and_tone(context.pitch[1])
+    audio.analyze_clarity(context.samples, context.sample_rate)
+    audio.detect_silences(context.audio_path)
+
+
+def warm_vader(directory: str):
+    from api.dependencies.audio_analysis import audio
+
+    audio.analyze_tones(["warm up"])
+
+
+def warm_gemini(directory: str):
+    from api.dependencies.geminiAPI import gemini
+
+    gemini.get_model()
+
+
+def warm_render(directory: str):
+    from api.dependencies.report_generation import pdf
+
+    pdf.load_image(pdf.LOGO_PATH)
+
+
+COMPONENTS = {
+    "video": warm_video,
+    "audio": warm_audio,
+    "vader": warm_vader,
+    "gemini": warm_gemini,
+    "render": warm_render,
+}
+
+
+def components_for(queue: str = None, setting: str = None) -> list:
+    """
+    Returns the components a worker warms.
+
+    Args:
+        queue: The WORKER_QUEUE of the worker, None for a worker consuming every queue.
+        setting: The WORKER_WARMUP setting, a comma separated list of components, "none" to
+            disable the warm-up or empty to pick the components of the queue.
+    """
+    if setting:
+        if setting.strip().lower() == "none":
+            return []
+        return [name.strip() for name in setting.split(",") if name.strip()]
+    if queue in QUEUE_COMPONENTS:
+        return QUEUE_COMPONENTS[queue]
+    return list(COMPONENTS)
+
+
+def warm_up(components: list) -> dict:
+    """
+    Runs the warm-up of every component. A failing component is logged and skipped, it never
+    stops the worker from starting.
+
+    Returns:
+        dict: The seconds every component took, None for the ones that failed.
+    """
+    timings = {}
+    with tempfile.TemporaryDirectory(prefix="voca-warmup-") as directory:
+        for name in components:
+            start = time.perf_counter()
+            try:
+                COMPONENTS[name](directory)
+                timings[name] = round(time.perf_counter() - start, 3)
+            except Exception as e:
+                logging.error(f"Worker warm-up of {name} failed: {e}")
+                timings[name] = None
+    logging.info(f"Worker warm-up finished: {timings}")
+    return timings
@@ -0,0 +1,126 @@
+import os
+import wave
+
+import numpy as np
+
+AAC_FRAME_SIZE = 1024
+
+
+def synthetic_audio(path: str, duration: float, sample_rate: int = 44100, channels: int = 2, seed: int = 0) -> str:
+    """
+    Writes a speech like 16 bit PCM WAV file: a harmonic voice with a wandering pitch, syllable
+    rate amplitude modulation and pauses of 0.4 to 1.5 seconds every few seconds.
+
+    Args:
+        path: The file to write.
+        duration: Seconds of audio.
+        sample_rate: Samples per second.
+        channels: 2 matches the stereo files extract_audio_from_video writes.
+        seed: Seed of the pause placement and pitch wander.
+
+    Returns:
+        str: The path.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    t = np.arange(n) / sample_rate
+
+    f0 = 150 + 40 * np.sin(2 * np.pi * 0.2 * t) + 10 * np.cumsum(rng.normal(size=n)) / np.sqrt(sample_rate * 50)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+
+    gate = np.ones(n)
+    position = rng.uniform(2, 5)
+    while position < duration:
+        length = rng.uniform(0.4, 1.5)
+        gate[int(position * sample_rate):int((position + length) * sample_rate)] = 0
+        position += length + rng.uniform(2, 6)
+
+    signal = 0.2 * voice * envelope * gate + 0.002 * rng.normal(size=n)
+    pcm = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(np.repeat(pcm, channels).tobytes())
+    return path
+
+
+def _frames(duration: float, width: int, height: int, fps: int, seed: int):
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    background = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+    for i in range(int(duration * fps)):
+        frame = background.copy()
+        sway = int(width * 0.05 * np.sin(i / fps))
+        center = (width // 2 + sway, height // 2)
+        axes = (width // 10, height // 5)
+        cv2.ellipse(frame, center, axes, 0, 0, 360, (140, 170, 220), -1)
+        hand_y = int(height * (0.7 + 0.15 * np.sin(2 * i / fps)))
+        cv2.circle(frame, (width // 4, hand_y), width // 20, (130, 160, 210), -1)
+        yield frame
+
+
+def synthetic_video(path: str, duration: float, width: int = 640, height: int = 360, fps: int = 30, seed: int = 0) -> str:
+    """
+    Writes an MP4 of a moving skin toned face and hand shapes on a noisy background.
+
+    Args:
+        path: The file to write.
+        duration: Seconds of video.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        fps: Frames per second.
+        seed: Seed of the background noise.
+
+    Returns:
+        str: The path.
+    """
+    import cv2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for frame in _frames(duration, width, height, fps, seed):
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def synthetic_recording(
+    path: str, duration: float, width: int = 640, height: int = 360, fps: int = 30, sample_rate: int = 44100, seed: int = 0
+) -> str:
+    """
+    Writes an MP4 with the frames of synthetic_video and the speech of synthetic_audio as AAC,
+    like the recordings users upload.
+
+    Returns:
+        str: The path.
+    """
+    import av
+
+    wav = synthetic_audio(path + ".wav", duration, sample_rate=sample_rate, seed=seed)
+    with wave.open(wav, "rb") as wf:
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).reshape(-1, 2)
+    os.remove(wav)
+
+    with av.open(path, "w") as container:
+        video_stream = container.add_stream("mpeg4", rate=fps)
+        video_stream.width, video_stream.height, video_stream.pix_fmt = width, height, "yuv420p"
+        audio_stream = container.add_stream("aac", rate=sample_rate)
+        audio_stream.layout = "stereo"
+
+        for frame in _frames(duration, width, height, fps, seed):
+            container.mux(video_stream.encode(av.VideoFrame.from_ndarray(frame, format="bgr24")))
+        container.mux(video_stream.encode())
+
+        for start in range(0, len(pcm), AAC_FRAME_SIZE):
+            chunk = pcm[start:start + AAC_FRAME_SIZE]
+            frame = av.AudioFrame.from_ndarray(np.ascontiguousarray(chunk).reshape(1, -1), format="s16", layout="stereo")
+            frame.sample_rate = sample_rate
+            frame.pts = start
+            container.mux(audio_stream.encode(frame))
+        container.mux(audio_stream.encode())
+    return path
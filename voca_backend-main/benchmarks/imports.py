@@ -0,0 +1,58 @@
+"""
+Measures what the Django web process loads at startup and fails if it pulls in the analysis stack.
+
+    python -m benchmarks.imports
+
+Prints the import time, the peak RSS and any analysis module that was imported, and exits 1 if
+there are any. The check runs in a fresh interpreter, so it is not affected by the caller's imports.
+"""
+import json
+import subprocess
+import sys
+
+# modules only the Celery workers need
+ANALYSIS_MODULES = [
+    "api.tasks",
+    "cv2",
+    "mediapipe",
+    "parselmouth",
+    "moviepy",
+    "nltk",
+    "scipy",
+    "reportlab",
+    "google.generativeai",
+]
+
+PROBE = """
+import json, os, resource, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "voca_backend.settings")
+start = time.perf_counter()
+import django
+django.setup()
+import voca_backend.urls
+seconds = time.perf_counter() - start
+print(json.dumps({
+    "import_seconds": round(seconds, 3),
+    "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "modules": len(sys.modules),
+    "analysis_modules": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def measure() -> dict:
+    """Imports the web process' URLconf in a fresh interpreter and reports what it loaded."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % ANALYSIS_MODULES], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    result = measure()
+    print(json.dumps(result, indent=2))
+    return 1 if result["analysis_modules"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
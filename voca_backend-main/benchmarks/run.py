@@ -0,0 +1,248 @@
+"""
+Benchmarks the analysis pipeline stages on synthetic media, with Gemini and speech to text
+replaced by local stubs so no network is used.
+
+Every stage runs in its own spawned process, so the reported peak RSS is what a worker running
+only that stage would reach, imports included.
+
+    python -m benchmarks.run --duration 60 --repeat 5
+    python -m benchmarks.run --write-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.2
+
+Run from the directory holding manage.py. With --baseline the exit code is 1 if any stage is
+slower or uses more memory than the baseline allows.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from queue import Empty
+
+import numpy as np
+
+STAGES = [
+    "transcribe",
+    "audio_analysis",
+    "video_analysis",
+    "video_analysis_holistic",
+    "video_analysis_pyav",
+    "gemini_report",
+    "render_pdf",
+]
+PERCENTILES = (50, 90, 99)
+# seconds a stage may run, and between checks that its process is still alive
+STAGE_TIMEOUT = 3600.0
+POLL_INTERVAL = 1.0
+
+
+def _setup(stage: str, fixtures: dict):
+    """Returns the callable timed for a stage, untimed preparation happens here."""
+    from benchmarks import stubs
+
+    if stage == "transcribe":
+        from api.dependencies.audio_analysis import audio
+
+        return lambda: audio.transcribe_timeline(fixtures["audio_path"])
+
+    if stage == "audio_analysis":
+        from api.dependencies.audio_analysis import audio
+
+        timeline = audio.transcribe_timeline(fixtures["audio_path"])
+        return lambda: audio.analyse(fixtures["audio_path"], timeline, fixtures["work_dir"])
+
+    if stage == "video_analysis":
+        from api.dependencies.video_analysis import video
+
+        return lambda: video.analyse(fixtures["video_path"])
+
+    if stage == "video_analysis_holistic":
+        from api.dependencies.video_analysis import video
+
+        return lambda: video.analyse(fixtures["video_path"], model="holistic")
+
+    if stage == "video_analysis_pyav":
+        from api.dependencies.video_analysis import video
+
+        return lambda: video.analyse(fixtures["video_path"], decoder="pyav")
+
+    if stage == "gemini_report":
+        from api.dependencies.audio_analysis import audio
+        from api.dependencies.geminiAPI import gemini
+
+        transcript = audio.transcribe_timeline(fixtures["audio_path"]).text
+        return lambda: gemini.get_report("interview", transcript, stubs.StubModel())
+
+    if stage == "render_pdf":
+        from api.dependencies.audio_analysis import audio
+        from api.dependencies.report_generation import pdf
+
+        timeline = audio.transcribe_timeline(fixtures["audio_path"])
+        results = {
+            "audio_output": audio.analyse(fixtures["audio_path"], timeline, fixtures["work_dir"]),
+            "video_output": {"Body Posture Rating": "Good", "Overall Confidence Report": "Benchmark."},
+            "gemini_output": stubs.STUB_REPORT,
+        }
+        series = os.path.join(fixtures["work_dir"], audio.SERIES_FILE)
+        return lambda: pdf.generate_pdf(
+            results, "benchmark", "2025-01-01", "interview", fixtures["work_dir"], "benchmark", series
+        )
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def _run_stage(stage: str, fixtures: dict, repeat: int, warmup: int, queue):
+    from benchmarks import stubs
+
+    try:
+        with stubs.local_services():
+            run = _setup(stage, fixtures)
+            for _ in range(warmup):
+                run()
+            latencies = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                latencies.append(time.perf_counter() - start)
+        # ru_maxrss is in kilobytes on Linux
+        queue.put({"latencies": latencies, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def measure(
+    stage: str, fixtures: dict, repeat: int, warmup: int, timeout: float = STAGE_TIMEOUT, target=_run_stage
+) -> dict:
+    """
+    Times a stage in a fresh process.
+
+    Returns:
+        dict: The latency percentiles and mean in seconds, the throughput in seconds of media
+        per second at the median latency, and the peak RSS of the process in MB. An "error"
+        instead if the stage raised, its process exited without a result or it ran longer
+        than timeout seconds.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=target, args=(stage, fixtures, repeat, warmup, queue))
+    process.start()
+    deadline = time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=POLL_INTERVAL)
+        except Empty:
+            if not process.is_alive():
+                # a result put right before the process exited may still be in flight
+                try:
+                    result = queue.get(timeout=POLL_INTERVAL)
+                except Empty:
+                    result = {"error": f"Stage process exited with code {process.exitcode}"}
+            elif time.monotonic() > deadline:
+                process.kill()
+                result = {"error": f"Stage timed out after {timeout} s"}
+    process.join()
+    if "error" in result:
+        return result
+
+    latencies = np.array(result["latencies"])
+    summary = {f"p{p}": round(float(np.percentile(latencies, p)), 4) for p in PERCENTILES}
+    summary["mean"] = round(float(latencies.mean()), 4)
+    summary["throughput"] = round(fixtures["duration"] / summary["p50"], 2) if summary["p50"] else None
+    summary["peak_rss_mb"] = round(result["peak_rss_mb"], 1)
+    return summary
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compares stage results with a baseline.
+
+    Args:
+        results: The stage results of this run.
+        baseline: The stage results of the baseline run.
+        tolerance: The allowed relative increase of latency and peak RSS.
+
+    Returns:
+        list: A message for every regression, empty if there are none.
+    """
+    regressions = []
+    for stage, actual in results["stages"].items():
+        expected = baseline.get("stages", {}).get(stage)
+        if expected is None or "error" in expected:
+            continue
+        if "error" in actual:
+            regressions.append(f"{stage}: {actual['error']}")
+            continue
+        for metric in ("p50", "p90", "peak_rss_mb"):
+            if metric in expected and actual[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(f"{stage}: {metric} {actual[metric]} exceeds baseline {expected[metric]}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of synthetic media")
+    parser.add_argument("--resolution", default="640x360", help="video WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=STAGE_TIMEOUT, help="seconds a stage may run")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--write-baseline", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    from benchmarks import fixtures as media
+
+    width, height = (int(v) for v in args.resolution.lower().split("x"))
+    work_dir = tempfile.mkdtemp(prefix="voca-bench-")
+    fixtures = {
+        "duration": args.duration,
+        "work_dir": work_dir,
+        "audio_path": media.synthetic_audio(os.path.join(work_dir, "bench.wav"), args.duration),
+    }
+    if any(stage.startswith("video_analysis") for stage in args.stages):
+        fixtures["video_path"] = media.synthetic_video(
+            os.path.join(work_dir, "bench.mp4"), args.duration, width, height, args.fps
+        )
+
+    results = {
+        "config": {
+            "duration": args.duration,
+            "resolution": args.resolution,
+            "fps": args.fps,
+            "repeat": args.repeat,
+        },
+        "stages": {},
+    }
+    try:
+        for stage in args.stages:
+            results["stages"][stage] = measure(stage, fixtures, args.repeat, args.warmup, args.timeout)
+            print(f"{stage}: {results['stages'][stage]}", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(results, indent=2))
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("config") != results["config"]:
+            print("Warning: the baseline was recorded with a different configuration", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import json
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+WORDS_PER_SECOND = 2.3  # an average speaking rate
+STUB_WORDS = ["so", "the", "project", "um", "we", "built", "a", "model", "that", "works", "like", "this"]
+
+STUB_REPORT = {
+    "grammatical_errors": [{"error": "we was", "correction": "we were"}],
+    "relevance": {"percentage": 80, "non_relevant_parts": []},
+    "repetition": ["the project"],
+    "vocabulary": ["Use more precise verbs"],
+    "strengths": ["Clear structure"],
+    "weaknesses": ["Filler words"],
+    "summary": "A short benchmark talk.",
+    "grade": 7,
+}
+
+
+class StubModel:
+    """Answers every prompt with a fixed report, in place of the Gemini model."""
+
+    def generate_content(self, prompt, generation_config=None):
+        return SimpleNamespace(text=json.dumps(STUB_REPORT))
+
+
+def recognize_segment(audio_data) -> str:
+    """Returns a transcript as long as a speaker would say in the clip, in place of Google STT."""
+    seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+    count = int(seconds * WORDS_PER_SECOND)
+    return " ".join(STUB_WORDS[i % len(STUB_WORDS)] for i in range(count))
+
+
+@contextmanager
+def local_services():
+    """Replaces the network services used by the pipeline with the local stubs."""
+    with mock.patch("api.dependencies.audio_analysis.audio.recognize_segment", recognize_segment):
+        yield
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'voca_backend.settings')
@@ -9,6 +10,82 @@ app = Celery('voca_backend')
 app.conf.worker_concurrency = 3
 app.conf.worker_log_level = 'info'
 app.conf.broker_connection_retry_on_startup = True
+
+# Every pipeline stage goes to the queue matching its resource profile so the CPU bound
+# workers can be scaled separately from the network bound ones.
+app.conf.task_routes = {
+    'api.tasks.analyse_video': {'queue': 'video-cpu'},
+    'api.tasks.ingest_media': {'queue': 'video-cpu'},
+    'api.tasks.extract_audio': {'queue': 'audio-cpu'},
+    'api.tasks.analyse_audio': {'queue': 'audio-cpu'},
+    'api.tasks.transcribe': {'queue': 'llm-io'},
+    'api.tasks.gemini_report': {'queue': 'llm-io'},
+    'api.tasks.main': {'queue': 'llm-io'},
+    'api.tasks.render_report': {'queue': 'render'},
+    'api.tasks.pipeline_failed': {'queue': 'render'},
+}
+# failures in either branch of the pipeline chord also run the cleanup errback
+app.conf.task_allow_error_cb_on_chord_header = True
+
+# Worker settings per queue. A worker started for a single queue sets WORKER_QUEUE to it
+# (WORKER_QUEUE=video-cpu celery -A voca_backend worker -Q video-cpu) and picks up the
+# matching profile. Long CPU bound tasks prefetch one job at a time, network bound tasks
+# run on threads with a deeper prefetch.
+QUEUE_PROFILES = {
+    'video-cpu': {
+        'worker_concurrency': int(os.getenv('VIDEO_CPU_CONCURRENCY', 2)),
+        'worker_prefetch_multiplier': 1,
+    },
+    'audio-cpu': {
+        'worker_concurrency': int(os.getenv('AUDIO_CPU_CONCURRENCY', 2)),
+        'worker_prefetch_multiplier': 1,
+    },
+    'llm-io': {
+        'worker_pool': 'threads',
+        'worker_concurrency': int(os.getenv('LLM_IO_CONCURRENCY', 16)),
+        'worker_prefetch_multiplier': 4,
+    },
+    'render': {
+        'worker_concurrency': int(os.getenv('RENDER_CONCURRENCY', 2)),
+        'worker_prefetch_multiplier': 1,
+    },
+}
+# With VIDEO_PROCESSES above 1 every video job fans its frames out to its own analysis
+# processes, which the daemonic children of the prefork pool are not allowed to start, so the
+# video jobs run on threads instead.
+if int(os.getenv('VIDEO_PROCESSES', 1)) > 1:
+    QUEUE_PROFILES['video-cpu']['worker_pool'] = 'threads'
+if os.getenv('WORKER_QUEUE') in QUEUE_PROFILES:
+    app.conf.update(QUEUE_PROFILES[os.getenv('WORKER_QUEUE')])
+
+# Each worker process runs its warm-up (api/warmup.py) before taking jobs. WORKER_WARMUP lists
+# the components to warm, comma separated, or "none"; by default a worker warms what its
+# WORKER_QUEUE needs. The warm-up runs inside worker_process_init, so the time a child may take
+# to report in is raised from Celery's 4 seconds.
+app.conf.worker_proc_alive_timeout = int(os.getenv('WORKER_PROC_ALIVE_TIMEOUT', 120))
+
+
+def warm_up_worker():
+    from api import warmup
+
+    warmup.warm_up(warmup.components_for(os.getenv('WORKER_QUEUE'), os.getenv('WORKER_WARMUP')))
+
+
+@worker_process_init.connect
+def warm_up_pool_process(**kwargs):
+    warm_up_worker()
+
+
+@worker_init.connect
+def warm_up_threaded_worker(sender=None, **kwargs):
+    # thread and solo pools run tasks in the main process, which never sends worker_process_init.
+    # pool_cls is still the -P alias or the pool class at this point.
+    pool = getattr(sender, 'pool_cls', None) or app.conf.worker_pool
+    name = pool if isinstance(pool, str) else getattr(pool, '__module__', '')
+    if 'thread' in name or 'solo' in name:
+        warm_up_worker()
+
+
 # Using a string here means the worker doesn't have to serialize
 # the configuration object to child processes.
 # - namespace='CELERY' means all celery-related configuration keys
@@ -16,3 +93,4 @@ app.conf.broker_connection_retry_on_startup = True
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks(["api"])
+